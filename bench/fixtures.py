@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for YouTube, Ollama and Telegram used by the benchmarks.
+
+Each fixture is a small threaded HTTP server on 127.0.0.1 (random port):
+    YouTubeFixture   homepage with N lazily rendered ytd-rich-item-renderer
+                     cards (plus ytInitialData), watch pages with a working
+                     Save -> Watch later menu, the InnerTube edit_playlist
+                     call behind it, injected latency
+    OllamaFixture    /api/tags, /api/ps, /api/chat (streaming and not) and
+                     /api/embed with a simple load/prompt/generation cost model
+    TelegramFixture  /bot<token>/sendMessage with optional 429 rate limiting
+
+Settings live in each fixture's `config` dict and can be changed between
+benchmarks; GET /bench/stats on any fixture returns its request counters.
+
+Run standalone to poke at the pages in a browser:
+    python bench/fixtures.py --cards 200
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+class FixtureServer:
+    """
+    Threaded HTTP server with per-path request counters.
+
+    Subclasses implement route(method, path, query, body) and return
+    (status, content_type, payload) where payload is bytes, or an iterator
+    of bytes to stream with chunked transfer encoding.
+    """
+
+    name = "fixture"
+
+    def __init__(self, **config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.requests = {}
+        self._local = threading.local()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fixture._dispatch(self, "GET")
+
+            def do_POST(self):
+                fixture._dispatch(self, "POST")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"requests": dict(self.requests)}
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = {}
+
+    @property
+    def headers(self):
+        """
+        Headers of the request being routed on this thread.
+        """
+        return self._local.headers
+
+    def _dispatch(self, handler, method: str):
+        self._local.headers = handler.headers
+        parts = urlsplit(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self.lock:
+            key = f"{method} {parts.path}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+        if parts.path == "/bench/stats":
+            status, ctype, payload = 200, "application/json", json.dumps(self.stats()).encode()
+        else:
+            try:
+                status, ctype, payload = self.route(method, parts.path, parse_qs(parts.query), body)
+            except Exception as e:
+                status, ctype, payload = 500, "text/plain", f"{self.name} fixture error: {e}".encode()
+
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", ctype)
+            if isinstance(payload, (bytes, bytearray)):
+                handler.send_header("Content-Length", str(len(payload)))
+                handler.end_headers()
+                handler.wfile.write(payload)
+                return
+
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+            for chunk in payload:
+                handler.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                handler.wfile.flush()
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (timeout, or a process exiting mid-request)
+            handler.close_connection = True
+
+    def route(self, method, path, query, body):
+        return 404, "text/plain", b"not found"
+
+    def delay(self, key: str = "latency_ms"):
+        ms = self.config.get(key, 0)
+        if ms:
+            time.sleep(ms / 1000)
+
+
+# ---------- YouTube ----------
+
+def fixture_videos(count: int, shorts_every: int = 10) -> list:
+    """
+    Deterministic synthetic feed: every `shorts_every`-th entry is a Short.
+    """
+    videos = []
+    for i in range(count):
+        video_id = f"bench{i:06d}"[:11]
+        videos.append({
+            "video_id": video_id,
+            "title": f"Benchmark video {i}: {['Rust', 'Python', 'Cooking', 'Chess', 'Physics'][i % 5]} deep dive",
+            "channel": f"Channel {i % 37}",
+            "short": shorts_every > 0 and i % shorts_every == shorts_every - 1,
+        })
+    return videos
+
+
+HOMEPAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>YouTube (bench fixture)</title>
+<style>ytd-rich-item-renderer {{ display: block; height: 320px; }}</style>
+<script>var ytInitialData = {initial_data};</script>
+</head><body><div id="contents"></div>
+<script>
+const CARDS = {cards};
+const BATCH = {batch};
+const HYDRATE_MS = {hydrate_ms};
+const contents = document.getElementById("contents");
+let rendered = 0, pending = false;
+
+function renderBatch() {{
+  const end = Math.min(rendered + BATCH, CARDS.length);
+  for (; rendered < end; rendered++) {{
+    const c = CARDS[rendered];
+    const card = document.createElement("ytd-rich-item-renderer");
+    const h3 = document.createElement("h3");
+    const link = document.createElement("a");
+    link.textContent = c.title;
+    h3.appendChild(link);
+    const thumb = document.createElement("yt-thumbnail-view-model");
+    const img = document.createElement("img");
+    img.setAttribute("src", "/vi/" + c.id + "/hqdefault.jpg");
+    thumb.appendChild(img);
+    const meta = document.createElement("yt-content-metadata-view-model");
+    const channel = document.createElement("a");
+    channel.setAttribute("href", "/@" + c.channel.replace(/ /g, ""));
+    channel.textContent = c.channel;
+    meta.appendChild(channel);
+    card.append(h3, thumb, meta);
+    contents.appendChild(card);
+    // Links hydrate after the card is attached, like the real feed
+    const href = (c.short ? "/shorts/" : "/watch?v=") + c.id;
+    setTimeout(() => link.setAttribute("href", href), HYDRATE_MS);
+  }}
+}}
+
+renderBatch();
+window.addEventListener("scroll", () => {{
+  if (pending || rendered >= CARDS.length) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 2000) return;
+  pending = true;
+  setTimeout(() => {{ renderBatch(); pending = false; }}, HYDRATE_MS);
+}});
+</script></body></html>"""
+
+WATCH_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title} - YouTube (bench fixture)</title></head><body>
+<h1>{title}</h1>
+<div id="actions">
+  <button aria-label="Like">Like</button>
+  <button aria-label="Save to playlist" id="save">Save</button>
+</div>
+<div id="menu" hidden>
+  <ytd-playlist-add-to-option-renderer id="watch-later">Watch later</ytd-playlist-add-to-option-renderer>
+</div>
+<script>
+document.getElementById("save").addEventListener("click", () => {{
+  setTimeout(() => {{ document.getElementById("menu").hidden = false; }}, {menu_ms});
+}});
+document.getElementById("watch-later").addEventListener("click", () => {{
+  fetch("/bench/saved?v={video_id}", {{method: "POST"}});
+}});
+</script></body></html>"""
+
+# 1x1 transparent GIF for thumbnail requests that get through
+PIXEL = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+
+class YouTubeFixture(FixtureServer):
+    """
+    config: cards (feed size), batch (cards rendered per scroll),
+    latency_ms (per page request), hydrate_ms (link hydration / lazy
+    render delay), menu_ms (Save menu open delay), api_ms (per
+    youtubei/v1/browse/edit_playlist call, which checks the SAPISIDHASH
+    against the SAPISID cookie).
+    """
+
+    name = "youtube"
+
+    def __init__(self, cards: int = 100, batch: int = 24, latency_ms: float = 0,
+                 hydrate_ms: float = 50, menu_ms: float = 50, api_ms: float = 30):
+        super().__init__(cards=cards, batch=batch, latency_ms=latency_ms, hydrate_ms=hydrate_ms, menu_ms=menu_ms,
+                         api_ms=api_ms)
+        self.saved = []
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["saved"] = list(self.saved)
+        return stats
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.saved = []
+
+    def videos(self) -> list:
+        return fixture_videos(self.config["cards"])
+
+    def watch_url(self, video: dict) -> str:
+        return f"{self.url}/watch?v={video['video_id']}"
+
+    def route(self, method, path, query, body):
+        if path == "/":
+            self.delay()
+            return 200, "text/html; charset=utf-8", self.homepage().encode()
+        if path == "/watch":
+            self.delay()
+            video_id = query.get("v", [""])[0]
+            html = WATCH_TEMPLATE.format(
+                title=escape(f"Video {video_id}"), video_id=escape(video_id), menu_ms=self.config["menu_ms"],
+            )
+            return 200, "text/html; charset=utf-8", html.encode()
+        if path == "/bench/saved" and method == "POST":
+            with self.lock:
+                self.saved.append(query.get("v", [""])[0])
+            return 204, "text/plain", b""
+        if path == "/youtubei/v1/browse/edit_playlist" and method == "POST":
+            self.delay("api_ms")
+            return self.edit_playlist(json.loads(body or b"{}"))
+        if path.startswith("/vi/"):
+            return 200, "image/gif", PIXEL
+        return super().route(method, path, query, body)
+
+    def edit_playlist(self, payload: dict):
+        cookies = dict(
+            part.strip().split("=", 1) for part in (self.headers.get("Cookie") or "").split(";") if "=" in part
+        )
+        auth = self.headers.get("Authorization") or ""
+        origin = self.headers.get("Origin") or ""
+        match = re.fullmatch(r"SAPISIDHASH (\d+)_([0-9a-f]{40})", auth)
+        sapisid = cookies.get("SAPISID") or cookies.get("__Secure-3PAPISID")
+        expected = sapisid and match and hashlib.sha1(f"{match[1]} {sapisid} {origin}".encode()).hexdigest()
+        if not match or match[2] != expected:
+            error = {"error": {"code": 401, "message": "Request had invalid authentication credentials.",
+                               "status": "UNAUTHENTICATED"}}
+            return 401, "application/json", json.dumps(error).encode()
+
+        if payload.get("playlistId") != "WL":
+            error = {"error": {"code": 400, "message": "Unknown playlist", "status": "INVALID_ARGUMENT"}}
+            return 400, "application/json", json.dumps(error).encode()
+        added = [a.get("addedVideoId") for a in payload.get("actions", []) if a.get("action") == "ACTION_ADD_VIDEO"]
+        with self.lock:
+            self.saved.extend(added)
+        result = {"status": "STATUS_SUCCEEDED", "actions": [{"addedFullVideoId": v} for v in added]}
+        return 200, "application/json", json.dumps(result).encode()
+
+    def homepage(self) -> str:
+        videos = self.videos()
+        cards = [
+            {"id": v["video_id"], "title": v["title"], "channel": v["channel"], "short": v["short"]}
+            for v in videos
+        ]
+        return HOMEPAGE_TEMPLATE.format(
+            initial_data=json.dumps(initial_data(videos)).replace("</", "<\\/"),
+            cards=json.dumps(cards).replace("</", "<\\/"),
+            batch=self.config["batch"],
+            hydrate_ms=self.config["hydrate_ms"],
+        )
+
+
+def initial_data(videos: list) -> dict:
+    """
+    Minimal ytInitialData with one videoRenderer per fixture video.
+    """
+    contents = []
+    for v in videos:
+        nav = f"/shorts/{v['video_id']}" if v["short"] else f"/watch?v={v['video_id']}"
+        contents.append({"richItemRenderer": {"content": {"videoRenderer": {
+            "videoId": v["video_id"],
+            "title": {"runs": [{"text": v["title"]}]},
+            "ownerText": {"runs": [{"text": v["channel"]}]},
+            "thumbnail": {"thumbnails": [{"url": f"/vi/{v['video_id']}/hqdefault.jpg"}]},
+            "navigationEndpoint": {"commandMetadata": {"webCommandMetadata": {"url": nav}}},
+            "lengthText": {"simpleText": "12:34"},
+            "viewCountText": {"simpleText": "1,234 views"},
+            "publishedTimeText": {"simpleText": "1 day ago"},
+        }}}})
+    return {"contents": {"twoColumnBrowseResultsRenderer": {"tabs": [
+        {"tabRenderer": {"content": {"richGridRenderer": {"contents": contents}}}}
+    ]}}}
+
+
+# ---------- Ollama ----------
+
+class OllamaFixture(FixtureServer):
+    """
+    config: model, latency_ms (per request), load_ms (first request after
+    start or unload), prompt_tokens_per_sec, tokens_per_sec (generation).
+    Token counts are estimated at 4 characters per token.
+    """
+
+    name = "ollama"
+
+    def __init__(self, model: str = "llama3.2:3b", latency_ms: float = 20, load_ms: float = 2000,
+                 prompt_tokens_per_sec: float = 2000, tokens_per_sec: float = 40):
+        super().__init__(model=model, latency_ms=latency_ms, load_ms=load_ms,
+                         prompt_tokens_per_sec=prompt_tokens_per_sec, tokens_per_sec=tokens_per_sec)
+        self.loaded = False
+
+    def unload(self):
+        self.loaded = False
+
+    def preload(self):
+        self.loaded = True
+
+    def _load(self) -> float:
+        with self.lock:
+            if self.loaded:
+                return 0.0
+            self.loaded = True
+        self.delay("load_ms")
+        return self.config["load_ms"] / 1000
+
+    def _models(self) -> bytes:
+        return json.dumps({"models": [{"name": self.config["model"], "model": self.config["model"]}]}).encode()
+
+    def route(self, method, path, query, body):
+        if path == "/api/tags":
+            return 200, "application/json", self._models()
+        if path == "/api/ps":
+            return 200, "application/json", self._models() if self.loaded else b'{"models": []}'
+        if path == "/api/embed" and method == "POST":
+            texts = json.loads(body).get("input")
+            texts = [texts] if isinstance(texts, str) else texts
+            self.delay()
+            embeddings = [[b / 255 for b in hashlib.sha256(t.encode()).digest()[:32]] for t in texts]
+            return 200, "application/json", json.dumps({"embeddings": embeddings}).encode()
+        if path == "/api/chat" and method == "POST":
+            return self._chat(json.loads(body))
+        return super().route(method, path, query, body)
+
+    def _chat(self, req: dict):
+        self.delay()
+        load = self._load()
+        messages = req.get("messages") or []
+        if not messages:
+            # Warm-up request: load only
+            return 200, "application/json", json.dumps({"done": True, "done_reason": "load"}).encode()
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        time.sleep(prompt_tokens / self.config["prompt_tokens_per_sec"])
+
+        content = json.dumps({"selections": self._pick(req, messages)})
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)]  # ~1 token each
+        stats = {
+            "model": self.config["model"],
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(pieces),
+            "eval_duration": int(len(pieces) / self.config["tokens_per_sec"] * 1e9),
+            "load_duration": int(load * 1e9),
+        }
+        per_token = 1 / self.config["tokens_per_sec"]
+
+        if not req.get("stream", True):
+            time.sleep(len(pieces) * per_token)
+            return 200, "application/json", json.dumps(
+                {**stats, "message": {"role": "assistant", "content": content}}
+            ).encode()
+
+        def generate():
+            for piece in pieces:
+                time.sleep(per_token)
+                yield (json.dumps({"message": {"role": "assistant", "content": piece}, "done": False}) + "\n").encode()
+            yield (json.dumps({**stats, "message": {"role": "assistant", "content": ""}}) + "\n").encode()
+
+        return 200, "application/x-ndjson", generate()
+
+    @staticmethod
+    def _pick(req: dict, messages: list) -> list:
+        """
+        Pick the first three candidates, answering in whatever shape the
+        format schema asks for (numeric ids or URLs).
+        """
+        item = (req.get("format") or {}).get("properties", {}).get("selections", {}).get("items", {})
+        candidates = messages[-1].get("content", "")
+        if "url" in item.get("properties", {}):
+            urls = list(dict.fromkeys(re.findall(r"https?://[^\s\"']+/watch\?v=[\w-]+", candidates)))
+            return [{"url": u, "reason": "benchmark pick"} for u in urls[:3]]
+
+        try:
+            count = len(json.loads(candidates))
+        except ValueError:
+            count = sum(1 for line in candidates.splitlines() if line[:1].isdigit())
+        return [{"id": i, "reason": "benchmark pick"} for i in range(1, min(count, 3) + 1)]
+
+
+# ---------- Telegram ----------
+
+class TelegramFixture(FixtureServer):
+    """
+    config: latency_ms (per sendMessage), rate_limit_every (every Nth
+    sendMessage gets a 429 with parameters.retry_after = retry_after
+    seconds; 0 disables). Texts over 4096 characters are rejected like
+    the real API.
+    """
+
+    name = "telegram"
+
+    def __init__(self, latency_ms: float = 30, rate_limit_every: int = 0, retry_after: float = 1):
+        super().__init__(latency_ms=latency_ms, rate_limit_every=rate_limit_every, retry_after=retry_after)
+        self.messages = []
+        self.calls = 0
+        self.rate_limited = 0
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["messages"] = len(self.messages)
+        stats["rate_limited"] = self.rate_limited
+        stats["chats"] = sorted({str(m.get("chat_id")) for m in self.messages})
+        return stats
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.messages = []
+        self.calls = 0
+        self.rate_limited = 0
+
+    def route(self, method, path, query, body):
+        if re.fullmatch(r"/bot[^/]+/sendMessage", path) and method == "POST":
+            self.delay()
+            payload = json.loads(body or b"{}")
+            every = self.config["rate_limit_every"]
+            with self.lock:
+                self.calls += 1
+                limited = every and self.calls % every == 0
+                if limited:
+                    self.rate_limited += 1
+            if limited:
+                retry_after = self.config["retry_after"]
+                error = {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {retry_after}",
+                         "parameters": {"retry_after": retry_after}}
+                return 429, "application/json", json.dumps(error).encode()
+            if len((payload.get("text") or "").encode("utf-16-le")) // 2 > 4096:
+                error = {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+                return 400, "application/json", json.dumps(error).encode()
+            with self.lock:
+                self.messages.append(payload)
+                message_id = len(self.messages)
+            result = {"message_id": message_id, "chat": {"id": payload.get("chat_id")}, "text": payload.get("text")}
+            return 200, "application/json", json.dumps({"ok": True, "result": result}).encode()
+        return super().route(method, path, query, body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixtures until interrupted")
+    parser.add_argument("--cards", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    servers = [
+        YouTubeFixture(cards=args.cards, latency_ms=args.latency_ms).start(),
+        OllamaFixture().start(),
+        TelegramFixture().start(),
+    ]
+    for server in servers:
+        print(f"[fixtures] {server.name:<9} {server.url}")
+    print("[fixtures] Ctrl+C to stop", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the YouTube agent.
+
+Starts the local YouTube, Ollama and Telegram fixtures (bench/fixtures.py),
+points the agent at them through its environment overrides and times:
+    browser       Chromium launch vs connect to browser_server.py over CDP
+    scrape        youtube_actions.scrape_youtube per mode and feed size
+    watch_later   add_to_watch_later, add_many_to_watch_later(_concurrent)
+    chat          agent_runner.chat_ollama per prompt format and feed size
+    notify        notifier.send_telegram_notification
+    records       video_record.Video vs dict records: memory and lookups (no fixtures)
+    main          agent_runner.py end to end (subprocess, DRY_RUN=false)
+
+Results are written as JSON (default bench/results/<commit>.json) so two
+commits can be compared:
+    python bench/run_bench.py --cards 10,100,1000 --repeat 3
+    python bench/run_bench.py --compare bench/results/abc1234.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import subprocess
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+from fixtures import YouTubeFixture, OllamaFixture, TelegramFixture, fixture_videos
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ORCHESTRATOR_DIR = REPO_ROOT / "orchestrator"
+
+SUITES = ("browser", "scrape", "watch_later", "chat", "notify", "records", "main")
+SCRAPE_MODES = ("initial_data", "harvest", "bulk", "dom")
+PROMPT_FORMATS = ("lines", "table", "json", "full")
+
+# dom mode walks cards one by one; past this size it dominates the run
+DOM_MAX_CARDS = 100
+
+# Corpus size of the records suite
+RECORDS_CORPUS = 10_000
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=REPO_ROOT).returncode != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Bench:
+    """
+    Runs timed cases and collects one result record per case.
+    """
+
+    def __init__(self, repeat: int, verbose: bool = False):
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results = []
+
+    def case(self, name: str, fn, setup=None, **params) -> dict:
+        """
+        Time `fn()` `repeat` times. `fn` may return a dict of extra metrics
+        (from the last run); an exception marks the case as failed.
+        """
+        runs = []
+        extra = {}
+        error = None
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            try:
+                with self._quiet():
+                    extra = fn() or {}
+            except BaseException as e:  # SystemExit from main-style code counts as a failure too
+                error = f"{type(e).__name__}: {e}".strip()[:500]
+                break
+            runs.append(time.perf_counter() - started)
+
+        result = {
+            "name": name,
+            "params": params,
+            "ok": error is None,
+            "error": error,
+            "runs_s": [round(r, 4) for r in runs],
+            "median_s": round(statistics.median(runs), 4) if runs else None,
+            "min_s": round(min(runs), 4) if runs else None,
+            "max_s": round(max(runs), 4) if runs else None,
+            "extra": extra,
+        }
+        self.results.append(result)
+
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        if error:
+            print(f"[bench] {name:<12} {label:<40} FAILED  {error.splitlines()[0]}")
+        else:
+            print(f"[bench] {name:<12} {label:<40} median {result['median_s']:.3f}s  {extra}")
+        return result
+
+    def _quiet(self):
+        # The agent prints progress (and whole scrape results) to stdout
+        return contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def configure_env(youtube, ollama, telegram, workdir: Path, use_cache: bool):
+    """
+    Point every module at the fixtures. Must run before the agent's modules
+    are imported, since they read their settings at import time.
+    """
+    state_file = workdir / "storage_state.json"
+    # A SAPISID cookie for the fixture host lets the HTTP Watch Later backend authenticate
+    sapisid = {"name": "SAPISID", "value": "bench-sapisid", "domain": "127.0.0.1", "path": "/",
+               "expires": -1, "httpOnly": False, "secure": False, "sameSite": "Lax"}
+    state_file.write_text(json.dumps({"cookies": [sapisid], "origins": []}), encoding="utf-8")
+    env = {
+        "YOUTUBE_URL": youtube.url + "/",
+        "OLLAMA_BASE_URL": ollama.url,
+        "OLLAMA_MODEL": ollama.config["model"],
+        "TELEGRAM_API_BASE": telegram.url,
+        "TELEGRAM_BOT_TOKEN": "bench-token",
+        "TELEGRAM_CHAT_ID": "1000",
+        "STATE_FILE": str(state_file),
+        "SELECTOR_CACHE_PATH": str(workdir / "selector_cache.json"),
+        "INDEX_PATH": "",
+        "OLLAMA_CACHE_DIR": str(workdir / "llm_cache") if use_cache else "",
+        "EMBEDDINGS_PATH": str(workdir / "embeddings"),
+        "TELEMETRY_DIR": "",
+    }
+    os.environ.update(env)
+    return env
+
+
+def bench_browser(bench: Bench, env: dict):
+    """
+    Cold Chromium launch vs attaching to an already running browser_server.py.
+    """
+    import socket
+    import requests
+    from playwright.sync_api import sync_playwright # type: ignore
+
+    def open_context(connect):
+        with sync_playwright() as p:
+            browser = connect(p)
+            browser.new_context().close()
+            browser.close()
+
+    bench.case("browser", lambda: open_context(lambda p: p.chromium.launch(headless=True)), mode="launch")
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "browser_server.py")],
+        env={**os.environ, **env, "BROWSER_SERVER_PORT": str(port)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Wait for the server outside the timed runs
+        ready = False
+        deadline = time.monotonic() + 30
+        while not ready and server.poll() is None and time.monotonic() < deadline:
+            try:
+                ready = requests.get(f"{url}/json/version", timeout=1).ok
+            except requests.exceptions.RequestException:
+                time.sleep(0.2)
+
+        def connect():
+            if not ready:
+                raise RuntimeError(f"browser_server.py did not come up (exit code {server.poll()})")
+            open_context(lambda p: p.chromium.connect_over_cdp(url))
+
+        bench.case("browser", connect, mode="connect")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def bench_scrape(bench: Bench, youtube, cards_list, modes):
+    import youtube_actions
+
+    for cards in cards_list:
+        youtube.config["cards"] = cards
+        for mode in modes:
+            if mode == "dom" and cards > DOM_MAX_CARDS:
+                continue
+
+            def run():
+                results = youtube_actions.scrape_youtube(
+                    output_path=None, mode=mode, target_count=cards, time_budget=120,
+                )
+                return {"videos": len(results), "requests": sum(youtube.stats()["requests"].values())}
+
+            bench.case("scrape", run, setup=youtube.reset_stats, mode=mode, cards=cards,
+                       latency_ms=youtube.config["latency_ms"])
+
+
+def bench_watch_later(bench: Bench, youtube):
+    import youtube_actions
+
+    youtube.config["cards"] = 10
+    urls = [youtube.watch_url(v) for v in youtube.videos() if not v["short"]][:3]
+
+    def single():
+        result = youtube_actions.add_to_watch_later(urls[0])
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        return {"saved": len(youtube.stats()["saved"])}
+
+    def many(fn, batch=None):
+        def run():
+            videos = batch or urls
+            results = fn(videos)
+            succeeded = sum(r["success"] for r in results)
+            if succeeded < len(videos):
+                message = next((r["message"] for r in results if not r["success"]), "missing results")
+                raise RuntimeError(f"{len(videos) - succeeded} of {len(videos)} adds failed: {message}")
+            return {"succeeded": succeeded, "saved": len(youtube.stats()["saved"])}
+        return run
+
+    latency = youtube.config["latency_ms"]
+    bench.case("watch_later", single, setup=youtube.reset_stats, variant="single", videos=1, latency_ms=latency)
+    bench.case("watch_later", many(youtube_actions.add_many_to_watch_later), setup=youtube.reset_stats,
+               variant="batch", videos=len(urls), latency_ms=latency)
+    bench.case("watch_later", many(youtube_actions.add_many_to_watch_later_concurrent), setup=youtube.reset_stats,
+               variant="concurrent", videos=len(urls), latency_ms=latency)
+
+    # Browserless backend: batched edit_playlist calls (browser only as a fallback)
+    youtube.config["cards"] = 60
+    http_urls = [youtube.watch_url(v) for v in youtube.videos() if not v["short"]][:50]
+    backend = youtube_actions.WATCH_LATER_BACKEND
+    youtube_actions.WATCH_LATER_BACKEND = "http"
+    try:
+        for count in (3, 50):
+            bench.case("watch_later", many(youtube_actions.add_many_to_watch_later, http_urls[:count]),
+                       setup=youtube.reset_stats, variant="http", videos=count, latency_ms=latency)
+    finally:
+        youtube_actions.WATCH_LATER_BACKEND = backend
+
+
+def bench_chat(bench: Bench, ollama, youtube, cards_list, formats):
+    import agent_runner
+
+    system_text = "I like programming deep dives (Rust, Python) and physics. Skip cooking."
+    ollama.preload()  # warm numbers first; the cold case below measures the load
+    for cards in cards_list:
+        youtube.config["cards"] = cards
+        candidates = [
+            {"title": v["title"], "url": youtube.watch_url(v), "channel": v["channel"], "thumbnail": None}
+            for v in youtube.videos() if not v["short"]
+        ]
+        for fmt in formats:
+            messages = agent_runner.build_selection_messages(system_text, candidates, fmt)
+            schema = agent_runner.selection_schema(fmt)
+
+            def run():
+                stats = {}
+                agent_runner.chat_ollama(messages, agent_runner.MODEL, schema, stats=stats, use_cache=False)
+                return {"prompt_tokens": stats.get("prompt_eval_count"), "load_s": stats.get("load_duration", 0) / 1e9}
+
+            bench.case("chat", run, fmt=fmt, cards=cards)
+
+    # Cold start: the first request pays the model load
+    messages = agent_runner.build_selection_messages(system_text, candidates[:10], "lines")
+
+    def cold():
+        stats = {}
+        agent_runner.chat_ollama(messages, agent_runner.MODEL, agent_runner.selection_schema("lines"),
+                                 stats=stats, use_cache=False)
+        return {"load_s": stats.get("load_duration", 0) / 1e9}
+
+    bench.case("chat", cold, setup=ollama.unload, fmt="lines", cards=10, cold=True)
+
+
+def bench_notify(bench: Bench, telegram):
+    import notifier
+
+    def digest(count):
+        return [
+            {"title": v["title"], "url": f"https://example.invalid/watch?v={v['video_id']}", "channel": v["channel"],
+             "reason": "benchmark " + "because it matches the instructions " * 3}
+            for v in fixture_videos(count, shorts_every=0)
+        ]
+
+    def case(added, chats, rate_limit_every=0):
+        def setup():
+            telegram.reset_stats()
+            telegram.config.update(rate_limit_every=rate_limit_every, retry_after=0.2)
+
+        def run():
+            if not notifier.send_telegram_notification(videos_added=added, chat_id=",".join(chats)):
+                raise RuntimeError("notification not sent")
+            stats = telegram.stats()
+            return {"messages": stats["messages"], "rate_limited": stats["rate_limited"]}
+
+        bench.case("notify", run, setup=setup, videos=len(added), chats=len(chats),
+                   rate_limit_every=rate_limit_every, latency_ms=telegram.config["latency_ms"])
+
+    case(digest(3), ["1000"])
+    # Over 4096 characters: split into several messages, sent to three chats at once
+    case(digest(60), ["1000", "1001", "1002"])
+    case(digest(60), ["1000", "1001", "1002"], rate_limit_every=4)
+    telegram.config["rate_limit_every"] = 0
+
+
+def bench_records(bench: Bench, corpus: int = RECORDS_CORPUS):
+    from video_record import Video, VideoCollection
+
+    # Scraped JSON lines as they come off disk; every 10th card repeats an earlier one with &pp=
+    lines = []
+    for i in range(corpus):
+        n = i - 5 if i % 10 == 9 else i
+        lines.append(json.dumps({
+            "title": f"Video {n}: a reasonably long title about topic {n % 97}",
+            "url": f"https://www.youtube.com/watch?v=vid{n:08d}" + ("&pp=ygUFdHJhY2s%3D" if i % 10 == 9 else ""),
+            "thumbnail": f"https://i.ytimg.com/vi/vid{n:08d}/hqdefault.jpg",
+            "channel": f"Channel {n % 500}",
+        }))
+
+    def traced(build):
+        def run():
+            tracemalloc.start()
+            try:
+                records = build()
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            return {"records": len(records), "kb": size // 1024, "bytes_per_record": size // len(records)}
+        return run
+
+    bench.case("records", traced(lambda: [json.loads(line) for line in lines]), variant="dict", cards=corpus)
+    bench.case("records", traced(lambda: [Video.from_dict(json.loads(line)) for line in lines]),
+               variant="video", cards=corpus)
+    bench.case("records", traced(lambda: VideoCollection(json.loads(line) for line in lines)),
+               variant="collection", cards=corpus)
+
+    # Metadata lookups for a run's selections: agent_runner used to scan the list per selection
+    dicts = [json.loads(line) for line in lines]
+    collection = VideoCollection(dicts)
+    wanted = [dicts[j]["url"] for j in range(corpus - 1, 0, -corpus // 100)]
+
+    def scan():
+        found = sum(1 for url in wanted if next((v for v in dicts if v.get("url") == url), None))
+        return {"lookups": len(wanted), "found": found}
+
+    def index():
+        found = sum(1 for url in wanted if collection.get(url))
+        return {"lookups": len(wanted), "found": found}
+
+    bench.case("records", scan, variant="scan", cards=corpus)
+    bench.case("records", index, variant="index", cards=corpus)
+
+
+def bench_main(bench: Bench, youtube, ollama, telegram, env: dict, workdir: Path, cards_list):
+    system_path = workdir / "system_instructions.md"
+    system_path.write_text("- Programming deep dives (Rust, Python)\n- Physics\n", encoding="utf-8")
+
+    for cards in cards_list:
+        youtube.config["cards"] = cards
+        scraped = [
+            {"title": v["title"], "url": youtube.watch_url(v), "channel": v["channel"], "thumbnail": None}
+            for v in youtube.videos() if not v["short"]
+        ]
+        input_path = workdir / f"scraped_{cards}.jsonl"
+        input_path.write_text("".join(json.dumps(card) + "\n" for card in scraped), encoding="utf-8")
+
+        for pipeline in ("false", "true"):
+            run_env = {
+                **os.environ, **env,
+                "SYSTEM_PATH": str(system_path),
+                "INPUT_PATH": str(input_path),
+                "OUTPUT_PATH": str(workdir / "selected.jsonl"),
+                "DRY_RUN": "false",
+                "PIPELINE": pipeline,
+                "SCRAPE_TARGET_COUNT": str(cards),
+            }
+
+            def reset():
+                youtube.reset_stats()
+                telegram.reset_stats()
+                ollama.unload()
+
+            def run():
+                proc = subprocess.run(
+                    [sys.executable, "agent_runner.py"], cwd=ORCHESTRATOR_DIR, env=run_env,
+                    capture_output=True, text=True, timeout=600,
+                )
+                if proc.returncode not in (0, 1):
+                    tail = (proc.stderr or proc.stdout).strip().splitlines()[-3:]
+                    raise RuntimeError(f"exit {proc.returncode}: {' | '.join(tail)}")
+                return {
+                    "exit_code": proc.returncode,
+                    "saved": len(youtube.stats()["saved"]),
+                    "messages": telegram.stats()["messages"],
+                }
+
+            bench.case("main", run, setup=reset, cards=cards, pipeline=pipeline == "true")
+
+
+def compare(current: dict, baseline_path: str, threshold: float) -> int:
+    """
+    Print median changes against a previous results file.
+
+    Returns the number of cases that got slower by more than `threshold` %.
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    key = lambda r: (r["name"], json.dumps(r["params"], sort_keys=True))
+    before = {key(r): r for r in baseline["results"]}
+
+    print(f"\n[bench] Compared with {baseline.get('commit')} ({baseline_path}):")
+    regressions = 0
+    for result in current["results"]:
+        old = before.get(key(result))
+        if not old or not old["ok"] or not result["ok"]:
+            continue
+        change = 100 * (result["median_s"] - old["median_s"]) / old["median_s"] if old["median_s"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  <-- regression"
+        label = " ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(f"  {result['name']:<12} {label:<40} {old['median_s']:.3f}s -> {result['median_s']:.3f}s "
+              f"({change:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local fixtures")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {','.join(SUITES)}")
+    parser.add_argument("--cards", default="10,100,1000", help="feed sizes (comma-separated)")
+    parser.add_argument("--modes", default=",".join(SCRAPE_MODES), help="scrape modes (comma-separated)")
+    parser.add_argument("--formats", default=",".join(PROMPT_FORMATS), help="prompt formats (comma-separated)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0, help="injected latency per YouTube page request")
+    parser.add_argument("--llm-load-ms", type=float, default=2000)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=40)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30)
+    parser.add_argument("--llm-cache", action="store_true", help="leave the chat_ollama response cache on")
+    parser.add_argument("--out", help="results file (default bench/results/<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--fail-over", type=float, default=10.0,
+                        help="with --compare, exit 1 if any median is this many %% slower")
+    parser.add_argument("--verbose", action="store_true", help="show the agent's own output")
+    args = parser.parse_args()
+
+    suites = [s for s in args.suites.split(",") if s]
+    cards_list = [int(c) for c in args.cards.split(",") if c]
+
+    youtube = YouTubeFixture(latency_ms=args.latency_ms).start()
+    ollama = OllamaFixture(load_ms=args.llm_load_ms, tokens_per_sec=args.llm_tokens_per_sec).start()
+    telegram = TelegramFixture(latency_ms=args.telegram_latency_ms).start()
+
+    with tempfile.TemporaryDirectory(prefix="yt-agent-bench-") as tmp:
+        workdir = Path(tmp)
+        env = configure_env(youtube, ollama, telegram, workdir, args.llm_cache)
+        for path in (REPO_ROOT, ORCHESTRATOR_DIR):
+            if str(path) not in sys.path:
+                sys.path.insert(0, str(path))
+
+        bench = Bench(args.repeat, args.verbose)
+        started = time.perf_counter()
+        if "browser" in suites:
+            bench_browser(bench, env)
+        if "scrape" in suites:
+            bench_scrape(bench, youtube, cards_list, [m for m in args.modes.split(",") if m])
+        if "watch_later" in suites:
+            bench_watch_later(bench, youtube)
+        if "chat" in suites:
+            bench_chat(bench, ollama, youtube, cards_list, [f for f in args.formats.split(",") if f])
+        if "notify" in suites:
+            bench_notify(bench, telegram)
+        if "records" in suites:
+            bench_records(bench)
+        if "main" in suites:
+            bench_main(bench, youtube, ollama, telegram, env, workdir, cards_list)
+
+    for server in (youtube, ollama, telegram):
+        server.stop()
+
+    commit = git_commit()
+    output = {
+        "commit": commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "duration_s": round(time.perf_counter() - started, 2),
+        "results": bench.results,
+    }
+    out = Path(args.out) if args.out else REPO_ROOT / "bench" / "results" / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(output, indent=2), encoding="utf-8")
+    failed = sum(not r["ok"] for r in bench.results)
+    print(f"[bench] {len(bench.results)} cases ({failed} failed) in {output['duration_s']}s -> {out}")
+
+    if args.compare:
+        regressions = compare(output, args.compare, args.fail_over)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
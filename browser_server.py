@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Persistent Browser Server for YouTube Agent
+Starts one long-lived Chromium with a CDP endpoint that scrape_youtube,
+the Watch Later actions and save_state_from_chrome.py attach to (set
+BROWSER_CDP_URL) instead of each launching their own.
+
+    python browser_server.py
+    BROWSER_CDP_URL=http://127.0.0.1:9222 python youtube_actions.py
+
+A health check polls the endpoint and relaunches Chromium when it dies.
+"""
+
+import os
+import time
+import signal
+import threading
+import ipaddress
+import socket
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from playwright.sync_api import sync_playwright # type: ignore
+from dotenv import load_dotenv # type: ignore
+
+from telemetry import TELEMETRY, record_span, count
+
+load_dotenv()
+
+BROWSER_SERVER_PORT = int(os.getenv("BROWSER_SERVER_PORT", "9222"))
+# 0.0.0.0 lets other containers attach; CDP has no authentication, so never publish the port
+BROWSER_SERVER_HOST = os.getenv("BROWSER_SERVER_HOST", "127.0.0.1")
+BROWSER_SERVER_HEADLESS = os.getenv("BROWSER_SERVER_HEADLESS", "true").lower() == "true"
+# Chrome user data dir to run the server with (e.g. for save_state_from_chrome.py); empty = fresh profile
+BROWSER_SERVER_PROFILE = os.getenv("BROWSER_SERVER_PROFILE", "")
+BROWSER_HEALTH_INTERVAL = float(os.getenv("BROWSER_HEALTH_INTERVAL", "10"))  # seconds between checks
+
+
+def cdp_endpoint(url: str) -> str:
+    """
+    Chromium only answers CDP HTTP requests whose Host is an IP address or
+    localhost, so resolve host names (e.g. a compose service) to an IP.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or "127.0.0.1"
+    try:
+        ipaddress.ip_address(host)
+        return url
+    except ValueError:
+        pass
+    if host == "localhost":
+        return url
+    ip = socket.gethostbyname(host)
+    netloc = ip + (f":{parts.port}" if parts.port else "")
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+class BrowserServer:
+    """
+    Owns the shared Chromium. Sync Playwright, so start(), check() and
+    stop() must be called from the same thread.
+    """
+
+    def __init__(
+        self,
+        port: int = BROWSER_SERVER_PORT,
+        host: str = BROWSER_SERVER_HOST,
+        headless: bool = BROWSER_SERVER_HEADLESS,
+        user_data_dir: str = BROWSER_SERVER_PROFILE,
+    ):
+        self.port = port
+        self.host = host
+        self.headless = headless
+        self.user_data_dir = user_data_dir
+
+        self._playwright = None
+        self.browser = None
+        self.context = None  # set instead of browser for a persistent profile
+        self.launches = 0
+        self.last_launch = None
+
+    @property
+    def url(self) -> str:
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "::") else self.host
+        return f"http://{host}:{self.port}"
+
+    def start(self) -> "BrowserServer":
+        self._playwright = sync_playwright().start()
+        try:
+            self._launch()
+        except:
+            self._playwright.stop()
+            raise
+        return self
+
+    def _launch(self):
+        args = [f"--remote-debugging-port={self.port}"]
+        if self.host != "127.0.0.1":
+            args.append(f"--remote-debugging-address={self.host}")
+
+        started = time.monotonic()
+        if self.user_data_dir:
+            self.context = self._playwright.chromium.launch_persistent_context(
+                os.path.abspath(self.user_data_dir), headless=self.headless, args=args,
+            )
+        else:
+            self.browser = self._playwright.chromium.launch(headless=self.headless, args=args)
+        self.last_launch = round(time.monotonic() - started, 3)
+        self.launches += 1
+
+        record_span("browser.server_launch", self.last_launch, launch=self.launches)
+        count("browser_server_launches_total")
+        print(f"[browser_server] Chromium launched in {self.last_launch:.2f}s, CDP endpoint {self.url} "
+              f"(launch #{self.launches})")
+
+    def healthy(self) -> bool:
+        """
+        True if the process is alive and the CDP endpoint answers.
+        """
+        owner = self.context.browser if self.context else self.browser
+        if owner is not None and not owner.is_connected():
+            return False
+        try:
+            return requests.get(f"{self.url}/json/version", timeout=2).ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def check(self) -> bool:
+        """
+        Relaunch Chromium if the health check fails. Returns True if a
+        relaunch happened.
+        """
+        if self.healthy():
+            return False
+        print("[browser_server] WARNING: Chromium is not responding, relaunching")
+        self._close_browser()
+        self._launch()
+        return True
+
+    def _close_browser(self):
+        try:
+            if self.context:
+                self.context.close()
+            elif self.browser:
+                self.browser.close()
+        except:
+            pass
+        self.browser = self.context = None
+
+    def stop(self):
+        self._close_browser()
+        if self._playwright:
+            self._playwright.stop()
+            self._playwright = None
+
+    def serve(self, interval: float = BROWSER_HEALTH_INTERVAL):
+        """
+        Run the health check until SIGTERM/SIGINT.
+        """
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+        signal.signal(signal.SIGINT, lambda *_: stopping.set())
+        try:
+            while not stopping.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"[browser_server] ERROR: Relaunch failed, retrying in {interval:g}s: {e}")
+                if TELEMETRY:
+                    TELEMETRY.flush()
+        finally:
+            print("[browser_server] Shutting down")
+            self.stop()
+
+
+def main():
+    server = BrowserServer().start()
+    print(f"[browser_server] Attach with BROWSER_CDP_URL={server.url}")
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+JSON Lines storage for YouTube Agent artifacts (scraped cards, selections)
+One record per line, written as it is produced and read back lazily.
+
+Every run writes a new history file next to the configured path,
+partitioned by date:
+
+    data/scraped.jsonl                                  <- newest complete run
+    data/history/2025-06-01/scraped-071502-4242.jsonl
+    data/history/2025-06-02/scraped-070958-4318.jsonl
+
+The configured path is re-pointed (hard link, or a copy where links are
+not supported) at the run's file once the run completes, so readers keep
+using one path and never see a half-written run. Date partitions older
+than FEED_HISTORY_DAYS are removed when a new run starts.
+
+orjson is used when installed; the stdlib json module otherwise.
+"""
+
+import os
+import json
+import shutil
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv # type: ignore
+
+from telemetry import LOG_STREAM
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None
+
+load_dotenv()
+
+FEED_HISTORY_DAYS = int(os.getenv("FEED_HISTORY_DAYS", "14"))  # date partitions kept; 0 keeps all
+
+HISTORY_DIR = "history"
+
+
+def dumps(record) -> bytes:
+    if orjson:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(line: bytes):
+    if orjson:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def history_path(latest, when: datetime | None = None) -> Path:
+    """
+    History file of a run that publishes to `latest`.
+    """
+    latest = Path(latest)
+    when = when or datetime.now()
+    name = f"{latest.stem}-{when:%H%M%S}-{os.getpid()}.jsonl"
+    return latest.parent / HISTORY_DIR / f"{when:%Y-%m-%d}" / name
+
+
+def rotate_history(latest, keep_days: int = FEED_HISTORY_DAYS) -> int:
+    """
+    Remove date partitions older than `keep_days` next to `latest`.
+
+    Returns:
+        Number of partitions removed
+    """
+    root = Path(latest).parent / HISTORY_DIR
+    if keep_days <= 0 or not root.is_dir():
+        return 0
+    cutoff = date.today() - timedelta(days=keep_days)
+    removed = 0
+    for partition in root.iterdir():
+        try:
+            day = date.fromisoformat(partition.name)
+        except ValueError:
+            continue  # not ours
+        if day < cutoff:
+            shutil.rmtree(partition, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class JsonlWriter:
+    """
+    Appends records to `path`, one flushed line each. With `latest`, the
+    finished file is published there on a clean close.
+
+        with JsonlWriter(path, latest="data/scraped.jsonl") as writer:
+            for card in cards:
+                writer.write(card)
+    """
+
+    def __init__(self, path, latest=None):
+        self.path = Path(path)
+        self.latest = Path(latest) if latest else None
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def write(self, record):
+        self._file.write(dumps(record) + b"\n")
+        # Flush per record so a crashed run still leaves every finished line on disk
+        self._file.flush()
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self, publish: bool = True):
+        if self._file.closed:
+            return
+        self._file.close()
+        if publish and self.latest:
+            self._publish()
+
+    def _publish(self):
+        self.latest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.latest.with_name(f"{self.latest.name}.{os.getpid()}.tmp")
+        try:
+            os.link(self.path, tmp)
+        except OSError:
+            shutil.copyfile(self.path, tmp)
+        os.replace(tmp, self.latest)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # A failed run stays in history but does not replace the last good one
+        self.close(publish=exc_type is None)
+
+
+def open_run(latest, keep_days: int = FEED_HISTORY_DAYS) -> JsonlWriter:
+    """
+    Start a new history file for a run that publishes to `latest`.
+    """
+    try:
+        rotate_history(latest, keep_days)
+    except OSError as e:
+        print(f"[feed_store] WARNING: Could not rotate history: {e}", file=LOG_STREAM)
+    path = history_path(latest)
+    # Never append to an earlier run's file: `latest` may be a link to it
+    base, n = path, 1
+    while path.exists():
+        path = base.with_name(f"{base.stem}-{n}.jsonl")
+        n += 1
+    return JsonlWriter(path, latest=latest)
+
+
+def write_records(latest, records) -> Path:
+    """
+    Write a complete run in one go. Returns the history file.
+    """
+    with open_run(latest) as writer:
+        writer.write_many(records)
+    return writer.path
+
+
+def iter_records(path):
+    """
+    Yield the records of a JSON Lines file one at a time.
+
+    A `.json` file is read as a legacy single document: a list, or a dict
+    holding the list under "videos" or "selections".
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, "rb") as f:
+            data = loads(f.read())
+        if isinstance(data, dict):
+            data = data.get("videos", data.get("selections", []))
+        yield from data
+        return
+
+    with open(path, "rb") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                # Usually the last line of a run that was killed mid-write
+                print(f"[feed_store] WARNING: Skipping unreadable line {n} of {path}", file=LOG_STREAM)
+
+
+def read_records(path) -> list:
+    return list(iter_records(path))
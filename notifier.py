@@ -5,37 +5,301 @@ Sends notifications to iOS devices via Telegram Bot API.
 """
 
 import os
+import re
+import time
+import asyncio
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from telemetry import span, count, propagate
+from video_record import canonical_url
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")  # comma-separated for several chats
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+# Bot-wide send rate; Telegram allows about 30 messages/s across chats and 1/s per chat
+TELEGRAM_RATE_PER_SEC = float(os.getenv("TELEGRAM_RATE_PER_SEC", "25"))
+TELEGRAM_CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1"))  # seconds between parts to one chat
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "10"))
+
+# Telegram rejects longer messages ("message is too long"), counted in UTF-16 units
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class TelegramClient:
+    """
+    Pooled, rate-limited sendMessage client.
+
+    One keep-alive session is shared by every send. Chats are served
+    concurrently, while the parts for one chat go out in order,
+    TELEGRAM_CHAT_INTERVAL apart. All sends share the bot-wide rate.
+    A 429 waits the `retry_after` Telegram asks for. Network errors and
+    5xx responses are retried with exponential backoff.
+
+        client = TelegramClient(token)
+        results = client.send(["111", "222"], split_message(text))   # {chat_id: bool}
+    """
+
+    def __init__(
+        self,
+        token: str,
+        api_base: str = TELEGRAM_API_BASE,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        rate_per_sec: float = TELEGRAM_RATE_PER_SEC,
+        chat_interval: float = TELEGRAM_CHAT_INTERVAL,
+        timeout: float = TELEGRAM_TIMEOUT,
+    ):
+        self.url = f"{api_base}/bot{token}/sendMessage"
+        self.max_retries = max_retries
+        self.min_interval = 1 / rate_per_sec if rate_per_sec > 0 else 0
+        self.chat_interval = chat_interval
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Shared across event loops (each send() runs its own), so not an asyncio.Lock
+        self._rate_lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def send(self, chat_ids: List[str], messages: List[str], **fields) -> Dict[str, bool]:
+        """
+        Blocking wrapper around send_async for sync callers.
+
+        asyncio.run() refuses to start inside a running loop (an async
+        caller, or a thread driving sync Playwright), so in that case the
+        send runs on a helper thread with its own loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.send_async(chat_ids, messages, **fields))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(propagate(lambda: asyncio.run(self.send_async(chat_ids, messages, **fields)))).result()
+
+    async def send_async(self, chat_ids: List[str], messages: List[str], **fields) -> Dict[str, bool]:
+        """
+        Send every message to every chat. Extra `fields` (parse_mode, ...)
+        go into each sendMessage payload.
+
+        Returns:
+            {chat_id: True if all parts were delivered}
+        """
+        results = await asyncio.gather(*(self._send_chat(chat_id, messages, fields) for chat_id in chat_ids))
+        return dict(zip(chat_ids, results))
+
+    async def _send_chat(self, chat_id: str, messages: List[str], fields: dict) -> bool:
+        for i, text in enumerate(messages):
+            if i:
+                await asyncio.sleep(self.chat_interval)
+            if not await self._send_one(chat_id, text, fields):
+                return False
+        return True
+
+    async def _send_one(self, chat_id: str, text: str, fields: dict) -> bool:
+        payload = {"chat_id": chat_id, "text": text, **fields}
+        for attempt in range(self.max_retries + 1):
+            await self._throttle()
+            try:
+                response = await asyncio.to_thread(self.session.post, self.url, json=payload, timeout=self.timeout)
+                data = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                error, wait = str(e), 2 ** attempt
+            else:
+                if response.ok and data.get("ok"):
+                    return True
+                if response.status_code == 429:
+                    wait = data.get("parameters", {}).get("retry_after", 1)
+                    count("telegram_rate_limited_total")
+                    print(f"[notifier] Rate limited by Telegram, retrying chat {chat_id} in {wait}s")
+                    await asyncio.sleep(wait)
+                    continue
+                if response.status_code < 500:
+                    # Bad request, unknown chat, ...: retrying won't help
+                    print(f"[notifier] ❌ Telegram API returned error for chat {chat_id}: {data}")
+                    return False
+                error, wait = f"HTTP {response.status_code}: {data}", 2 ** attempt
+
+            if attempt < self.max_retries:
+                count("telegram_retries_total")
+                print(f"[notifier] Send to chat {chat_id} failed ({error}), retry {attempt + 1} in {wait}s")
+                await asyncio.sleep(wait)
+            else:
+                print(f"[notifier] ❌ Failed to send Telegram notification to chat {chat_id}: {error}")
+        return False
+
+    async def _throttle(self):
+        if not self.min_interval:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> TelegramClient:
+    """
+    Return the shared client, so the connection pool survives between
+    notifications (daemon runs, several profiles in one process).
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = TelegramClient(TELEGRAM_BOT_TOKEN)
+        return _CLIENT
+
+
+def parse_chat_ids(chat_id) -> List[str]:
+    """
+    Accept one id, a comma-separated string or a list of ids.
+    """
+    if not chat_id:
+        return []
+    if isinstance(chat_id, str):
+        chat_id = chat_id.split(",")
+    return [str(c).strip() for c in chat_id if str(c).strip()]
+
+
+def _telegram_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Split a message into parts that fit Telegram's length limit.
+
+    Splits between paragraphs first, then between entries (a line plus its
+    indented continuation lines), so a video and its reason stay together
+    and a Markdown link is never cut in half. Only a single entry over the
+    limit is cut mid-line.
+    """
+    if _telegram_len(text) <= limit:
+        return [text]
+
+    # (piece, separator that follows it)
+    pieces = []
+    for block in text.split("\n\n"):
+        if _telegram_len(block) <= limit:
+            pieces.append((block, "\n\n"))
+            continue
+        for entry in re.split(r"\n(?=\S)", block):
+            pieces.extend((chunk, "\n") for chunk in _cut(entry, limit))
+        pieces[-1] = (pieces[-1][0], "\n\n")
+
+    parts = []
+    current = ""
+    sep = ""
+    for piece, next_sep in pieces:
+        if current and _telegram_len(current + sep + piece) > limit:
+            parts.append(current)
+            current = piece
+        else:
+            current = current + sep + piece if current else piece
+        sep = next_sep
+    parts.append(current)
+    return [part for part in parts if part.strip()]
+
+
+def _cut(text: str, limit: int) -> List[str]:
+    chunks = []
+    current = ""
+    size = 0
+    for ch in text:
+        width = _telegram_len(ch)
+        if size + width > limit:
+            chunks.append(current)
+            current, size = "", 0
+        current += ch
+        size += width
+    chunks.append(current)
+    return chunks
 
 
 def send_telegram_notification(
     videos_added: List[Dict[str, str]], 
     videos_failed: Optional[List[Dict[str, str]]] = None,
-    run_time: Optional[str] = None
+    run_time: Optional[str] = None,
+    chat_id: Optional[str] = None
 ) -> bool:
     """
     Send notification to iOS device via Telegram Bot.
     
     Args:
-        videos_added: List of dicts with 'title', 'url', 'channel', 'reason'
+        videos_added: List of dicts (or Video records) with 'title', 'url', 'channel', 'reason'
         videos_failed: Optional list of failed videos with same structure
         run_time: Optional time string for when the run completed
+        chat_id: Optional chat (or comma-separated chats) to notify instead of TELEGRAM_CHAT_ID
     
     Returns:
-        bool: True if notification sent successfully, False otherwise
+        bool: True if notification sent successfully to every chat, False otherwise
     """
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+    chat_ids = parse_chat_ids(chat_id or TELEGRAM_CHAT_ID)
+    with span("notify", videos_added=len(videos_added), videos_failed=len(videos_failed or []),
+              chats=len(chat_ids)) as attrs:
+        sent = _send_telegram_notification(videos_added, videos_failed, run_time, chat_ids, attrs)
+        attrs["sent"] = sent
+    count("notifications_total", result="sent" if sent else "failed")
+    return sent
+
+
+def _send_telegram_notification(
+    videos_added: List[Dict[str, str]],
+    videos_failed: Optional[List[Dict[str, str]]],
+    run_time: Optional[str],
+    chat_ids: List[str],
+    attrs: dict,
+) -> bool:
+    if not TELEGRAM_BOT_TOKEN or not chat_ids:
         print("[notifier] ERROR: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set in .env")
         return False
     
+    message = build_message(videos_added, videos_failed, run_time)
+    parts = split_message(message)
+    attrs["messages"] = len(parts)
+    if len(parts) > 1:
+        print(f"[notifier] Digest is {_telegram_len(message)} characters, sending it as {len(parts)} messages")
+    
+    # Send via Telegram API
+    results = get_client().send(
+        chat_ids,
+        parts,
+        parse_mode="Markdown",
+        disable_web_page_preview=False  # Show link previews for videos
+    )
+    
+    delivered = sum(results.values())
+    if delivered == len(chat_ids):
+        print(f"[notifier] ✅ Telegram notification sent successfully"
+              + (f" to {delivered} chats" if len(chat_ids) > 1 else ""))
+        return True
+    print(f"[notifier] ❌ Telegram notification reached {delivered} of {len(chat_ids)} chats")
+    return False
+
+
+def build_message(
+    videos_added: List[Dict[str, str]],
+    videos_failed: Optional[List[Dict[str, str]]] = None,
+    run_time: Optional[str] = None,
+) -> str:
+    """
+    Build the Markdown digest for one run.
+    """
     # Build message
     message_parts = []
     
@@ -48,7 +312,8 @@ def send_telegram_notification(
         # List videos
         for i, video in enumerate(videos_added, 1):
             title = video.get('title', 'Unknown Title')
-            url = video.get('url', '')
+            # Canonical link: no tracking parameters, and the same URL for the same video
+            url = canonical_url(video.get('url', ''))
             channel = video.get('channel', 'Unknown Channel')
             reason = video.get('reason', '')
             
@@ -81,32 +346,7 @@ def send_telegram_notification(
         run_time = datetime.now().strftime("%I:%M %p")
     message_parts.append(f"\n⏰ Run completed at {run_time}")
     
-    message = "\n".join(message_parts)
-    
-    # Send via Telegram API
-    api_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown",
-        "disable_web_page_preview": False  # Show link previews for videos
-    }
-    
-    try:
-        response = requests.post(api_url, json=payload, timeout=10)
-        response.raise_for_status()
-        
-        if response.json().get("ok"):
-            print(f"[notifier] ✅ Telegram notification sent successfully")
-            return True
-        else:
-            print(f"[notifier] ❌ Telegram API returned error: {response.json()}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"[notifier] ❌ Failed to send Telegram notification: {e}")
-        return False
+    return "\n".join(message_parts)
 
 
 def escape_markdown(text: str) -> str:
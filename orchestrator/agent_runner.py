@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
-import os, sys, json, time
+import os, sys, json, time, queue, threading, contextlib
 import requests # type: ignore
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from mcp.server import Server # type: ignore
 
 from dotenv import load_dotenv # type: ignore
 
+from llm_cache import ResponseCache, cache_key
+from llm_limit import LLMLimiter
+
 load_dotenv()
 
 # Ensure repo root is on sys.path so we can import mcp_server when running locally
@@ -13,15 +17,46 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from telemetry import span, count, propagate, LOG_STREAM
+from feed_store import read_records, write_records
+from video_record import VideoCollection, canonical_url
+
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
 SYSTEM_PATH = Path(os.getenv("SYSTEM_PATH", "../system_instructions.md"))
-INPUT_PATH = Path(os.getenv("INPUT_PATH", "../data/scraped.json"))
-OUTPUT_PATH = Path(os.getenv("OUTPUT_PATH", "../data/selected.json"))
+# JSON Lines (one record per line); a legacy .json document is still read
+INPUT_PATH = Path(os.getenv("INPUT_PATH", "../data/scraped.jsonl"))
+OUTPUT_PATH = Path(os.getenv("OUTPUT_PATH", "../data/selected.jsonl"))
+INDEX_PATH = os.getenv("INDEX_PATH", "../data/video_index.sqlite3")  # empty disables the index
 DRY_RUN = os.getenv("DRY_RUN", "true").lower() == "true"
 USE_MCP_MODULE = os.getenv("USE_MCP_MODULE", "false").lower() == "true"
+WATCH_LATER_CONCURRENCY = int(os.getenv("WATCH_LATER_CONCURRENCY", "3"))
+# Candidate encoding sent to the model: lines | table | json (compact, numeric ids) or full (raw records)
+PROMPT_FORMAT = os.getenv("PROMPT_FORMAT", "lines").lower()
+# "single" sends every candidate in one call; "tournament" selects from fixed-size
+# chunks in parallel, then picks the final 1-3 from the chunk winners
+SELECTION_MODE = os.getenv("SELECTION_MODE", "single").lower()
+TOURNAMENT_CHUNK_SIZE = int(os.getenv("TOURNAMENT_CHUNK_SIZE", "40"))
+TOURNAMENT_CHUNK_PICKS = int(os.getenv("TOURNAMENT_CHUNK_PICKS", "3"))
+TOURNAMENT_PARALLELISM = int(os.getenv("TOURNAMENT_PARALLELISM", "2"))
+TOURNAMENT_ROUNDS = int(os.getenv("TOURNAMENT_ROUNDS", "3"))  # including the final round
+# Keep only the K candidates closest to the system instructions by embedding
+# similarity before the chat call (0 disables the pre-ranking stage)
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "0"))
+# Stream /api/chat and act on each selection as soon as it is generated
+OLLAMA_STREAM = os.getenv("OLLAMA_STREAM", "false").lower() == "true"
+OLLAMA_IDLE_TIMEOUT = float(os.getenv("OLLAMA_IDLE_TIMEOUT", "60"))  # max seconds between streamed chunks
+# Load the model in the background at startup and keep it resident between calls
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # empty leaves Ollama's default (5m)
+# Run scrape, selection and Watch Later as overlapped stages instead of one after another
+PIPELINE = os.getenv("PIPELINE", "false").lower() == "true"
+# JSON list of account profiles to run in parallel instead of the single STATE_FILE account
+PROFILES_PATH = os.getenv("PROFILES_PATH", "")
 
 SESSION = requests.Session()
+LLM_CACHE = ResponseCache.from_env()
+LLM_LIMITER = LLMLimiter.from_env()
 
 
 def read_text(path: Path) -> str:
@@ -32,11 +67,11 @@ def read_text(path: Path) -> str:
         sys.exit(1)
 
 
-def read_json(path: Path):
+def read_feed(path: Path) -> list:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return read_records(path)
     except Exception as e:
-        print(f"[orchestrator] Failed to read JSON {path}: {e}", file=sys.stderr)
+        print(f"[orchestrator] Failed to read {path}: {e}", file=sys.stderr)
         sys.exit(1)
 
 
@@ -47,21 +82,18 @@ def scrape_via_mcp_module():
     Returns the parsed Python list of video dicts.
     """
     try:
-        from orchestrator.mcp_server import scrape_youtube_tool  # type: ignore
+        from mcp_server import scrape_youtube_tool  # type: ignore
     except Exception as e:
         print(f"[orchestrator] Could not import mcp_server.scrape_youtube_tool: {e}", file=sys.stderr)
         sys.exit(1)
 
     content = scrape_youtube_tool()
 
-    # mcp.types.TextContent likely exposes the JSON via a 'text' attribute
-    text = None
-    if hasattr(content, "title"):
-        title = getattr(content, "title")
-    elif hasattr(content, "url"):
-        url = getattr(content, "url")
-    elif isinstance(content, str):
+    # The wrapper returns a JSON string; mcp.types.TextContent exposes it via 'text'
+    if isinstance(content, str):
         text = content
+    elif isinstance(getattr(content, "text", None), str):
+        text = content.text
     else:
         # Last resort: try to stringify
         text = str(content)
@@ -75,25 +107,40 @@ def scrape_via_mcp_module():
     return data
 
 
-def chat_ollama(messages, model: str, format_schema=None):
+def chat_ollama(messages, model: str, format_schema=None, stats: dict | None = None, use_cache: bool = True):
     """
     Send a chat-style request to Ollama using /api/chat.
     No fallback logic. If /api/chat does not exist, raise an error.
+    If `stats` is given it is filled with Ollama's token counts and durations.
+    Responses are served from / stored in LLM_CACHE unless use_cache is False.
     """
+    key = None
+    if use_cache and LLM_CACHE:
+        key = cache_key(model, messages, format_schema)
+        cached = LLM_CACHE.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats["cache"] = "hit"
+            return cached
+
     payload = {
         "model": model,
         "messages": messages,
         "stream": False,
     }
+    if OLLAMA_KEEP_ALIVE:
+        payload["keep_alive"] = OLLAMA_KEEP_ALIVE
     if format_schema is not None:
         payload["format"] = format_schema
 
     # Call /api/chat only
-    r = SESSION.post(
-        f"{OLLAMA_BASE_URL}/api/chat",
-        json=payload,
-        timeout=120
-    )
+    with _llm_slot(stats):
+        started = time.monotonic()
+        r = SESSION.post(
+            f"{OLLAMA_BASE_URL}/api/chat",
+            json=payload,
+            timeout=120
+        )
 
     # If the endpoint doesn't exist → fail loudly
     if r.status_code == 404:
@@ -105,49 +152,268 @@ def chat_ollama(messages, model: str, format_schema=None):
     r.raise_for_status()
     data = r.json()
 
+    if stats is not None:
+        stats["cache"] = "miss" if key else "off"
+        stats["latency"] = round(time.monotonic() - started, 3)
+        for key_name in ("prompt_eval_count", "eval_count", "total_duration", "load_duration"):
+            if key_name in data:
+                stats[key_name] = data[key_name]
+
     # Common Ollama response format:
     # { "message": { "role": "...", "content": "..." } }
     if "message" in data and "content" in data["message"]:
-        return data["message"]["content"]
+        content = data["message"]["content"]
 
     # Older / alternate format:
     # { "messages": [ { "content": "..." } ] }
-    if "messages" in data and len(data["messages"]) > 0:
-        return data["messages"][-1].get("content", "")
+    elif "messages" in data and len(data["messages"]) > 0:
+        content = data["messages"][-1].get("content", "")
 
-    # Unexpected response → return raw for debugging
-    return str(data)
+    # Unexpected response → return raw for debugging (never cached)
+    else:
+        return str(data)
 
+    # Don't cache malformed structured output, or a retry would replay it
+    if key and (format_schema is None or _is_json(content)):
+        LLM_CACHE.put(key, content, model)
+    return content
 
 
+def _llm_slot(stats: dict | None):
+    """
+    Wait for a free LLM_LIMITER slot (no-op when the cap is disabled).
+    """
+    if LLM_LIMITER is None:
+        return contextlib.nullcontext()
+    return LLM_LIMITER.slot(stats)
 
-def main():
-    from datetime import datetime
-    
-    # Import YouTube actions and notifier from parent directory
+
+def _is_json(text: str) -> bool:
     try:
-        from youtube_actions import add_to_watch_later
-        from notifier import send_telegram_notification
-    except ImportError as e:
-        print(f"[orchestrator] ERROR: Could not import modules: {e}", file=sys.stderr)
-        print(f"[orchestrator] Make sure youtube_actions.py and notifier.py are in parent directory", file=sys.stderr)
-        sys.exit(1)
-    
-    system_text = read_text(SYSTEM_PATH)
-    print(f"[orchestrator] USE_MCP_MODULE={USE_MCP_MODULE}, DRY_RUN={DRY_RUN}")
-    
-    if USE_MCP_MODULE:
-        scraped = scrape_via_mcp_module()
-        print(f"[orchestrator] Scraped {len(scraped)} videos via MCP module.")
-    else:
-        scraped = read_json(INPUT_PATH)
-        print(f"[orchestrator] Loaded {len(scraped) if isinstance(scraped, list) else 'unknown'} videos from file")
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
 
-    # Expect a list of dicts with keys: title, url, thumbnail, channel
-    videos = scraped if isinstance(scraped, list) else scraped.get("videos", [])
 
-    # Ask the model to select 1-3 videos and return strict JSON.
-    schema = {
+class SelectionStreamParser:
+    """
+    Incrementally parse a streamed JSON object and return each element of
+    its top-level array (default key "selections") as soon as that element
+    is complete.
+    """
+
+    def __init__(self, key: str = "selections"):
+        self.key = key
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string = None
+        self.array_depth = None
+        self.item_start = None
+
+    def feed(self, chunk: str) -> list:
+        """
+        Add streamed text; return the array elements completed by it.
+        """
+        self.text += chunk
+        items = []
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = i
+            elif ch in "{[":
+                self.depth += 1
+                if ch == "[" and self.depth == 2 and self.array_depth is None and self.last_string == self.key:
+                    self.array_depth = self.depth
+                elif ch == "{" and self.array_depth is not None and self.depth == self.array_depth + 1:
+                    self.item_start = i
+            elif ch in "}]":
+                if ch == "}" and self.item_start is not None and self.depth == self.array_depth + 1:
+                    try:
+                        items.append(json.loads(text[self.item_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self.item_start = None
+                elif ch == "]" and self.depth == self.array_depth:
+                    self.array_depth = -1  # array closed; ignore any later ones
+                self.depth -= 1
+        self.pos = len(text)
+        return items
+
+
+def chat_ollama_stream(
+    messages,
+    model: str,
+    format_schema=None,
+    on_selection=None,
+    stats: dict | None = None,
+    idle_timeout: float = OLLAMA_IDLE_TIMEOUT,
+    use_cache: bool = True,
+) -> str:
+    """
+    Streaming variant of chat_ollama.
+
+    Consumes Ollama's NDJSON chunks, hands each completed element of the
+    `selections` array to `on_selection` while generation continues, and
+    returns the full content. Instead of a total timeout, the request fails
+    when no chunk arrives for `idle_timeout` seconds.
+
+    `stats` is filled with time_to_first_token, generation_time,
+    tokens_per_sec and Ollama's token counts.
+    """
+    parser = SelectionStreamParser()
+
+    def emit(piece: str):
+        for item in parser.feed(piece):
+            if on_selection:
+                on_selection(item)
+
+    key = None
+    if use_cache and LLM_CACHE:
+        key = cache_key(model, messages, format_schema)
+        cached = LLM_CACHE.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats["cache"] = "hit"
+            emit(cached)
+            return cached
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+    }
+    if OLLAMA_KEEP_ALIVE:
+        payload["keep_alive"] = OLLAMA_KEEP_ALIVE
+    if format_schema is not None:
+        payload["format"] = format_schema
+
+    first_token_at = None
+    parts = []
+    final = {}
+
+    with _llm_slot(stats):
+        started = time.monotonic()
+        # (connect timeout, read timeout): the read timeout bounds the gap between chunks
+        with SESSION.post(
+            f"{OLLAMA_BASE_URL}/api/chat",
+            json=payload,
+            stream=True,
+            timeout=(10, idle_timeout)
+        ) as r:
+            if r.status_code == 404:
+                raise RuntimeError(
+                    f"Ollama endpoint /api/chat not found at {OLLAMA_BASE_URL}. "
+                    f"Your Ollama version may be too old or misconfigured."
+                )
+            r.raise_for_status()
+
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(f"Ollama error: {data['error']}")
+
+                piece = data.get("message", {}).get("content", "")
+                if piece:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                    parts.append(piece)
+                    emit(piece)
+
+                if data.get("done"):
+                    final = data
+                    break
+
+    finished = time.monotonic()
+    content = "".join(parts)
+
+    if stats is not None:
+        stats["cache"] = "miss" if key else "off"
+        stats["time_to_first_token"] = round(first_token_at - started, 3) if first_token_at else None
+        stats["generation_time"] = round(finished - started, 3)
+        stats["latency"] = stats["generation_time"]
+        for key_name in ("prompt_eval_count", "eval_count", "total_duration", "load_duration"):
+            if key_name in final:
+                stats[key_name] = final[key_name]
+        if final.get("eval_count") and final.get("eval_duration"):
+            stats["tokens_per_sec"] = round(final["eval_count"] / (final["eval_duration"] / 1e9), 1)
+        elif first_token_at and finished > first_token_at:
+            # No server timings: count streamed chunks (roughly one token each)
+            stats["tokens_per_sec"] = round(len(parts) / (finished - first_token_at), 1)
+
+    if key and (format_schema is None or _is_json(content)):
+        LLM_CACHE.put(key, content, model)
+    return content
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token for Llama-style tokenizers).
+    """
+    return (len(text) + 3) // 4
+
+
+def _clean(value) -> str:
+    return " ".join(str(value or "").split())
+
+
+def encode_candidates(videos: list, fmt: str = PROMPT_FORMAT) -> str:
+    """
+    Encode candidates for the prompt using short numeric ids (1-based
+    position in `videos`) with title and channel only.
+
+    Formats:
+        lines: "3. Title — Channel" per video
+        table: "id|title|channel" header plus one pipe-separated row per video
+        json:  compact JSON array of {id, title, channel}
+        full:  the raw records (URLs, thumbnails) as before
+    """
+    if fmt == "full":
+        return json.dumps(videos)
+    if fmt == "json":
+        return json.dumps(
+            [{"id": i, "title": v.get("title"), "channel": v.get("channel")}
+             for i, v in enumerate(videos, 1)],
+            ensure_ascii=False, separators=(",", ":"),
+        )
+    if fmt == "table":
+        rows = ["id|title|channel"]
+        rows += [
+            f"{i}|{_clean(v.get('title')).replace('|', '/')}|{_clean(v.get('channel')).replace('|', '/')}"
+            for i, v in enumerate(videos, 1)
+        ]
+        return "\n".join(rows)
+    return "\n".join(
+        f"{i}. {_clean(v.get('title'))} — {_clean(v.get('channel'))}"
+        for i, v in enumerate(videos, 1)
+    )
+
+
+def selection_schema(fmt: str = PROMPT_FORMAT) -> dict:
+    """
+    JSON schema for the model's answer: numeric ids for compact formats,
+    URLs for the full format.
+    """
+    key, key_type = ("url", "string") if fmt == "full" else ("id", "integer")
+    return {
         "type": "object",
         "properties": {
             "selections": {
@@ -155,10 +421,10 @@ def main():
                 "items": {
                     "type": "object",
                     "properties": {
-                        "url": {"type": "string"},
+                        key: {"type": key_type},
                         "reason": {"type": "string"}
                     },
-                    "required": ["url", "reason"],
+                    "required": [key, "reason"],
                     "additionalProperties": False
                 }
             }
@@ -167,63 +433,249 @@ def main():
         "additionalProperties": False
     }
 
-    user_prompt = (
-        "You are given a JSON array of YouTube homepage videos. "
-        "Return a JSON object with a 'selections' array containing 1–3 chosen videos with a short reasoning. "
-        "Only return valid JSON matching the provided schema."
-    )
 
-    messages = [
+def build_selection_messages(system_text: str, candidates: list, fmt: str = PROMPT_FORMAT, picks: str = "1–3") -> list:
+    if fmt == "full":
+        user_prompt = (
+            "You are given a JSON array of YouTube homepage videos. "
+            f"Return a JSON object with a 'selections' array containing {picks} chosen videos with a short reasoning. "
+            "Only return valid JSON matching the provided schema."
+        )
+    else:
+        user_prompt = (
+            "You are given a numbered list of YouTube homepage videos (id, title, channel). "
+            f"Return a JSON object with a 'selections' array containing {picks} chosen videos, "
+            "each with the video's numeric id and a short reasoning. "
+            "Only return valid JSON matching the provided schema."
+        )
+
+    return [
         {"role": "system", "content": system_text},
         {"role": "user", "content": user_prompt},
-        {"role": "user", "content": json.dumps(videos)}
+        {"role": "user", "content": encode_candidates(candidates, fmt)}
     ]
 
+
+def decode_selections(result: dict, candidates: list, fmt: str = PROMPT_FORMAT) -> dict:
+    """
+    Map the model's id-based selections back to {url, reason} records.
+    Unknown and duplicate ids are dropped.
+    """
+    if fmt == "full":
+        return result
+
+    selections = []
+    seen = set()
+    for sel in result.get("selections", []):
+        try:
+            idx = int(sel.get("id"))
+        except (TypeError, ValueError):
+            idx = 0
+        if not 1 <= idx <= len(candidates) or idx in seen:
+            print(f"[orchestrator] WARNING: Ignoring unknown or duplicate selection id {sel.get('id')!r}", file=LOG_STREAM)
+            continue
+        seen.add(idx)
+        selections.append({"url": candidates[idx - 1].get("url"), "reason": sel.get("reason", "")})
+    return {"selections": selections}
+
+
+def select_videos(
+    system_text: str,
+    candidates: list,
+    picks: str = "1–3",
+    fmt: str = PROMPT_FORMAT,
+    stream: bool = OLLAMA_STREAM,
+    on_selection=None,
+) -> dict:
+    """
+    Ask the model to pick videos from `candidates` in one call.
+
+    With `stream` (implied by `on_selection`), each decoded {url, reason}
+    selection is passed to `on_selection` as soon as the model finishes
+    generating it.
+
+    Returns:
+        {"selections": [{"url": ..., "reason": ...}, ...]}
+    Raises:
+        ValueError if the model output is not valid JSON
+    """
+    messages = build_selection_messages(system_text, candidates, fmt, picks)
+    chat_stats = {}
+    stream = stream or on_selection is not None
+
+    with span("llm.chat", model=MODEL, stream=stream, candidates=len(candidates), fmt=fmt) as llm_attrs:
+        if stream:
+            streamed = []
+
+            def handle(item):
+                decoded = decode_selections({"selections": [item]}, candidates, fmt)["selections"]
+                for sel in decoded:
+                    if any(s["url"] == sel["url"] for s in streamed):
+                        continue
+                    streamed.append(sel)
+                    if on_selection:
+                        on_selection(sel)
+
+            content = chat_ollama_stream(messages, MODEL, selection_schema(fmt), on_selection=handle, stats=chat_stats)
+        else:
+            content = chat_ollama(messages, MODEL, selection_schema(fmt), stats=chat_stats)
+        llm_attrs.update(chat_stats)
+
+    count("llm_requests_total", cache=chat_stats.get("cache", "off"))
+    count("llm_tokens_total", chat_stats.get("prompt_eval_count", 0), kind="prompt")
+    count("llm_tokens_total", chat_stats.get("eval_count", 0), kind="generated")
+
     try:
-        content = chat_ollama(messages, MODEL, schema)
-        result = json.loads(content)
-    except Exception as e:
-        print(f"[orchestrator] Model did not return valid JSON: {e}\nRaw: {content if 'content' in locals() else ''}", file=sys.stderr)
-        sys.exit(2)
+        parsed = json.loads(content)
+    except ValueError as e:
+        raise ValueError(f"Model did not return valid JSON: {e}\nRaw: {content}") from e
+
+    if "prompt_eval_count" in chat_stats:
+        print(f"[orchestrator] Ollama prompt tokens: {chat_stats['prompt_eval_count']}, "
+              f"generated tokens: {chat_stats.get('eval_count', '?')}", file=LOG_STREAM)
+    if chat_stats.get("latency") is not None:
+        load = chat_stats.get("load_duration", 0) / 1e9
+        print(f"[orchestrator] Ollama chat latency: {chat_stats['latency']}s (model load {load:.2f}s of it)",
+              file=LOG_STREAM)
+    if chat_stats.get("generation_time") is not None:
+        print(f"[orchestrator] Ollama stream: first token {chat_stats['time_to_first_token']}s, "
+              f"{chat_stats.get('tokens_per_sec', '?')} tokens/s, generation {chat_stats['generation_time']}s",
+              file=LOG_STREAM)
+
+    if stream:
+        # Exactly what was handed to on_selection, in the same order
+        return {"selections": streamed}
+    return decode_selections(parsed, candidates, fmt)
+
+
+def select_tournament(
+    system_text: str,
+    candidates: list,
+    chunk_size: int = TOURNAMENT_CHUNK_SIZE,
+    chunk_picks: int = TOURNAMENT_CHUNK_PICKS,
+    parallelism: int = TOURNAMENT_PARALLELISM,
+    rounds: int = TOURNAMENT_ROUNDS,
+    on_selection=None,
+) -> dict:
+    """
+    Select from a large candidate list in elimination rounds.
 
-    # Persist selections
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(json.dumps(result, indent=2), encoding="utf-8")
-    print(json.dumps(result, indent=2))
+    While the pool is larger than `chunk_size` (and rounds remain), it is
+    split into chunks that are judged concurrently, `parallelism` at a time;
+    each chunk contributes up to `chunk_picks` winners. A final call picks
+    the 1-3 videos from what is left. A failed chunk is skipped rather than
+    failing the run. Only the final round streams to `on_selection`.
 
-    # Execute Watch Later actions
-    selections = result.get("selections", [])
-    
-    if DRY_RUN:
-        print(f"[orchestrator] DRY_RUN=true, would add {len(selections)} videos to Watch Later")
-        for sel in selections:
-            print(f"  - {sel.get('url')}")
-        return
-    
-    # Execute actions for real
-    print(f"[orchestrator] Adding {len(selections)} videos to Watch Later...")
-    
+    Returns:
+        {"selections": [{"url": ..., "reason": ...}, ...]} as select_videos
+    """
+    pool = candidates
+    round_no = 1
+    while len(pool) > chunk_size and round_no < rounds:
+        chunks = [pool[i:i + chunk_size] for i in range(0, len(pool), chunk_size)]
+        print(f"[orchestrator] Tournament round {round_no}: {len(pool)} candidates in "
+              f"{len(chunks)} chunks, {parallelism} at a time", file=LOG_STREAM)
+
+        def judge(chunk):
+            try:
+                return select_videos(system_text, chunk, picks=f"1–{chunk_picks}", stream=False)
+            except Exception as e:
+                print(f"[orchestrator] WARNING: Tournament chunk failed: {e}", file=sys.stderr)
+                return {"selections": []}
+
+        with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as pool_executor:
+            chunk_results = list(pool_executor.map(propagate(judge), chunks))
+
+        by_url = {v.get("url"): v for v in pool}
+        winners = []
+        for result in chunk_results:
+            for sel in result["selections"][:chunk_picks]:
+                video = by_url.pop(sel["url"], None)
+                if video:
+                    winners.append(video)
+
+        if not winners:
+            raise ValueError("Every tournament chunk failed to return selections")
+        if len(winners) >= len(pool):
+            break  # no elimination happened; more rounds won't help
+        pool = winners
+        round_no += 1
+
+    if len(pool) > chunk_size:
+        print(f"[orchestrator] WARNING: {len(pool)} candidates left for the final round "
+              f"(chunk size {chunk_size}); consider more TOURNAMENT_ROUNDS", file=LOG_STREAM)
+    print(f"[orchestrator] Tournament final round: {len(pool)} candidates", file=LOG_STREAM)
+    return select_videos(system_text, pool, on_selection=on_selection)
+
+
+def report_prompt_size(candidates: list, fmt: str = PROMPT_FORMAT):
+    """
+    Print estimated candidate-encoding tokens for the full vs chosen format.
+    """
+    full_tokens = estimate_tokens(encode_candidates(candidates, "full"))
+    used_tokens = estimate_tokens(encode_candidates(candidates, fmt))
+    saved = 100 * (1 - used_tokens / full_tokens) if full_tokens else 0
+    print(f"[orchestrator] Candidate encoding: full ~{full_tokens} tokens, "
+          f"{fmt} ~{used_tokens} tokens ({saved:.0f}% fewer)")
+
+
+
+
+class WatchLaterWorker:
+    """
+    Adds streamed selections to Watch Later on a background thread, so
+    browser work starts while the model is still generating. `add_many`
+    must consume its URL iterable lazily (add_many_to_watch_later, or
+    add_many_to_watch_later_concurrent for concurrent tabs).
+    """
+
+    def __init__(self, add_many):
+        self.queue = queue.Queue()
+        self.selections = []
+        self.results = []
+        self.thread = threading.Thread(target=propagate(self._run), args=(add_many,), daemon=True)
+        self.thread.start()
+
+    def _run(self, add_many):
+        self.results = add_many(iter(self.queue.get, None))
+
+    def submit(self, selection: dict):
+        print(f"[orchestrator] Streamed selection, queueing {selection['url']}")
+        self.selections.append(selection)
+        self.queue.put(selection["url"])
+
+    def finish(self) -> list:
+        """
+        Signal the end of the stream and wait for queued additions.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        return self.results
+
+
+def build_outcomes(selections: list, action_results: list, videos: list) -> tuple:
+    """
+    Pair each selection with its scraped metadata and Watch Later result.
+    `videos` is a VideoCollection or a list of JSON records.
+
+    Returns:
+        (videos_added, videos_failed) in the shape send_telegram_notification expects
+    """
     videos_added = []
     videos_failed = []
+    catalog = videos if isinstance(videos, VideoCollection) else VideoCollection(videos)
     
-    for selection in selections:
-        url = selection.get("url")
+    for selection, action_result in zip(selections, action_results):
+        url = canonical_url(selection.get("url"))
         reason = selection.get("reason")
         
-        # Find the original video metadata
-        video_meta = None
-        for v in videos:
-            if v.get("url") == url:
-                video_meta = v
-                break
+        # Find the original video metadata for each selection (by video id)
+        video_meta = catalog.get(url)
         
         if not video_meta:
             print(f"[orchestrator] WARNING: Could not find metadata for {url}")
             video_meta = {"title": "Unknown", "channel": "Unknown", "url": url}
         
-        # Add to Watch Later
-        action_result = add_to_watch_later(url)
-        
         if action_result.get("success"):
             videos_added.append({
                 "title": video_meta.get("title"),
@@ -237,6 +689,179 @@ def main():
                 "url": url,
                 "message": action_result.get("message")
             })
+    return videos_added, videos_failed
+
+
+def main():
+    from datetime import datetime
+    
+    if PROFILES_PATH:
+        # One agent_runner process per account, sharing a browser and the LLM cap
+        from profiles import load_profiles, run_profiles
+        try:
+            profiles = load_profiles(PROFILES_PATH)
+        except (OSError, ValueError) as e:
+            print(f"[orchestrator] ERROR: Invalid PROFILES_PATH {PROFILES_PATH}: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(run_profiles(profiles))
+    
+    # Import YouTube actions and notifier from parent directory
+    try:
+        from youtube_actions import add_many_to_watch_later, add_many_to_watch_later_concurrent
+        from notifier import send_telegram_notification
+        from video_index import VideoIndex, video_id_from_url
+    except ImportError as e:
+        print(f"[orchestrator] ERROR: Could not import modules: {e}", file=sys.stderr)
+        print(f"[orchestrator] Make sure youtube_actions.py and notifier.py are in parent directory", file=sys.stderr)
+        sys.exit(1)
+    
+    # Load the model while scraping runs; the first chat call then skips the load
+    warmup = None
+    if OLLAMA_WARMUP:
+        from ollama_warmup import ModelWarmup
+        warmup = ModelWarmup(SESSION, OLLAMA_BASE_URL, MODEL, OLLAMA_KEEP_ALIVE).start()
+    
+    system_text = read_text(SYSTEM_PATH)
+    print(f"[orchestrator] USE_MCP_MODULE={USE_MCP_MODULE}, DRY_RUN={DRY_RUN}, PIPELINE={PIPELINE}")
+    
+    if PIPELINE:
+        # Overlapped scrape -> select -> act -> notify; see pipeline.py
+        import asyncio
+        from pipeline import PipelineRun, run_pipeline
+        index = VideoIndex(INDEX_PATH) if INDEX_PATH else None
+        run = PipelineRun(
+            system_text, index, warmup,
+            select=select_videos,
+            build_outcomes=build_outcomes,
+            input_path=INPUT_PATH,
+            output_path=OUTPUT_PATH,
+            dry_run=DRY_RUN,
+            fmt=PROMPT_FORMAT,
+            chunk_picks=TOURNAMENT_CHUNK_PICKS,
+            stream=OLLAMA_STREAM,
+        )
+        try:
+            code = asyncio.run(run_pipeline(run))
+        finally:
+            if index:
+                index.close()
+            if LLM_CACHE:
+                print(f"[orchestrator] LLM cache: {LLM_CACHE.summary()}")
+        sys.exit(code)
+    
+    if USE_MCP_MODULE:
+        scraped = scrape_via_mcp_module()
+        print(f"[orchestrator] Scraped {len(scraped)} videos via MCP module.")
+    else:
+        scraped = read_feed(INPUT_PATH)
+        print(f"[orchestrator] Loaded {len(scraped)} videos from file")
+
+    # Expect a list of dicts with keys: title, url, thumbnail, channel
+    videos = scraped if isinstance(scraped, list) else scraped.get("videos", [])
+
+    # One record per video id, with canonical URLs; also the metadata lookup for the outcomes
+    catalog = VideoCollection.from_dicts(videos)
+    if catalog.duplicates or len(catalog) != len(videos):
+        print(f"[orchestrator] Dropped {len(videos) - len(catalog)} duplicate or id-less records")
+    videos = catalog.to_dicts()
+
+    # Skip videos that earlier runs already selected or added
+    index = VideoIndex(INDEX_PATH) if INDEX_PATH else None
+    candidates = videos
+    if index:
+        index.record_seen(videos)
+        candidates = index.filter_unhandled(videos)
+        print(f"[orchestrator] Video index: {len(videos) - len(candidates)} already handled, "
+              f"{len(candidates)} new candidates")
+
+    # Pre-rank by embedding similarity so the chat model only reads the top-K
+    if PRERANK_TOP_K and len(candidates) > PRERANK_TOP_K:
+        try:
+            from embeddings import EmbeddingRanker
+            with span("llm.prerank", candidates=len(candidates), top_k=PRERANK_TOP_K):
+                candidates = EmbeddingRanker(SESSION, OLLAMA_BASE_URL).prerank(candidates, system_text, PRERANK_TOP_K)
+        except Exception as e:
+            print(f"[orchestrator] WARNING: Embedding pre-ranking failed, using all candidates: {e}", file=sys.stderr)
+
+    # Ask the model to select 1-3 videos and return strict JSON.
+    report_prompt_size(candidates, PROMPT_FORMAT)
+    if warmup and candidates:
+        print(f"[orchestrator] Model warm-up: {warmup.report()}")
+
+    # When streaming for real, Watch Later additions start with the first selection
+    worker = None
+    streamed_results = None
+    selection_failed = False
+    if OLLAMA_STREAM and not DRY_RUN and candidates:
+        if WATCH_LATER_CONCURRENCY > 1:
+            worker = WatchLaterWorker(
+                lambda urls: add_many_to_watch_later_concurrent(urls, concurrency=WATCH_LATER_CONCURRENCY)
+            )
+        else:
+            worker = WatchLaterWorker(add_many_to_watch_later)
+    on_selection = worker.submit if worker else None
+
+    try:
+        if not candidates:
+            print("[orchestrator] No new candidates, skipping model call")
+            result = {"selections": []}
+        elif SELECTION_MODE == "tournament":
+            result = select_tournament(system_text, candidates, on_selection=on_selection)
+        else:
+            result = select_videos(system_text, candidates, on_selection=on_selection)
+    except Exception as e:
+        print(f"[orchestrator] Model selection failed: {e}", file=sys.stderr)
+        if not (worker and worker.selections):
+            sys.exit(2)
+        # Streamed selections may already be in Watch Later: record and report them, then exit 2
+        print(f"[orchestrator] Keeping {len(worker.selections)} selections streamed before the failure",
+              file=sys.stderr)
+        result = {"selections": worker.selections}
+        selection_failed = True
+    finally:
+        if worker:
+            streamed_results = worker.finish()
+        if LLM_CACHE:
+            print(f"[orchestrator] LLM cache: {LLM_CACHE.summary()}")
+
+    # Persist selections, one per line, in this run's history file
+    write_records(OUTPUT_PATH, result.get("selections", []))
+    print(json.dumps(result, indent=2))
+
+    # Execute Watch Later actions
+    selections = result.get("selections", [])
+    
+    if DRY_RUN:
+        print(f"[orchestrator] DRY_RUN=true, would add {len(selections)} videos to Watch Later")
+        for sel in selections:
+            print(f"  - {sel.get('url')}")
+        return
+    
+    # Execute actions for real
+    print(f"[orchestrator] Adding {len(selections)} videos to Watch Later...")
+    
+    # Add to Watch Later in one browser session, several tabs at once if allowed
+    urls = [sel.get("url") for sel in selections]
+    if index:
+        index.mark_selected(video_id_from_url(url) for url in urls)
+    if streamed_results is not None:
+        # Anything the stream didn't hand over (e.g. the worker died) is added now
+        done = {r["url"]: r for r in streamed_results}
+        missing = [url for url in urls if url not in done]
+        if missing:
+            done.update({r["url"]: r for r in add_many_to_watch_later(missing)})
+        action_results = [done[url] for url in urls]
+    elif WATCH_LATER_CONCURRENCY > 1 and len(urls) > 1:
+        action_results = add_many_to_watch_later_concurrent(urls, concurrency=WATCH_LATER_CONCURRENCY)
+    else:
+        action_results = add_many_to_watch_later(urls)
+    
+    videos_added, videos_failed = build_outcomes(selections, action_results, catalog)
+    
+    if index:
+        index.mark_added(video_id_from_url(v["url"]) for v in videos_added)
+        index.mark_failed(video_id_from_url(v["url"]) for v in videos_failed)
+        index.close()
     
     # Send notification
     run_time = datetime.now().strftime("%I:%M %p")
@@ -254,8 +879,11 @@ def main():
         print(f"[orchestrator] ⚠️ Workflow complete but notification failed")
     
     # Exit with appropriate code
+    if selection_failed:
+        sys.exit(2)
     sys.exit(0 if len(videos_failed) == 0 else 1)
 
 
 if __name__ == "__main__":
-    main()
+    with span("run", dry_run=DRY_RUN, pipeline=PIPELINE, selection_mode=SELECTION_MODE):
+        main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Long-running daemon for the YouTube agent.
+
+Stays resident and runs agent_runner.main() on an internal cron-like
+schedule, so container start, imports, Chromium launch and the HTTP
+sessions are paid once instead of on every run. Chromium is kept warm as
+a browser_server.BrowserServer that every run (including its worker
+threads and async Watch Later tabs) attaches to over CDP. Runs can also
+be triggered on demand:
+    curl -X POST http://127.0.0.1:8765/run
+    kill -USR1 <pid>
+and inspected with:
+    curl http://127.0.0.1:8765/status
+
+Only one run happens at a time; triggers that arrive while a run is in
+progress (or already queued) are refused.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import threading
+import traceback
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import agent_runner
+from telemetry import TELEMETRY, span
+
+# Standard 5-field cron expression (minute hour day-of-month month day-of-week),
+# evaluated in the container's local time; @hourly / @daily / @weekly also work
+DAEMON_SCHEDULE = os.getenv("DAEMON_SCHEDULE", "0 7 * * *")
+DAEMON_HTTP_HOST = os.getenv("DAEMON_HTTP_HOST", "127.0.0.1")
+DAEMON_HTTP_PORT = int(os.getenv("DAEMON_HTTP_PORT", "8765"))  # 0 disables the HTTP endpoint
+DAEMON_RUN_ON_START = os.getenv("DAEMON_RUN_ON_START", "false").lower() == "true"
+# Start a browser server for the runs to attach to (skipped when BROWSER_CDP_URL is already set)
+DAEMON_WARM_BROWSER = os.getenv("DAEMON_WARM_BROWSER", "true").lower() == "true"
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+class CronSchedule:
+    """
+    Minimal cron matcher: *, lists (1,15), ranges (1-5) and steps (*/10, 8-18/2).
+    Day-of-week is 0-6 with 0 (or 7) = Sunday; as in cron, when both day
+    fields are restricted a day matching either one qualifies.
+    """
+
+    BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = CRON_ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {len(fields)}: {expr!r}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, lo, hi) for field, (lo, hi) in zip(fields, self.BOUNDS)
+        )
+        self.weekdays = {d % 7 for d in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> set:
+        values = set()
+        for part in field.split(","):
+            rng, _, step = part.partition("/")
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start, end = (int(x) for x in rng.split("-", 1))
+            else:
+                start = end = int(rng)
+                if step:
+                    end = hi
+            if not (lo <= start <= end <= hi):
+                raise ValueError(f"Cron field {field!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays  # Python: Monday=0; cron: Sunday=0
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """
+        Return the first matching minute strictly after `after`.
+        """
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months or not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression {self.expr!r} never matches")
+
+
+class AgentDaemon:
+    def __init__(self, schedule: CronSchedule, host: str = DAEMON_HTTP_HOST, port: int = DAEMON_HTTP_PORT,
+                 warm_browser: bool = DAEMON_WARM_BROWSER):
+        self.schedule = schedule
+        self.host = host
+        self.port = port
+        self.warm_browser = warm_browser
+
+        self.lock = threading.Lock()
+        self.triggers = queue.Queue()
+        self.stopping = threading.Event()
+        self.started = datetime.now()
+        self.next_run = None
+        self.pending = None
+        self.current = None
+        self.last_run = None
+        self.runs = 0
+        self.refused = 0
+        self.browser = None
+        self.httpd = None
+
+    # ---------- triggers ----------
+
+    def request_run(self, trigger: str) -> bool:
+        """
+        Queue a run unless one is already running or queued.
+        """
+        with self.lock:
+            if self.current or self.pending:
+                self.refused += 1
+                busy = self.current["trigger"] if self.current else f"{self.pending}, queued"
+                print(f"[daemon] Refused {trigger} trigger: a run is already in progress ({busy})")
+                return False
+            self.pending = trigger
+            print(f"[daemon] Accepted {trigger} trigger")
+            self.triggers.put(trigger)
+        return True
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "state": "running" if self.current else "idle",
+                "current_run": self.current,
+                "last_run": self.last_run,
+                "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+                "schedule": self.schedule.expr,
+                "runs": self.runs,
+                "refused": self.refused,
+                "uptime_s": round((datetime.now() - self.started).total_seconds()),
+                "warm_browser": {
+                    "enabled": self.browser is not None,
+                    "launches": self.browser.launches if self.browser else 0,
+                    "cdp_url": os.getenv("BROWSER_CDP_URL") or None,
+                },
+            }
+
+    # ---------- runs ----------
+
+    def run_once(self, trigger: str):
+        started = datetime.now()
+        t0 = time.monotonic()
+        with self.lock:
+            self.pending = None
+            self.current = {"trigger": trigger, "started": started.isoformat(timespec="seconds")}
+        print(f"[daemon] ▶ Run started ({trigger})")
+
+        exit_code = 0
+        error = None
+        try:
+            with span("run", trigger=trigger, daemon=True, dry_run=agent_runner.DRY_RUN,
+                      pipeline=agent_runner.PIPELINE):
+                agent_runner.main()
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            exit_code = 1
+            error = repr(e)
+            traceback.print_exc()
+        finally:
+            if TELEMETRY:
+                TELEMETRY.flush()
+
+        duration = round(time.monotonic() - t0, 2)
+        with self.lock:
+            self.current = None
+            self.runs += 1
+            self.last_run = {
+                "trigger": trigger,
+                "started": started.isoformat(timespec="seconds"),
+                "duration_s": duration,
+                "exit_code": exit_code,
+                "status": "ok" if exit_code == 0 else "failed",
+                "error": error,
+            }
+        print(f"[daemon] ■ Run finished ({trigger}) in {duration}s with exit code {exit_code}")
+
+    def serve(self):
+        """
+        Run the scheduler loop on the calling (main) thread until stopped.
+
+        The warm browser's sync Playwright instance belongs to this thread,
+        and a thread that owns one cannot call asyncio.run(). Runs therefore
+        execute on a worker thread and reach the browser over CDP.
+        """
+        self._install_signals()
+        self._start_http()
+
+        if self.warm_browser:
+            self._start_browser()
+
+        self.next_run = self.schedule.next_after(datetime.now())
+        print(f"[daemon] Schedule {self.schedule.expr!r}, next run at {self.next_run:%Y-%m-%d %H:%M}")
+        if DAEMON_RUN_ON_START:
+            self.request_run("startup")
+
+        try:
+            while not self.stopping.is_set():
+                wait = (self.next_run - datetime.now()).total_seconds()
+                try:
+                    # Wake at least once a minute (or per health check) so a stop request is noticed
+                    trigger = self.triggers.get(timeout=min(max(wait, 0), self._tick()))
+                except queue.Empty:
+                    self._check_browser()
+                    if datetime.now() < self.next_run:
+                        continue
+                    trigger = "schedule"
+                    self.next_run = self.schedule.next_after(datetime.now())
+                if trigger is None:
+                    break
+
+                self._run_in_worker(trigger)
+
+                if self.next_run <= datetime.now():
+                    # A scheduled run came due while another was running
+                    with self.lock:
+                        self.refused += 1
+                    print(f"[daemon] Skipped the run scheduled for {self.next_run:%H:%M}: a run was in progress")
+                    self.next_run = self.schedule.next_after(datetime.now())
+                print(f"[daemon] Next scheduled run at {self.next_run:%Y-%m-%d %H:%M}")
+        finally:
+            self._shutdown()
+
+    def _run_in_worker(self, trigger: str):
+        worker = threading.Thread(target=self.run_once, args=(trigger,), name=f"run-{trigger}")
+        worker.start()
+        # Keep health-checking the browser (owned by this thread) while the run uses it
+        while worker.is_alive():
+            worker.join(self._tick())
+            self._check_browser()
+
+    def stop(self):
+        self.stopping.set()
+        self.triggers.put(None)
+
+    def _shutdown(self):
+        print("[daemon] Shutting down")
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        if self.browser:
+            self.browser.stop()
+
+    # ---------- warm browser ----------
+
+    def _start_browser(self):
+        if os.getenv("BROWSER_CDP_URL"):
+            print(f"[daemon] Runs attach to the browser at {os.getenv('BROWSER_CDP_URL')}")
+            return
+        import youtube_actions
+        from browser_server import BrowserServer
+        try:
+            self.browser = BrowserServer(host="127.0.0.1", user_data_dir="").start()
+        except Exception as e:
+            print(f"[daemon] WARNING: Could not start warm browser, runs will launch their own: {e}")
+            return
+        # Child processes read the environment; this process already imported youtube_actions
+        os.environ["BROWSER_CDP_URL"] = self.browser.url
+        youtube_actions.BROWSER_CDP_URL = self.browser.url
+
+    def _check_browser(self):
+        if not self.browser:
+            return
+        try:
+            self.browser.check()
+        except Exception as e:
+            print(f"[daemon] WARNING: Could not relaunch warm browser: {e}")
+
+    def _tick(self) -> float:
+        from browser_server import BROWSER_HEALTH_INTERVAL
+        return min(BROWSER_HEALTH_INTERVAL, 60) if self.browser else 60
+
+    # ---------- signals and HTTP ----------
+
+    def _install_signals(self):
+        def on_usr1(signum, frame):
+            # self.lock isn't reentrant; don't take it inside the handler
+            threading.Thread(target=self.request_run, args=("signal",), daemon=True).start()
+
+        def on_stop(signum, frame):
+            threading.Thread(target=self.stop, daemon=True).start()
+
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, on_usr1)
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+
+    def _start_http(self):
+        if not self.port:
+            return
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                payload = json.dumps(body, indent=2).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == "/status":
+                    self._reply(200, daemon.status())
+                elif self.path == "/healthz":
+                    self._reply(200, {"ok": True})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/run":
+                    self._reply(404, {"error": "not found"})
+                elif daemon.request_run("http"):
+                    self._reply(202, {"accepted": True})
+                else:
+                    self._reply(409, {"accepted": False, "error": "a run is already in progress",
+                                      "current_run": daemon.status()["current_run"]})
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[daemon] HTTP trigger/status endpoint on http://{self.host}:{self.port}")
+
+
+if __name__ == "__main__":
+    try:
+        schedule = CronSchedule(DAEMON_SCHEDULE)
+    except ValueError as e:
+        print(f"[daemon] ERROR: Invalid DAEMON_SCHEDULE: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"[daemon] Starting (pid {os.getpid()})")
+    AgentDaemon(schedule).serve()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Embedding pre-ranking stage for agent_runner.
+
+Embeds video titles/channels through Ollama's /api/embed endpoint, scores
+them against an interest profile built from the system instructions with
+vectorized cosine similarity, and keeps only the top-K for the chat model.
+
+Vectors are cached on disk by video id in an append-only pair of files:
+    <path>.f32  raw float32 rows, one per embedded text
+    <path>.ids  header line with model and dimension, then one id per row
+so each video is embedded once across runs and loading is a single read.
+"""
+
+import os
+import re
+import hashlib
+from pathlib import Path
+
+import numpy as np # type: ignore
+from dotenv import load_dotenv # type: ignore
+
+from video_index import video_id_of
+
+load_dotenv()
+
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "../data/embeddings")
+
+EMBED_BATCH_SIZE = 64
+
+# Leading markdown markers: bullets, quotes, headings, numbered items ("1." / "2)")
+LIST_MARKER = re.compile(r"^\s*(?:(?:[-*+>]|#+|\d+[.)])\s+)+")
+
+
+class EmbeddingStore:
+    """
+    Append-only id -> vector store backed by a raw float32 file.
+    """
+
+    def __init__(self, path, model: str):
+        self.path = Path(path)
+        self.model = model
+        self.ids_path = self.path.with_suffix(".ids")
+        self.vec_path = self.path.with_suffix(".f32")
+        self.dim = None
+        self.index = {}
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    def _load(self):
+        if not self.ids_path.exists() or not self.vec_path.exists():
+            return
+        lines = self.ids_path.read_text(encoding="utf-8").splitlines()
+        header = dict(part.split("=", 1) for part in lines[0].lstrip("# ").split()) if lines else {}
+        if header.get("model") != self.model:
+            print(f"[embeddings] Store was built with {header.get('model')!r}, starting over for {self.model!r}")
+            return
+
+        self.dim = int(header["dim"])
+        matrix = np.fromfile(self.vec_path, dtype=np.float32)
+        rows = min(len(lines) - 1, matrix.size // self.dim)  # ignore a torn trailing write
+        self.matrix = matrix[:rows * self.dim].reshape(rows, self.dim)
+        self.index = {vid: row for row, vid in enumerate(lines[1:rows + 1])}
+
+    def get(self, ids) -> np.ndarray:
+        return self.matrix[[self.index[i] for i in ids]]
+
+    def missing(self, ids) -> list:
+        return [i for i in dict.fromkeys(ids) if i not in self.index]
+
+    def add(self, ids: list, vectors: np.ndarray):
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        fresh = self.dim is None or not self.ids_path.exists()
+        if fresh:
+            self.dim = vectors.shape[1]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.ids_path.write_text(f"# model={self.model} dim={self.dim}\n", encoding="utf-8")
+            self.vec_path.write_bytes(b"")
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self.index = {}
+
+        with open(self.vec_path, "ab") as f:
+            vectors.tofile(f)
+        with open(self.ids_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{i}\n" for i in ids))
+
+        start = len(self.matrix)
+        self.matrix = np.vstack([self.matrix, vectors])
+        self.index.update({vid: start + n for n, vid in enumerate(ids)})
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def interest_lines(system_text: str) -> list:
+    """
+    Split the system instructions into interest statements (one per
+    non-trivial line, markdown bullets stripped).
+    """
+    lines = []
+    for line in system_text.splitlines():
+        line = LIST_MARKER.sub("", line).strip()
+        # len > 3 also drops short fragments; \w drops rules such as "---"
+        if len(line) > 3 and re.search(r"\w", line):
+            lines.append(line)
+    return lines or [system_text.strip()]
+
+
+def video_text(video: dict) -> str:
+    return f"{video.get('title') or ''} — {video.get('channel') or ''}"
+
+
+class EmbeddingRanker:
+    def __init__(self, session, base_url: str, model: str = OLLAMA_EMBED_MODEL, path=EMBEDDINGS_PATH):
+        self.session = session
+        self.base_url = base_url
+        self.model = model
+        self.store = EmbeddingStore(path, model)
+        self.embedded = 0
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            r = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts[start:start + EMBED_BATCH_SIZE]},
+                timeout=120,
+            )
+            r.raise_for_status()
+            vectors.extend(r.json()["embeddings"])
+        self.embedded += len(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _vectors(self, keyed_texts: dict) -> np.ndarray:
+        """
+        Return vectors for {id: text}, embedding only ids not in the store.
+        """
+        missing = self.store.missing(keyed_texts)
+        if missing:
+            self.store.add(missing, self.embed([keyed_texts[i] for i in missing]))
+        return self.store.get(list(keyed_texts))
+
+    def prerank(self, videos: list, system_text: str, top_k: int) -> list:
+        """
+        Return the `top_k` videos most similar to the interest profile,
+        best first. Videos without an id are embedded but never cached.
+        """
+        if len(videos) <= top_k:
+            return videos
+
+        profile = {
+            "profile:" + hashlib.sha1(line.encode("utf-8")).hexdigest(): line
+            for line in interest_lines(system_text)
+        }
+        profile_vecs = _normalize(self._vectors(profile))
+
+        keyed = {}
+        uncached = []
+        for n, video in enumerate(videos):
+            vid = video_id_of(video)
+            if vid:
+                keyed.setdefault(vid, video_text(video))
+            else:
+                uncached.append(n)
+
+        by_id = dict(zip(keyed, self._vectors(keyed))) if keyed else {}
+        extra = self.embed([video_text(videos[n]) for n in uncached]) if uncached else []
+        extra_by_row = dict(zip(uncached, extra))
+
+        video_vecs = np.stack([
+            by_id[vid] if (vid := video_id_of(v)) else extra_by_row[n]
+            for n, v in enumerate(videos)
+        ])
+
+        # Cosine similarity to every interest line; a video scores by its best match
+        scores = (_normalize(video_vecs) @ profile_vecs.T).max(axis=1)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+
+        print(f"[embeddings] Pre-ranked {len(videos)} videos to top {top_k} "
+              f"(embedded {self.embedded} new texts, {len(self.store.index)} cached); "
+              f"score range {scores[top[-1]]:.3f}..{scores[top[0]]:.3f}")
+        return [videos[i] for i in top]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Content-addressed response cache for chat_ollama.
+
+Responses are stored one file per request under a directory, keyed by the
+SHA-256 of the model, messages and format schema, so a retried run with
+identical inputs skips the model entirely. Entries are evicted by age and
+by total count/size (least recently used first).
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+from dotenv import load_dotenv # type: ignore
+
+load_dotenv()
+
+OLLAMA_CACHE_DIR = os.getenv("OLLAMA_CACHE_DIR", "../data/llm_cache")  # empty disables the cache
+OLLAMA_CACHE_MAX_ENTRIES = int(os.getenv("OLLAMA_CACHE_MAX_ENTRIES", "500"))
+OLLAMA_CACHE_MAX_MB = float(os.getenv("OLLAMA_CACHE_MAX_MB", "50"))
+OLLAMA_CACHE_MAX_AGE_HOURS = float(os.getenv("OLLAMA_CACHE_MAX_AGE_HOURS", "24"))
+# Skip lookups (fresh responses are still stored)
+OLLAMA_CACHE_BYPASS = os.getenv("OLLAMA_CACHE_BYPASS", "false").lower() == "true"
+
+
+def cache_key(model: str, messages, format_schema=None, options=None) -> str:
+    """
+    Hash the request fields that determine the response.
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "format": format_schema, "options": options},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        directory,
+        max_entries: int = OLLAMA_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(OLLAMA_CACHE_MAX_MB * 1024 * 1024),
+        max_age: float = OLLAMA_CACHE_MAX_AGE_HOURS * 3600,
+        bypass: bool = OLLAMA_CACHE_BYPASS,
+    ):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.bypass = bypass
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache | None":
+        return cls(OLLAMA_CACHE_DIR) if OLLAMA_CACHE_DIR else None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        """
+        Return the cached content for `key`, or None on a miss.
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age:
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        # Touch so eviction treats the entry as recently used
+        os.utime(path)
+        self.hits += 1
+        return entry["content"]
+
+    def put(self, key: str, content: str, model: str | None = None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"model": model, "created": time.time(), "content": content}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+        self.stores += 1
+        self.evict()
+
+    def evict(self):
+        """
+        Drop expired entries, then least recently used ones until the cache
+        is within max_entries and max_bytes.
+        """
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            # Entry age is checked on read; mtime here also covers never-read entries
+            if now - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                self.evictions += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return (
+            f"hits={self.hits} misses={self.misses} ({rate:.0f}% hit rate) "
+            f"stores={self.stores} evictions={self.evictions}"
+            + (" [bypass]" if self.bypass else "")
+        )
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Global cap on concurrent Ollama chat requests.
+
+Tournament chunks, pipeline batches and parallel profile runs all call
+/api/chat; past OLLAMA_NUM_PARALLEL the extra requests just queue inside
+Ollama (and hold their HTTP timeouts while they do). LLMLimiter hands out
+LLM_MAX_CONCURRENCY slots. With LLM_LOCK_DIR set the slots are lock files
+(flock), so the cap holds across processes sharing that directory, which
+is how multi-profile runs share one Ollama endpoint.
+"""
+
+import os
+import time
+import threading
+import contextlib
+
+from dotenv import load_dotenv # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process cap
+    fcntl = None
+
+load_dotenv()
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))  # 0 disables the cap
+LLM_LOCK_DIR = os.getenv("LLM_LOCK_DIR", "")  # empty limits this process only
+
+POLL_INTERVAL = 0.05  # seconds between attempts when every slot is taken
+
+
+class LLMLimiter:
+    def __init__(self, slots: int, lock_dir: str = ""):
+        self.slots = slots
+        self.lock_dir = lock_dir if fcntl else ""
+        self.semaphore = threading.BoundedSemaphore(slots)
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "LLMLimiter | None":
+        if LLM_MAX_CONCURRENCY <= 0:
+            return None
+        return cls(LLM_MAX_CONCURRENCY, LLM_LOCK_DIR)
+
+    @contextlib.contextmanager
+    def slot(self, stats: dict | None = None):
+        """
+        Hold one slot for the enclosed request. The time spent waiting is
+        stored in stats["queue_wait"].
+        """
+        started = time.monotonic()
+        # The in-process semaphore keeps this process's threads from busy-polling the lock files
+        with self.semaphore:
+            fd = self._acquire_file() if self.lock_dir else None
+            if stats is not None:
+                stats["queue_wait"] = round(time.monotonic() - started, 3)
+            try:
+                yield
+            finally:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+
+    def _acquire_file(self) -> int:
+        while True:
+            for i in range(self.slots):
+                fd = os.open(os.path.join(self.lock_dir, f"llm-slot-{i}.lock"), os.O_CREAT | os.O_RDWR, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except OSError:
+                    os.close(fd)
+            time.sleep(POLL_INTERVAL)
@@ -1,14 +1,189 @@
-from mcp.server import Server # type: ignore
-from mcp import types # type: ignore
+#!/usr/bin/env python3
+"""
+MCP server for YouTube Agent.
+
+Tools (all async; blocking work runs in worker threads so the event loop
+keeps serving other requests):
+    scrape_youtube(offset, limit, refresh)   one page of the home feed
+    select_videos(offset, limit, instructions)  model picks from the feed
+    add_to_watch_later(urls)                 add videos to Watch Later
+
+The feed is scraped once and reused for MCP_SCRAPE_TTL seconds, so a client
+paging through it or calling several tools in a row pays for one browser
+session. Concurrent callers share a scrape that is already running.
+
+    python mcp_server.py          # stdio transport
+"""
+
+import os
+import sys
 import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv # type: ignore
+
+try:
+    from mcp.server.fastmcp import FastMCP # type: ignore
+except ImportError:  # mcp 2.x renamed FastMCP to MCPServer
+    from mcp.server.mcpserver import MCPServer as FastMCP # type: ignore
+
+load_dotenv()
+
+if __name__ == "__main__":
+    # The stdio transport owns stdout: the modules below print their progress
+    # to stderr (telemetry.LOG_STREAM), read when they are first imported
+    os.environ["LOG_TO_STDERR"] = "true"
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
 from youtube_actions import scrape_youtube as _scrape_youtube
+from telemetry import span
+
+MCP_SCRAPE_TTL = float(os.getenv("MCP_SCRAPE_TTL", "600"))  # seconds a scrape is reused; 0 always rescrapes
+MCP_PAGE_SIZE = int(os.getenv("MCP_PAGE_SIZE", "50"))  # default `limit` of the paged tools
+MCP_MAX_PAGE_SIZE = 200
+SCRAPE_OUTPUT_PATH = os.getenv("MCP_SCRAPE_OUTPUT", "data/scraped.jsonl")  # empty skips the file
+
+server = FastMCP("youtube-agent")
+
+
+class ScrapeCache:
+    """
+    The last scrape and when it was taken. Thread-safe: one caller scrapes
+    while the others wait for its result.
+    """
+
+    def __init__(self, ttl: float = MCP_SCRAPE_TTL):
+        self.ttl = ttl
+        self.videos = None
+        self.scraped_at = None
+        self._lock = threading.Lock()
+
+    def age(self) -> float | None:
+        return None if self.scraped_at is None else round(time.time() - self.scraped_at, 1)
+
+    def fresh(self) -> bool:
+        return self.videos is not None and self.age() < self.ttl
+
+    def get(self, refresh: bool = False) -> tuple[list, bool]:
+        """
+        Return (videos, cached).
+        """
+        requested = time.time()
+        with self._lock:
+            # A scrape that finished while we waited for the lock is fresh enough
+            if self.fresh() and (not refresh or self.scraped_at >= requested):
+                return self.videos, True
+
+            videos = _scrape_youtube(output_path=SCRAPE_OUTPUT_PATH or None)
+            self.videos = videos
+            self.scraped_at = time.time()
+            return videos, False
+
+
+SCRAPE_CACHE = ScrapeCache()
+
+
+def _page(items: list, offset: int, limit: int | None) -> tuple[list, int, int]:
+    offset = max(offset, 0)
+    limit = min(max(limit if limit is not None else MCP_PAGE_SIZE, 1), MCP_MAX_PAGE_SIZE)
+    return items[offset:offset + limit], offset, limit
+
+
+def scrape_youtube_tool() -> str:
+    """
+    Synchronous wrapper for agent_runner (USE_MCP_MODULE=true).
+
+    Returns:
+        The scraped videos as a JSON string (uses the cache)
+    """
+    videos, _ = SCRAPE_CACHE.get()
+    return json.dumps(videos, indent=2)
+
+
+@server.tool()
+async def scrape_youtube(offset: int = 0, limit: int | None = None, refresh: bool = False) -> dict:
+    """
+    Scrape the YouTube home feed (cached for MCP_SCRAPE_TTL seconds) and
+    return one page of videos.
+
+    Args:
+        offset: Index of the first video to return
+        limit: Videos per page (default MCP_PAGE_SIZE, at most 200)
+        refresh: Scrape again even if the cached feed is still fresh
+
+    Returns:
+        {"videos": [...], "total", "offset", "limit", "next_offset" (None on
+        the last page), "cached", "age" (seconds since the scrape)}
+    """
+    with span("mcp.scrape", refresh=refresh) as attrs:
+        videos, cached = await asyncio.to_thread(SCRAPE_CACHE.get, refresh)
+        attrs["cached"] = cached
+    page, offset, limit = _page(videos, offset, limit)
+    next_offset = offset + len(page)
+    return {
+        "videos": page,
+        "total": len(videos),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset if next_offset < len(videos) else None,
+        "cached": cached,
+        "age": SCRAPE_CACHE.age(),
+    }
+
+
+def _select(candidates: list, instructions: str | None) -> dict:
+    from agent_runner import SYSTEM_PATH, SELECTION_MODE, select_videos as _select_videos, select_tournament
+
+    system_text = instructions or SYSTEM_PATH.read_text(encoding="utf-8")
+    if SELECTION_MODE == "tournament":
+        return select_tournament(system_text, candidates)
+    return _select_videos(system_text, candidates)
+
+
+@server.tool()
+async def select_videos(offset: int = 0, limit: int | None = None, instructions: str | None = None) -> dict:
+    """
+    Let the model pick 1-3 videos from a page of the cached feed.
+
+    Args:
+        offset: Index of the first candidate
+        limit: Number of candidates (default MCP_PAGE_SIZE, at most 200)
+        instructions: Selection criteria (default: the system instructions file)
+
+    Returns:
+        {"selections": [{"url": ..., "reason": ...}, ...], "candidates": <count>}
+    """
+    videos, _ = await asyncio.to_thread(SCRAPE_CACHE.get)
+    candidates, _, _ = _page(videos, offset, limit)
+    if not candidates:
+        return {"selections": [], "candidates": 0}
+    with span("mcp.select", candidates=len(candidates)):
+        result = await asyncio.to_thread(_select, candidates, instructions)
+    return {"selections": result.get("selections", []), "candidates": len(candidates)}
+
+
+@server.tool()
+async def add_to_watch_later(urls: list[str]) -> list[dict]:
+    """
+    Add videos to Watch Later.
+
+    Args:
+        urls: Full YouTube video URLs
+
+    Returns:
+        One {"success", "url", "message"} result per URL, in input order
+    """
+    from youtube_actions import add_many_to_watch_later_async
 
-server = Server("youtube-agent")
+    with span("mcp.watch_later", videos=len(urls)):
+        return await add_many_to_watch_later_async(urls)
 
-@server.tool("scrape_youtube")
-def scrape_youtube_tool():
-    videos = _scrape_youtube()
-    return types.TextContent(json.dumps(videos, indent=2))
 
 if __name__ == "__main__":
     server.run()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Ollama model warm-up for agent_runner.
+
+Loading a model into memory is the slowest part of the first /api/chat
+call on a cold container. ModelWarmup starts that load on a background
+thread as soon as the orchestrator starts, so it overlaps with scraping:
+    /api/tags  is the model pulled at all?
+    /api/ps    is it already resident?
+    /api/chat  with no messages loads it and sets keep_alive
+"""
+
+import time
+import threading
+
+
+class ModelWarmup:
+    def __init__(self, session, base_url: str, model: str, keep_alive: str | None = None):
+        self.session = session
+        self.base_url = base_url
+        self.model = model
+        self.keep_alive = keep_alive
+
+        self.status = "not started"
+        self.started = None
+        self.finished = None
+        self.resident = None
+        self.thread = None
+
+    def start(self) -> "ModelWarmup":
+        self.started = time.monotonic()
+        self.status = "running"
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until the warm-up finished; True if the model is loaded.
+        """
+        if self.thread:
+            self.thread.join(timeout)
+        return self.status in ("loaded", "resident")
+
+    def _names(self, path: str) -> set:
+        r = self.session.get(f"{self.base_url}{path}", timeout=10)
+        r.raise_for_status()
+        return {m.get("name") or m.get("model") for m in r.json().get("models", [])}
+
+    def _is_listed(self, names: set) -> bool:
+        # "llama3.2" is listed as "llama3.2:latest"
+        return self.model in names or f"{self.model}:latest" in names
+
+    def _run(self):
+        try:
+            if not self._is_listed(self._names("/api/tags")):
+                self.status = "missing"
+                print(f"[warmup] WARNING: Model {self.model} is not pulled; run `ollama pull {self.model}`")
+                return
+
+            was_resident = self._is_listed(self._names("/api/ps"))
+
+            # An empty message list only loads the model (and refreshes keep_alive)
+            payload = {"model": self.model, "messages": [], "stream": False}
+            if self.keep_alive:
+                payload["keep_alive"] = self.keep_alive
+            r = self.session.post(f"{self.base_url}/api/chat", json=payload, timeout=600)
+            r.raise_for_status()
+
+            self.resident = self._is_listed(self._names("/api/ps"))
+            self.status = "resident" if was_resident else "loaded"
+        except Exception as e:
+            self.status = "failed"
+            print(f"[warmup] WARNING: Model warm-up failed: {e}")
+        finally:
+            self.finished = time.monotonic()
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def report(self) -> str:
+        """
+        Describe the warm-up as seen from now, i.e. right before the first
+        chat call: how long the load took and how much of it was hidden.
+        """
+        if self.status == "running":
+            return (f"still loading {self.model} after {self.elapsed():.2f}s; "
+                    f"the first chat call will wait for the rest")
+        if self.status == "resident":
+            return f"{self.model} was already resident (refresh took {self.elapsed():.2f}s)"
+        if self.status == "loaded":
+            state = "resident" if self.resident else "not listed in /api/ps"
+            return f"loaded {self.model} in {self.elapsed():.2f}s, fully overlapped with scraping ({state})"
+        return f"{self.model}: {self.status}"
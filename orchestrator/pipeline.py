@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Overlapped asyncio pipeline: scrape -> select -> act -> notify.
+
+Stages are connected by bounded asyncio queues so they run side by side:
+  scraper   harvests feed cards on a worker thread and hands each one over
+            as it hydrates (blocks when the queue is full: backpressure)
+  selector  batches cards and judges each batch on /api/chat as soon as it
+            fills, then streams the final 1-3 picks from the batch winners
+  actor     adds each pick to Watch Later in concurrent tabs the moment it
+            is generated
+  notifier  records outcomes and sends the Telegram summary at the end
+
+The file-based flow in agent_runner.main stays the default; set
+PIPELINE=true to use this one. scraped/selected JSON Lines files are still
+written (cards as they are scraped) so the file handoff keeps working.
+agent_runner.main passes its selection functions and settings in through
+PipelineRun, so this module does not import it.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import contextlib
+from datetime import datetime
+
+from feed_store import open_run, write_records
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "20"))
+PIPELINE_SELECT_CONCURRENCY = int(os.getenv("PIPELINE_SELECT_CONCURRENCY", "2"))
+PIPELINE_WRITE_SCRAPED = os.getenv("PIPELINE_WRITE_SCRAPED", "true").lower() == "true"
+
+_DONE = object()
+
+
+class StageClock:
+    """
+    Busy/idle accounting for one stage. A stage is busy while at least one
+    of its units of work is in flight; idle is the rest of its lifetime.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.active = 0
+        self.started = None
+        self.finished = None
+        self._busy_since = None
+
+    def start(self):
+        self.started = time.monotonic()
+
+    def stop(self):
+        self.finished = time.monotonic()
+
+    def add_busy(self, seconds: float):
+        self.busy += seconds
+
+    @contextlib.contextmanager
+    def working(self):
+        if self.active == 0:
+            self._busy_since = time.monotonic()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self.busy += time.monotonic() - self._busy_since
+
+    def report(self) -> str:
+        if self.started is None:
+            return f"{self.name}: not started"
+        wall = (self.finished or time.monotonic()) - self.started
+        return f"{self.name}: busy {self.busy:.2f}s, idle {max(wall - self.busy, 0):.2f}s"
+
+
+class PipelineRun:
+    """
+    State shared by the stages of one run, and the runner functions and
+    settings the stages use.
+
+    Args:
+        select: select_videos(system_text, candidates, picks=, fmt=, stream=, on_selection=)
+        build_outcomes: build_outcomes(selections, action_results, videos)
+        input_path / output_path: scraped and selected JSON Lines files
+        fmt: Candidate prompt format
+        chunk_picks: Picks per batch (as in a tournament chunk)
+        stream: Stream the final selection so picks reach the actor early
+    """
+
+    def __init__(
+        self,
+        system_text: str,
+        index=None,
+        warmup=None,
+        *,
+        select,
+        build_outcomes,
+        input_path,
+        output_path,
+        dry_run: bool,
+        fmt: str,
+        chunk_picks: int,
+        stream: bool,
+    ):
+        self.system_text = system_text
+        self.index = index
+        self.warmup = warmup
+        self.select = select
+        self.build_outcomes = build_outcomes
+        self.input_path = input_path
+        self.output_path = output_path
+        self.dry_run = dry_run
+        self.fmt = fmt
+        self.chunk_picks = chunk_picks
+        self.stream = stream
+        self.scraped = []
+        self.selections = []
+        self.action_results = []
+        self.clocks = {name: StageClock(name) for name in ("scrape", "select", "act", "notify")}
+
+
+async def scrape_stage(run: PipelineRun, cards_q: asyncio.Queue):
+    from youtube_actions import iter_feed_cards
+
+    loop = asyncio.get_running_loop()
+    clock = run.clocks["scrape"]
+    clock.start()
+
+    def produce():
+        cards = iter(iter_feed_cards())
+        with open_run(run.input_path) if PIPELINE_WRITE_SCRAPED else contextlib.nullcontext() as writer:
+            while True:
+                started = time.monotonic()
+                card = next(cards, _DONE)
+                clock.add_busy(time.monotonic() - started)
+                if card is _DONE:
+                    break
+                if writer:
+                    writer.write(card)
+                # Blocks this thread while the queue is full
+                asyncio.run_coroutine_threadsafe(cards_q.put(card), loop).result()
+
+    try:
+        await asyncio.to_thread(produce)
+    except Exception as e:
+        print(f"[pipeline] WARNING: scraper stopped early: {e}", file=sys.stderr)
+    finally:
+        clock.stop()
+        await cards_q.put(_DONE)
+
+
+async def select_stage(run: PipelineRun, cards_q: asyncio.Queue, actions_q: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    clock = run.clocks["select"]
+    clock.start()
+
+    semaphore = asyncio.Semaphore(max(PIPELINE_SELECT_CONCURRENCY, 1))
+    winners = []
+    tasks = []
+    reported_warmup = False
+
+    async def judge(batch: list):
+        nonlocal reported_warmup
+        if run.index:
+            run.index.record_seen(batch)
+            batch = run.index.filter_unhandled(batch)
+        if not batch:
+            return
+        if run.warmup and not reported_warmup:
+            reported_warmup = True
+            print(f"[pipeline] Model warm-up: {run.warmup.report()}")
+        by_url = {v.get("url"): v for v in batch}
+        async with semaphore:
+            with clock.working():
+                try:
+                    result = await asyncio.to_thread(
+                        run.select, run.system_text, batch,
+                        picks=f"1–{run.chunk_picks}", fmt=run.fmt, stream=False,
+                    )
+                except Exception as e:
+                    print(f"[pipeline] WARNING: batch selection failed: {e}", file=sys.stderr)
+                    return
+        for sel in result["selections"][:run.chunk_picks]:
+            if sel["url"] in by_url:
+                winners.append(by_url.pop(sel["url"]))
+
+    batch = []
+    while True:
+        card = await cards_q.get()
+        if card is _DONE:
+            break
+        run.scraped.append(card)
+        batch.append(card)
+        if len(batch) >= PIPELINE_BATCH_SIZE:
+            tasks.append(asyncio.create_task(judge(batch)))
+            batch = []
+    if batch:
+        tasks.append(asyncio.create_task(judge(batch)))
+    await asyncio.gather(*tasks)
+
+    print(f"[pipeline] {len(run.scraped)} cards scraped, {len(winners)} batch winners")
+    try:
+        if winners:
+            def on_selection(sel):
+                loop.call_soon_threadsafe(actions_q.put_nowait, sel)
+
+            with clock.working():
+                result = await asyncio.to_thread(
+                    run.select, run.system_text, winners,
+                    picks="1–3", fmt=run.fmt, stream=run.stream,
+                    on_selection=on_selection if run.stream else None,
+                )
+            if not run.stream:
+                # Without streaming the picks reach the actor once the reply is complete
+                for sel in result["selections"]:
+                    await actions_q.put(sel)
+    except Exception as e:
+        print(f"[pipeline] Final selection failed: {e}", file=sys.stderr)
+    finally:
+        clock.stop()
+        # Queued after every on_selection callback, which were scheduled first
+        await actions_q.put(_DONE)
+
+
+async def act_stage(run: PipelineRun, actions_q: asyncio.Queue):
+    from youtube_actions import WatchLaterSession
+
+    clock = run.clocks["act"]
+    clock.start()
+    tasks = []
+
+    async with contextlib.AsyncExitStack() as stack:
+        session = None
+        launch_error = None
+
+        async def add(url: str) -> dict:
+            if launch_error:
+                return {"success": False, "url": url, "message": launch_error}
+            with clock.working():
+                return await session.add(url)
+
+        while True:
+            sel = await actions_q.get()
+            if sel is _DONE:
+                break
+            # What actually reached the actor is what the run reports
+            run.selections.append(sel)
+            if run.dry_run:
+                print(f"[pipeline] DRY_RUN=true, would add {sel['url']}")
+                continue
+            if session is None and launch_error is None:
+                with clock.working():
+                    try:
+                        session = await stack.enter_async_context(WatchLaterSession())
+                    except Exception as e:
+                        launch_error = f"Error: {str(e)}"
+                        print(f"[pipeline] ERROR: Could not open Watch Later session: {e}", file=sys.stderr)
+            tasks.append(asyncio.create_task(add(sel["url"])))
+
+        # gather keeps the order selections arrived in
+        run.action_results = list(await asyncio.gather(*tasks))
+
+    clock.stop()
+
+
+async def notify_stage(run: PipelineRun):
+    from notifier import send_telegram_notification
+    from video_index import video_id_from_url
+
+    clock = run.clocks["notify"]
+    clock.start()
+    with clock.working():
+        result = {"selections": run.selections}
+        write_records(run.output_path, run.selections)
+        print(json.dumps(result, indent=2))
+
+        if run.dry_run:
+            clock.stop()
+            return 0
+
+        videos_added, videos_failed = run.build_outcomes(run.selections, run.action_results, run.scraped)
+        if run.index:
+            run.index.mark_selected(video_id_from_url(sel["url"]) for sel in run.selections)
+            run.index.mark_added(video_id_from_url(v["url"]) for v in videos_added)
+            run.index.mark_failed(video_id_from_url(v["url"]) for v in videos_failed)
+
+        sent = await asyncio.to_thread(
+            send_telegram_notification,
+            videos_added=videos_added,
+            videos_failed=videos_failed if videos_failed else None,
+            run_time=datetime.now().strftime("%I:%M %p"),
+        )
+    clock.stop()
+
+    if sent:
+        print(f"[pipeline] ✅ Workflow complete: {len(videos_added)} added, {len(videos_failed)} failed")
+    else:
+        print(f"[pipeline] ⚠️ Workflow complete but notification failed")
+    return 0 if not videos_failed else 1
+
+
+async def run_pipeline(run: PipelineRun) -> int:
+    """
+    Run one overlapped scrape -> select -> act -> notify pass.
+
+    Returns:
+        Process exit code (0 = nothing failed)
+    """
+    cards_q = asyncio.Queue(maxsize=max(PIPELINE_QUEUE_SIZE, 1))
+    actions_q = asyncio.Queue()  # at most 3 selections; fed from the LLM thread
+    started = time.monotonic()
+
+    await asyncio.gather(
+        scrape_stage(run, cards_q),
+        select_stage(run, cards_q, actions_q),
+        act_stage(run, actions_q),
+    )
+    code = await notify_stage(run)
+
+    print(f"[pipeline] Finished in {time.monotonic() - started:.2f}s")
+    for clock in run.clocks.values():
+        print(f"[pipeline]   {clock.report()}")
+    return code
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Multi-account runs for agent_runner.
+
+PROFILES_PATH points at a JSON list of profiles, one per YouTube account:
+
+    [
+      {"name": "alice", "state_file": "/app/profiles/alice.json",
+       "system_path": "/app/profiles/alice.md", "telegram_chat_id": "111"},
+      {"name": "bob", "state_file": "/app/profiles/bob.json", "telegram_chat_id": "222"}
+    ]
+
+Each profile runs as its own agent_runner process with its account's
+settings in the environment. All the processes connect to one shared
+Chromium over CDP and use one Ollama endpoint, so each account pays for a
+browser context rather than a browser. LLM_LOCK_DIR makes the
+LLM_MAX_CONCURRENCY cap global, so the account count does not multiply
+concurrent Ollama requests.
+
+Per-profile keys (only name and state_file are required):
+    state_file, system_path, input_path, output_path, index_path,
+    telegram_chat_id, env (extra environment overrides)
+Output, input and index paths default to a per-profile subdirectory next
+to the single-account paths, e.g. /data/alice/selected.jsonl.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv # type: ignore
+
+load_dotenv()
+
+PROFILES_PARALLELISM = int(os.getenv("PROFILES_PARALLELISM", "3"))  # profiles running at once
+# Launch one Chromium with a CDP port for all profiles (ignored when BROWSER_CDP_URL is set)
+PROFILES_SHARE_BROWSER = os.getenv("PROFILES_SHARE_BROWSER", "true").lower() == "true"
+PROFILES_CDP_PORT = int(os.getenv("PROFILES_CDP_PORT", "9222"))
+
+RUNNER = Path(__file__).resolve().with_name("agent_runner.py")
+
+# Profile key -> environment variable of the single-account setting it overrides
+PROFILE_ENV = {
+    "state_file": "STATE_FILE",
+    "system_path": "SYSTEM_PATH",
+    "input_path": "INPUT_PATH",
+    "output_path": "OUTPUT_PATH",
+    "index_path": "INDEX_PATH",
+    "telegram_chat_id": "TELEGRAM_CHAT_ID",
+}
+
+# Per-account files that default to <dir>/<profile name>/<file>
+PER_PROFILE_PATHS = {
+    "input_path": ("INPUT_PATH", "../data/scraped.jsonl"),
+    "output_path": ("OUTPUT_PATH", "../data/selected.jsonl"),
+    "index_path": ("INDEX_PATH", "../data/video_index.sqlite3"),
+}
+
+_print_lock = threading.Lock()
+
+
+def load_profiles(path) -> list[dict]:
+    """
+    Read and validate the profile list (a JSON list, or {"profiles": [...]}).
+
+    Raises:
+        ValueError if the file is malformed or a profile is incomplete
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    profiles = data.get("profiles") if isinstance(data, dict) else data
+    if not isinstance(profiles, list) or not profiles:
+        raise ValueError(f"{path} must contain a non-empty list of profiles")
+
+    seen = set()
+    for i, profile in enumerate(profiles, 1):
+        name = profile.get("name") if isinstance(profile, dict) else None
+        if not name or not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"Profile #{i} needs a 'name' made of letters, digits, '.', '-' or '_'")
+        if name in seen:
+            raise ValueError(f"Duplicate profile name {name!r}")
+        if not profile.get("state_file"):
+            raise ValueError(f"Profile {name!r} has no 'state_file'")
+        unknown = set(profile) - set(PROFILE_ENV) - {"name", "env"}
+        if unknown:
+            raise ValueError(f"Profile {name!r} has unknown keys: {', '.join(sorted(unknown))}")
+        seen.add(name)
+    return profiles
+
+
+def profile_env(profile: dict, shared: dict | None = None) -> dict:
+    """
+    Build the environment of one profile's agent_runner process.
+    """
+    env = dict(os.environ)
+    env.update(shared or {})
+    env["PROFILES_PATH"] = ""  # the child runs a single account
+    env["PYTHONUNBUFFERED"] = "1"
+
+    for var, default in PER_PROFILE_PATHS.values():
+        if var == "INDEX_PATH" and os.environ.get(var) == "":
+            continue  # index disabled for everyone
+        base = Path(os.environ.get(var) or default)
+        env[var] = str(base.parent / profile["name"] / base.name)
+
+    for key, var in PROFILE_ENV.items():
+        if profile.get(key):
+            env[var] = str(profile[key])
+    env.update({k: str(v) for k, v in (profile.get("env") or {}).items()})
+    return env
+
+
+def run_profile(profile: dict, shared: dict) -> dict:
+    """
+    Run agent_runner for one profile, prefixing its output with the profile name.
+    """
+    name = profile["name"]
+    env = profile_env(profile, shared)
+    Path(env["OUTPUT_PATH"]).parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, str(RUNNER)],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    for line in proc.stdout:
+        with _print_lock:
+            print(f"[{name}] {line}", end="", flush=True)
+    code = proc.wait()
+    return {"name": name, "exit_code": code, "duration": round(time.monotonic() - started, 2)}
+
+
+def run_profiles(profiles: list[dict], parallelism: int = PROFILES_PARALLELISM) -> int:
+    """
+    Run every profile, `parallelism` at a time, sharing one browser and
+    one LLM concurrency cap.
+
+    Returns:
+        The highest exit code of the profile runs (0 if all succeeded)
+    """
+    from browser_server import BrowserServer, BROWSER_HEALTH_INTERVAL
+    from llm_limit import LLM_LOCK_DIR
+    from telemetry import span
+
+    shared = {"LLM_LOCK_DIR": LLM_LOCK_DIR or tempfile.mkdtemp(prefix="llm-slots-")}
+
+    server = None
+    if PROFILES_SHARE_BROWSER and not os.getenv("BROWSER_CDP_URL"):
+        try:
+            server = BrowserServer(port=PROFILES_CDP_PORT, host="127.0.0.1", headless=True, user_data_dir="").start()
+            shared["BROWSER_CDP_URL"] = server.url
+        except Exception as e:
+            print(f"[profiles] WARNING: Could not launch shared Chromium, each profile launches its own: {e}")
+
+    names = ", ".join(p["name"] for p in profiles)
+    print(f"[profiles] Running {len(profiles)} profiles ({names}), {parallelism} at a time")
+    try:
+        with span("profiles", profiles=len(profiles), parallelism=parallelism,
+                  shared_browser="BROWSER_CDP_URL" in shared) as attrs:
+            with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+                futures = [executor.submit(run_profile, p, shared) for p in profiles]
+                # Health-check the shared browser (on its owning thread) while the profiles run
+                while wait(futures, timeout=BROWSER_HEALTH_INTERVAL if server else None).not_done:
+                    try:
+                        server.check()
+                    except Exception as e:
+                        print(f"[profiles] WARNING: Could not relaunch shared Chromium: {e}")
+                results = [f.result() for f in futures]
+            attrs["failed"] = sum(1 for r in results if r["exit_code"] != 0)
+    finally:
+        if server:
+            server.stop()
+
+    for r in results:
+        mark = "✅" if r["exit_code"] == 0 else "❌"
+        print(f"[profiles] {mark} {r['name']}: exit code {r['exit_code']} after {r['duration']}s")
+    # A profile killed by a signal reports a negative code; still count it as a failure
+    return max(abs(r["exit_code"]) for r in results)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Request Interception Profile for YouTube Agent
+Blocks or stubs resource classes the agent never looks at (video media,
+ads, fonts, analytics beacons, images) on a Playwright browser context,
+and counts the requests and bytes avoided per run.
+"""
+
+import os
+import re
+from dotenv import load_dotenv # type: ignore
+
+load_dotenv()
+
+# Resource classes blocked by default, e.g. "media,ads,font,beacon,image"
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "media,ads,font,beacon,image")
+KEEP_THUMBNAILS = os.getenv("KEEP_THUMBNAILS", "false").lower() == "true"
+
+# Resource classes answered with an empty 204 instead of being aborted,
+# so page scripts don't retry or log errors for them
+STUBBED_CLASSES = {"beacon"}
+
+AD_URL = re.compile(
+    r"doubleclick\.net|googlesyndication\.com|googleadservices\.com"
+    r"|/pagead/|/ptracking|/api/stats/ads|/get_midroll_"
+)
+BEACON_URL = re.compile(
+    r"/api/stats/|/youtubei/v1/log_event|/generate_204|/csi_204"
+    r"|google-analytics\.com|googletagmanager\.com|play\.google\.com/log"
+)
+VIDEO_MEDIA_URL = re.compile(r"googlevideo\.com/videoplayback")
+THUMBNAIL_URL = re.compile(r"i\d?\.ytimg\.com/(vi|vi_webp)/")
+
+# Blocked requests never get a response, so bytes avoided are estimated
+# from typical YouTube payload sizes per resource class
+ESTIMATED_BYTES = {
+    "media": 750_000,
+    "ads": 40_000,
+    "font": 60_000,
+    "beacon": 1_000,
+    "image": 25_000,
+}
+
+
+class ResourceBlocker:
+    """
+    Routing profile installed on a Playwright context with `install`
+    (sync API) or `install_async` (async API).
+
+    Args:
+        block: Resource classes to block (media, ads, font, beacon, image)
+        allow_patterns: Regexes for URLs that are always let through
+        keep_thumbnails: Let video thumbnails through even if images are blocked
+    """
+
+    def __init__(self, block=None, allow_patterns=(), keep_thumbnails: bool = False):
+        if block is None:
+            block = BLOCK_RESOURCES.split(",")
+        self.block = {c.strip().lower() for c in block if c.strip()}
+        self.allow = [re.compile(p) for p in allow_patterns]
+        if keep_thumbnails:
+            self.allow.append(THUMBNAIL_URL)
+
+        self.allowed_requests = 0
+        self.blocked = {c: 0 for c in self.block}
+
+    @classmethod
+    def from_env(cls, keep_thumbnails: bool = KEEP_THUMBNAILS) -> "ResourceBlocker":
+        return cls(keep_thumbnails=keep_thumbnails)
+
+    def classify(self, url: str, resource_type: str) -> str | None:
+        """
+        Return the blocked class a request falls in, or None to let it through.
+        """
+        if any(p.search(url) for p in self.allow):
+            return None
+
+        if AD_URL.search(url):
+            cls = "ads"
+        elif BEACON_URL.search(url) or resource_type == "ping":
+            cls = "beacon"
+        elif resource_type == "media" or VIDEO_MEDIA_URL.search(url):
+            cls = "media"
+        elif resource_type == "font":
+            cls = "font"
+        elif resource_type == "image":
+            cls = "image"
+        else:
+            return None
+
+        return cls if cls in self.block else None
+
+    def _decide(self, request) -> str | None:
+        cls = self.classify(request.url, request.resource_type)
+        if cls is None:
+            self.allowed_requests += 1
+        else:
+            self.blocked[cls] += 1
+        return cls
+
+    def _handle(self, route):
+        cls = self._decide(route.request)
+        if cls is None:
+            route.continue_()
+        elif cls in STUBBED_CLASSES:
+            route.fulfill(status=204, body="")
+        else:
+            route.abort()
+
+    async def _handle_async(self, route):
+        cls = self._decide(route.request)
+        if cls is None:
+            await route.continue_()
+        elif cls in STUBBED_CLASSES:
+            await route.fulfill(status=204, body="")
+        else:
+            await route.abort()
+
+    def install(self, context) -> "ResourceBlocker":
+        if self.block:
+            context.route("**/*", self._handle)
+        return self
+
+    async def install_async(self, context) -> "ResourceBlocker":
+        if self.block:
+            await context.route("**/*", self._handle_async)
+        return self
+
+    @property
+    def requests_avoided(self) -> int:
+        return sum(self.blocked.values())
+
+    @property
+    def bytes_avoided(self) -> int:
+        return sum(n * ESTIMATED_BYTES.get(c, 0) for c, n in self.blocked.items())
+
+    def summary(self) -> str:
+        per_class = ", ".join(f"{c}={n}" for c, n in sorted(self.blocked.items()) if n)
+        return (
+            f"blocked {self.requests_avoided} requests (~{self.bytes_avoided / 1_000_000:.1f} MB est), "
+            f"allowed {self.allowed_requests}"
+            + (f" [{per_class}]" if per_class else "")
+        )
@@ -4,29 +4,47 @@ save_state_from_chrome.py
 ------------------------------------------
 Loads your real Chrome profile, launches YouTube logged in,
 and saves Playwright storage state to storage_state.json.
+
+With BROWSER_CDP_URL set it attaches to a running browser_server.py
+(started with BROWSER_SERVER_PROFILE pointing at your Chrome profile and
+BROWSER_SERVER_HEADLESS=false) instead of launching Chrome itself.
 """
 
 from pathlib import Path
 from playwright.sync_api import sync_playwright # type: ignore
-import re, json, time, os
+import re, json, time, os, sys
 from dotenv import load_dotenv # type: ignore
 
+from browser_server import cdp_endpoint
+
 load_dotenv()
 
 
 # Path to your *actual* Chrome profile
-CHROME_PROFILE = os.path.abspath(os.getenv('PROFILE'))
+CHROME_PROFILE = os.getenv('PROFILE', '')
+# Attach to a running browser_server.py instead of launching Chrome
+BROWSER_CDP_URL = os.getenv("BROWSER_CDP_URL", "")
 
 # Output where Playwright will save cookies + localStorage/sessionStorage
 STATE_FILE = Path("storage_state.json")
 
 def main():
-    print("🚀 Launching Chrome with your real profile...")
-
     with sync_playwright() as p:
+        if BROWSER_CDP_URL:
+            save_from_browser_server(p)
+            return
+
+        if not CHROME_PROFILE:
+            # abspath('') would silently launch Chrome with the current directory as its profile
+            print("❌ PROFILE is not set: point it at your Chrome profile directory, "
+                  "or set BROWSER_CDP_URL to attach to browser_server.py", file=sys.stderr)
+            sys.exit(1)
+
+        print("🚀 Launching Chrome with your real profile...")
+        started = time.monotonic()
         # Launch persistent context using your Chrome profile
         context = p.chromium.launch_persistent_context(
-            CHROME_PROFILE,
+            os.path.abspath(CHROME_PROFILE),
             headless=False,
             args=[
                 "--disable-web-security",
@@ -37,6 +55,7 @@ def main():
             ],
         )
 
+        print(f"⏱️ Chrome launched in {time.monotonic() - started:.2f}s")
         page = context.new_page()
 
         print("🌐 Navigating to YouTube...")
@@ -56,5 +75,29 @@ def main():
         context.close()
 
 
+def save_from_browser_server(p):
+    """
+    Save the state of the browser server's default (profile) context.
+    """
+    print(f"🔌 Connecting to browser server at {BROWSER_CDP_URL}...")
+    started = time.monotonic()
+    browser = p.chromium.connect_over_cdp(cdp_endpoint(BROWSER_CDP_URL))
+    print(f"⏱️ Connected in {time.monotonic() - started:.2f}s")
+
+    # The default context carries the server's profile; never close it, the server owns it
+    context = browser.contexts[0] if browser.contexts else browser.new_context()
+    page = context.new_page()
+
+    print("🌐 Navigating to YouTube...")
+    page.goto("https://www.youtube.com", wait_until="domcontentloaded")
+    page.wait_for_load_state("networkidle")
+
+    print("💾 Saving cookies + local/session storage...")
+    context.storage_state(path=str(STATE_FILE))
+    print(f"✅ Saved Playwright state to: {STATE_FILE.resolve()}")
+
+    page.close()
+
+
 if __name__ == "__main__":
     main()
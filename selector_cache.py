@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Selector Resolution Cache for YouTube Agent
+Remembers which of several candidate selectors actually matched (and how
+long it took) so later runs try the winners first. Entries that keep
+missing expire and fall back to the default order.
+"""
+
+import os
+import json
+import time
+from dotenv import load_dotenv # type: ignore
+
+from telemetry import LOG_STREAM
+
+load_dotenv()
+
+SELECTOR_CACHE_PATH = os.getenv("SELECTOR_CACHE_PATH", "data/selector_cache.json")
+
+# Consecutive misses after which a learned selector is forgotten
+SELECTOR_MAX_MISSES = int(os.getenv("SELECTOR_MAX_MISSES", "3"))
+
+
+class SelectorCache:
+    """
+    On-disk record of selector outcomes, grouped by UI element.
+
+    Layout of the JSON file:
+        {group: {selector: {"hits": int, "misses": int,
+                            "latency_ms": float, "last_hit": float}}}
+    where "misses" counts consecutive misses since the last hit.
+    """
+
+    def __init__(self, path: str | None = SELECTOR_CACHE_PATH, max_misses: int = SELECTOR_MAX_MISSES):
+        self.path = os.path.abspath(path) if path else None
+        self.max_misses = max_misses
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str | None = SELECTOR_CACHE_PATH, **kwargs) -> "SelectorCache":
+        cache = cls(path, **kwargs)
+        if cache.path and os.path.exists(cache.path):
+            try:
+                with open(cache.path, "r", encoding="utf-8") as f:
+                    cache.entries = json.load(f)
+            except Exception as e:
+                print(f"[selector_cache] Ignoring unreadable cache {cache.path}: {e}", file=LOG_STREAM)
+        return cache
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"  # parallel profile runs share the file
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def ordered(self, group: str, candidates: list[str]) -> list[str]:
+        """
+        Return candidates with learned winners first (most hits, then lowest
+        latency); selectors without history keep their default order.
+        """
+        stats = self.entries.get(group, {})
+
+        def rank(item):
+            index, selector = item
+            entry = stats.get(selector)
+            if not entry:
+                return (1, 0, 0.0, index)
+            return (0, -entry["hits"], entry["latency_ms"], index)
+
+        return [sel for _, sel in sorted(enumerate(candidates), key=rank)]
+
+    def record_hit(self, group: str, selector: str, latency_ms: float):
+        entry = self.entries.setdefault(group, {}).setdefault(
+            selector, {"hits": 0, "misses": 0, "latency_ms": latency_ms, "last_hit": 0.0}
+        )
+        entry["hits"] += 1
+        entry["misses"] = 0
+        # Exponential moving average keeps one slow page from dominating
+        entry["latency_ms"] = round(0.7 * entry["latency_ms"] + 0.3 * latency_ms, 1)
+        entry["last_hit"] = time.time()
+        self.dirty = True
+
+    def record_miss(self, group: str, selector: str):
+        group_entries = self.entries.get(group, {})
+        entry = group_entries.get(selector)
+        if not entry:
+            return
+        entry["misses"] += 1
+        if entry["misses"] >= self.max_misses:
+            print(f"[selector_cache] Expiring {group} selector after {entry['misses']} misses: {selector}",
+                  file=LOG_STREAM)
+            del group_entries[selector]
+        self.dirty = True
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Run Telemetry for YouTube Agent
+Nested timing spans written as JSON lines, plus a Prometheus textfile
+(node_exporter textfile collector format) with counters and latency
+histograms accumulated across runs.
+
+    with span("scrape", mode="harvest") as attrs:
+        ...
+        attrs["cards"] = len(results)
+
+Files under TELEMETRY_DIR:
+    spans-YYYY-MM-DD.jsonl   one JSON object per finished span
+    youtube_agent.prom       Prometheus textfile, rewritten at exit
+    metrics_state.json       cumulative counters behind the textfile
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import threading
+import contextlib
+import contextvars
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from dotenv import load_dotenv # type: ignore
+
+load_dotenv()
+
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", "")  # empty disables telemetry
+
+# print() target for progress output (None is stdout). The MCP server sets
+# LOG_TO_STDERR because its stdio transport owns stdout.
+LOG_STREAM = sys.stderr if os.getenv("LOG_TO_STDERR", "false").lower() == "true" else None
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+METRIC_PREFIX = "youtube_agent"
+
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+
+
+def _labels_key(name: str, labels: dict) -> str:
+    return json.dumps([name, sorted((k, str(v)) for k, v in labels.items())])
+
+
+def _format_labels(labels, extra: str = "") -> str:
+    escaped = ((k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels)
+    parts = [f'{k}="{v}"' for k, v in escaped]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Telemetry:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self.run_id = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+
+        # In-memory deltas for this process, merged into metrics_state.json by flush()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    @classmethod
+    def from_env(cls) -> "Telemetry | None":
+        if not TELEMETRY_DIR:
+            return None
+        try:
+            telemetry = cls(TELEMETRY_DIR)
+        except OSError as e:
+            print(f"[telemetry] WARNING: Telemetry disabled, cannot use {TELEMETRY_DIR}: {e}", file=LOG_STREAM)
+            return None
+        atexit.register(telemetry.flush)
+        return telemetry
+
+    # ---------- spans ----------
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time the enclosed block as a span nested under the current one.
+        Yields `attrs`, so the block can attach results to the span.
+
+        The current span lives in a context variable: asyncio tasks and
+        asyncio.to_thread inherit it, plain threads only through propagate().
+        """
+        span_id = uuid.uuid4().hex[:16]
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        start = time.time()
+        started = time.monotonic()
+        status = "ok"
+        try:
+            yield attrs
+        except SystemExit as e:
+            if e.code not in (0, None):
+                status = "error"
+                attrs.setdefault("error", f"exit code {e.code}")
+            raise
+        except GeneratorExit:
+            # A generator span closed early by its consumer is not a failure
+            raise
+        except BaseException as e:
+            status = "error"
+            attrs.setdefault("error", repr(e)[:300])
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(name, time.monotonic() - started, status, span_id, parent_id, start, attrs)
+
+    def record(self, name: str, duration: float, status: str = "ok", **attrs):
+        """
+        Record an already-measured span (e.g. one card out of a batch read).
+        """
+        parent_id = _current_span.get()
+        start = time.time() - duration
+        self._finish(name, duration, status, uuid.uuid4().hex[:16], parent_id, start, attrs)
+
+    def _finish(self, name, duration, status, span_id, parent_id, start, attrs):
+        line = {
+            "run_id": self.run_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": datetime.fromtimestamp(start).isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 2),
+            "status": status,
+            "attrs": attrs,
+        }
+        path = os.path.join(self.directory, f"spans-{datetime.now():%Y-%m-%d}.jsonl")
+        text = json.dumps(line, default=str, ensure_ascii=False) + "\n"
+        with self.lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+
+        self.count(f"{METRIC_PREFIX}_spans_total", span=name, status=status)
+        self.observe(f"{METRIC_PREFIX}_span_duration_seconds", duration, span=name)
+        if parent_id is None:
+            self.gauge(f"{METRIC_PREFIX}_last_run_timestamp_seconds", time.time(), span=name)
+            self.gauge(f"{METRIC_PREFIX}_last_run_duration_seconds", duration, span=name)
+            self.gauge(f"{METRIC_PREFIX}_last_run_success", 1 if status == "ok" else 0, span=name)
+
+    # ---------- metrics ----------
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _labels_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels_key(name, labels)
+        with self.lock:
+            hist = self.histograms.setdefault(key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += seconds
+            hist["count"] += 1
+
+    def gauge(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[_labels_key(name, labels)] = value
+
+    def flush(self):
+        """
+        Merge this process's metrics into metrics_state.json and rewrite
+        the Prometheus textfile. Safe to call more than once.
+        """
+        state_path = os.path.join(self.directory, "metrics_state.json")
+        with self.lock, self._file_lock(state_path + ".lock"):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            counters = state.get("counters", {})
+            histograms = state.get("histograms", {})
+            gauges = state.get("gauges", {})
+
+            for key, value in self.counters.items():
+                counters[key] = counters.get(key, 0) + value
+            for key, hist in self.histograms.items():
+                total = histograms.get(key)
+                if not total or len(total["buckets"]) != len(LATENCY_BUCKETS):
+                    histograms[key] = hist
+                    continue
+                total["buckets"] = [a + b for a, b in zip(total["buckets"], hist["buckets"])]
+                total["sum"] += hist["sum"]
+                total["count"] += hist["count"]
+            gauges.update(self.gauges)
+            self.counters, self.histograms, self.gauges = {}, {}, {}
+
+            state = {"counters": counters, "histograms": histograms, "gauges": gauges}
+            tmp = f"{state_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, state_path)
+
+            prom_path = os.path.join(self.directory, f"{METRIC_PREFIX}.prom")
+            tmp = f"{prom_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(render_prometheus(state))
+            os.replace(tmp, prom_path)
+
+    @contextlib.contextmanager
+    def _file_lock(self, path: str):
+        """
+        Serialize the read-merge-write in flush() across processes sharing
+        TELEMETRY_DIR (parallel profile runs).
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def render_prometheus(state: dict) -> str:
+    """
+    Render accumulated metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for kind, series in (("counter", state.get("counters", {})), ("gauge", state.get("gauges", {}))):
+        for key in sorted(series):
+            name, labels = json.loads(key)
+            declare(name, kind)
+            lines.append(f"{name}{_format_labels(labels)} {series[key]}")
+
+    histograms = state.get("histograms", {})
+    for key in sorted(histograms):
+        name, labels = json.loads(key)
+        hist = histograms[key]
+        declare(name, "histogram")
+        for bound, n in zip(LATENCY_BUCKETS, hist["buckets"]):
+            le = 'le="%g"' % bound
+            lines.append(f"{name}_bucket{_format_labels(labels, le)} {n}")
+        le = 'le="+Inf"'
+        lines.append(f"{name}_bucket{_format_labels(labels, le)} {hist['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+TELEMETRY = Telemetry.from_env()
+
+
+# ---------- module-level helpers (no-ops when telemetry is disabled) ----------
+
+def span(name: str, **attrs):
+    if TELEMETRY is None:
+        return contextlib.nullcontext(attrs)
+    return TELEMETRY.span(name, **attrs)
+
+
+def record_span(name: str, duration: float, status: str = "ok", **attrs):
+    if TELEMETRY is not None:
+        TELEMETRY.record(name, duration, status, **attrs)
+
+
+def propagate(fn):
+    """
+    Wrap `fn` to run in a copy of the caller's context, so spans it opens on
+    a thread (threading.Thread, ThreadPoolExecutor) nest under the caller's
+    current span. Each call gets its own copy, so the wrapper can run on
+    several threads at once.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def count(name: str, value: float = 1, **labels):
+    if TELEMETRY is not None:
+        TELEMETRY.count(f"{METRIC_PREFIX}_{name}", value, **labels)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Persistent Video Index for YouTube Agent
+SQLite table keyed by video id recording when each video was seen,
+selected, added to Watch Later or failed, so later runs can skip videos
+that were already handled.
+"""
+
+import os
+import time
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set
+
+# Re-exported: callers import the id helpers from here
+from video_record import video_id_from_url, canonical_url
+
+# Statuses that mean "don't offer this video again"
+HANDLED_STATUSES = ("selected", "added")
+
+# A video that failed this many times is treated as handled as well
+MAX_FAILURES = int(os.getenv("INDEX_MAX_FAILURES", "3"))
+
+# SQLite's default limit on bound parameters is 999 on older builds
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id    TEXT PRIMARY KEY,
+    url         TEXT,
+    title       TEXT,
+    channel     TEXT,
+    status      TEXT NOT NULL DEFAULT 'seen',
+    first_seen  REAL,
+    last_seen   REAL,
+    selected_at REAL,
+    added_at    REAL,
+    failed_at   REAL,
+    fail_count  INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status);
+"""
+
+
+def video_id_of(video) -> Optional[str]:
+    """
+    Canonical id of a JSON record or Video.
+    """
+    return video.get("video_id") or video_id_from_url(video.get("url"))
+
+
+class VideoIndex:
+    """
+    On-disk index of every video the agent has seen.
+
+    All lookups go through the primary key, so they stay cheap as the
+    table grows to hundreds of thousands of rows.
+    """
+
+    def __init__(self, path: str):
+        path = str(path)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- writes ----------
+
+    def record_seen(self, videos: Iterable[Dict]) -> int:
+        """
+        Upsert scraped videos; existing rows keep their status.
+
+        Returns the number of videos with a usable id.
+        """
+        now = time.time()
+        rows = [
+            (vid, canonical_url(v.get("url")), v.get("title"), v.get("channel"), now, now)
+            for v in videos
+            if (vid := video_id_of(v))
+        ]
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO videos (video_id, url, title, channel, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    last_seen = excluded.last_seen,
+                    url = excluded.url,
+                    title = COALESCE(excluded.title, videos.title),
+                    channel = COALESCE(excluded.channel, videos.channel)
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def mark_selected(self, video_ids: Iterable[str]):
+        self._set_status(video_ids, "selected", "selected_at")
+
+    def mark_added(self, video_ids: Iterable[str]):
+        self._set_status(video_ids, "added", "added_at")
+
+    def mark_failed(self, video_ids: Iterable[str]):
+        self._set_status(video_ids, "failed", "failed_at", count_failure=True)
+
+    def _set_status(self, video_ids, status: str, column: str, count_failure: bool = False):
+        now = time.time()
+        extra = ", fail_count = fail_count + 1" if count_failure else ""
+        with self.conn:
+            for vid in video_ids:
+                if not vid:
+                    continue
+                # Insert first so ids the scraper never recorded still get tracked
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO videos (video_id, first_seen, last_seen) VALUES (?, ?, ?)",
+                    (vid, now, now),
+                )
+                self.conn.execute(
+                    f"UPDATE videos SET status = ?, {column} = ?{extra} WHERE video_id = ?",
+                    (status, now, vid),
+                )
+
+    # ---------- reads ----------
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        cursor = self.conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], row))
+
+    def handled_ids(self, video_ids: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of ids that were already selected, added, or
+        failed MAX_FAILURES times. Batched primary-key lookups.
+        """
+        ids = list({vid for vid in video_ids if vid})
+        handled = set()
+        placeholders_status = ",".join("?" * len(HANDLED_STATUSES))
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            chunk = ids[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"""
+                SELECT video_id FROM videos
+                WHERE video_id IN ({placeholders})
+                  AND (status IN ({placeholders_status}) OR fail_count >= ?)
+                """,
+                (*chunk, *HANDLED_STATUSES, MAX_FAILURES),
+            )
+            handled.update(row[0] for row in cursor)
+        return handled
+
+    def filter_unhandled(self, videos: List[Dict]) -> List[Dict]:
+        """
+        Drop videos that were already handled in a previous run.
+        """
+        handled = self.handled_ids(video_id_of(v) for v in videos)
+        return [v for v in videos if video_id_of(v) not in handled]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM videos GROUP BY status"))
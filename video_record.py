@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Video Records for YouTube Agent
+A compact Video record keyed by canonical video id, and an id-indexed
+collection of them.
+
+Feed URLs carry tracking parameters (&pp=, &t=, youtu.be short links), so
+the same video can show up under several URLs. Every URL is reduced to
+<origin>/watch?v=<id> and records are deduplicated by id, which also makes
+lookups by URL a dict access instead of a scan:
+
+    videos = VideoCollection.from_dicts(scraped)
+    video = videos.get("https://www.youtube.com/watch?v=abc&pp=xyz")
+"""
+
+import re
+from urllib.parse import urlsplit, parse_qs
+from typing import Dict, Iterable, List, Optional
+
+# Where youtu.be short links point
+DEFAULT_ORIGIN = "https://www.youtube.com"
+
+# Optional fields (set by the ytInitialData parser), omitted from to_dict when unset
+EXTRA_FIELDS = ("duration", "views", "published")
+
+# Fast path for the common absolute watch URL: origin and a leading v= parameter
+WATCH_URL = re.compile(r"^(https?://[^/?#]+)/watch\?v=([\w-]+)(?:[&#]|$)")
+
+
+def _parse(url: Optional[str]) -> tuple:
+    """
+    (video id, origin of its canonical URL), or (None, None).
+    """
+    if not url:
+        return None, None
+    match = WATCH_URL.match(url)
+    if match and not match.group(1).endswith("youtu.be"):
+        return match.group(2), match.group(1)
+
+    parsed = urlsplit(url)
+    if parsed.netloc.endswith("youtu.be"):
+        return parsed.path.lstrip("/") or None, DEFAULT_ORIGIN
+    origin = f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else DEFAULT_ORIGIN
+    if parsed.path == "/watch":
+        return parse_qs(parsed.query).get("v", [None])[0], origin
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live"):
+        return parts[1], origin
+    return None, None
+
+
+def video_id_from_url(url: Optional[str]) -> Optional[str]:
+    """
+    Extract the video id from watch, youtu.be and Shorts URLs.
+    """
+    return _parse(url)[0]
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """
+    <origin>/watch?v=<id> for any video URL; other URLs are returned as is.
+    """
+    video_id, origin = _parse(url)
+    if not video_id:
+        return url
+    return f"{origin}/watch?v={video_id}"
+
+
+class Video:
+    """
+    One feed video. Uses __slots__ instead of a per-instance dict. get()
+    works like dict.get (unset fields return the default), so code written
+    against the JSON records keeps working.
+    """
+
+    __slots__ = ("video_id", "url", "title", "channel", "thumbnail") + EXTRA_FIELDS
+
+    def __init__(
+        self,
+        video_id: str,
+        url: str,
+        title: Optional[str] = None,
+        channel: Optional[str] = None,
+        thumbnail: Optional[str] = None,
+        duration: Optional[str] = None,
+        views: Optional[str] = None,
+        published: Optional[str] = None,
+    ):
+        self.video_id = video_id
+        self.url = url
+        self.title = title
+        self.channel = channel
+        self.thumbnail = thumbnail
+        self.duration = duration
+        self.views = views
+        self.published = published
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> Optional["Video"]:
+        """
+        Build a Video from a JSON record. Returns None if the record has no
+        video id (neither a video_id field nor a video URL).
+        """
+        url_id, origin = _parse(record.get("url"))
+        video_id = record.get("video_id") or url_id
+        if not video_id:
+            return None
+        return cls(
+            video_id,
+            f"{origin or DEFAULT_ORIGIN}/watch?v={video_id}",
+            record.get("title"),
+            record.get("channel"),
+            record.get("thumbnail"),
+            *(record.get(name) for name in EXTRA_FIELDS),
+        )
+
+    def to_dict(self) -> Dict:
+        record = {
+            "title": self.title,
+            "url": self.url,
+            "thumbnail": self.thumbnail,
+            "channel": self.channel,
+            "video_id": self.video_id,
+        }
+        for name in EXTRA_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                record[name] = value
+        return record
+
+    def get(self, key: str, default=None):
+        if key not in self.__slots__:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def merge(self, other: "Video"):
+        """
+        Fill fields this record is missing from another record of the same video.
+        """
+        for name in self.__slots__:
+            if getattr(self, name) is None:
+                setattr(self, name, getattr(other, name))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Video):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Video({self.video_id!r}, title={self.title!r})"
+
+
+class VideoCollection:
+    """
+    Videos in feed order, indexed by video id. Adding a video that is
+    already present merges its fields into the first record and counts a
+    duplicate.
+    """
+
+    def __init__(self, videos: Iterable = ()):
+        self._by_id: Dict[str, Video] = {}
+        self.duplicates = 0
+        for video in videos:
+            self.add(video)
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict]) -> "VideoCollection":
+        return cls(records)
+
+    def add(self, video) -> Optional[Video]:
+        """
+        Add a Video or JSON record.
+
+        Returns:
+            The stored Video if it is new; None for duplicates and records
+            without a video id
+        """
+        if not isinstance(video, Video):
+            video = Video.from_dict(video)
+            if video is None:
+                return None
+        existing = self._by_id.get(video.video_id)
+        if existing is not None:
+            existing.merge(video)
+            self.duplicates += 1
+            return None
+        self._by_id[video.video_id] = video
+        return video
+
+    def get(self, key: Optional[str]) -> Optional[Video]:
+        """
+        Look up a video by id or by any of its URLs.
+        """
+        if not key:
+            return None
+        video = self._by_id.get(key)
+        if video is None:
+            video = self._by_id.get(video_id_from_url(key))
+        return video
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def to_dicts(self) -> List[Dict]:
+        return [video.to_dict() for video in self._by_id.values()]
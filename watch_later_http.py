@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Browserless Watch Later backend for YouTube Agent
+Adds videos with the same authenticated InnerTube call the Save menu makes
+(youtubei/v1/browse/edit_playlist on playlist "WL"), using the cookies in
+storage_state.json. Several videos go into one request, over a pooled
+keep-alive session.
+
+    client = WatchLaterClient.from_state("storage_state.json")
+    results = client.add_many(urls)   # same result dicts as add_to_watch_later
+
+youtube_actions uses it when WATCH_LATER_BACKEND=http and falls back to the
+Playwright flow for anything that fails.
+"""
+
+import os
+import json
+import time
+import hashlib
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv # type: ignore
+
+from telemetry import LOG_STREAM
+from video_index import video_id_from_url
+
+load_dotenv()
+
+# Overridable so benchmarks can point the client at a local fixture server
+YOUTUBE_URL = os.getenv("YOUTUBE_URL", "https://www.youtube.com/")
+YOUTUBE_ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(YOUTUBE_URL))
+WATCH_LATER_HTTP_BATCH = int(os.getenv("WATCH_LATER_HTTP_BATCH", "25"))  # videos per edit_playlist call
+WATCH_LATER_HTTP_TIMEOUT = float(os.getenv("WATCH_LATER_HTTP_TIMEOUT", "10"))
+# Web client version sent in the InnerTube context; any recent value works
+YOUTUBE_CLIENT_VERSION = os.getenv("YOUTUBE_CLIENT_VERSION", "2.20250101.00.00")
+
+WATCH_LATER_PLAYLIST = "WL"
+# Cookies that carry the SAPISID value used for the Authorization hash
+SAPISID_COOKIES = ("SAPISID", "__Secure-3PAPISID")
+
+
+class AuthError(Exception):
+    """storage_state.json has no usable YouTube session."""
+
+
+def load_cookies(state_file: str, host: str) -> list[dict]:
+    """
+    Return the storage_state cookies that apply to `host`.
+    """
+    with open(state_file, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    cookies = []
+    for cookie in state.get("cookies", []):
+        domain = cookie.get("domain", "").lstrip(".")
+        if host == domain or host.endswith("." + domain):
+            cookies.append(cookie)
+    return cookies
+
+
+def sapisid_hash(sapisid: str, origin: str, now: int | None = None) -> str:
+    """
+    Authorization header value for cookie-authenticated InnerTube calls.
+    """
+    ts = int(now if now is not None else time.time())
+    digest = hashlib.sha1(f"{ts} {sapisid} {origin}".encode("utf-8")).hexdigest()
+    return f"SAPISIDHASH {ts}_{digest}"
+
+
+class WatchLaterClient:
+    def __init__(
+        self,
+        cookies: list[dict],
+        origin: str = YOUTUBE_ORIGIN,
+        batch_size: int = WATCH_LATER_HTTP_BATCH,
+        timeout: float = WATCH_LATER_HTTP_TIMEOUT,
+    ):
+        self.origin = origin
+        self.batch_size = max(batch_size, 1)
+        self.timeout = timeout
+
+        by_name = {c["name"]: c["value"] for c in cookies}
+        self.sapisid = next((by_name[name] for name in SAPISID_COOKIES if name in by_name), None)
+        if not self.sapisid:
+            raise AuthError("No SAPISID cookie in storage state; re-run save_state_from_chrome.py")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        for c in cookies:
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+
+        self.requests = 0
+
+    @classmethod
+    def from_state(cls, state_file: str, origin: str = YOUTUBE_ORIGIN, **kwargs) -> "WatchLaterClient":
+        return cls(load_cookies(state_file, urlsplit(origin).hostname or ""), origin, **kwargs)
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": sapisid_hash(self.sapisid, self.origin),
+            "Origin": self.origin,
+            "X-Origin": self.origin,
+            "X-Goog-AuthUser": "0",
+            "Content-Type": "application/json",
+        }
+
+    def add_many(self, video_urls) -> list[dict]:
+        """
+        Add videos to Watch Later, `batch_size` per request.
+
+        Returns:
+            List of result dicts (success, url, message), in input order
+        """
+        video_urls = list(video_urls)
+        results = {}
+        batch = []
+        for url in video_urls:
+            video_id = video_id_from_url(url)
+            if not video_id:
+                results[url] = {"success": False, "url": url, "message": "Error: not a video URL"}
+                continue
+            batch.append((url, video_id))
+            if len(batch) == self.batch_size:
+                results.update(self._add_batch(batch))
+                batch = []
+        if batch:
+            results.update(self._add_batch(batch))
+        return [dict(results[url]) for url in video_urls]
+
+    def _add_batch(self, batch: list[tuple]) -> dict:
+        ok, message = self._edit_playlist([video_id for _, video_id in batch])
+        if ok:
+            print(f"[watch_later_http] ✅ Added {len(batch)} videos to Watch Later in one request", file=LOG_STREAM)
+            message = "Successfully added to Watch Later"
+        else:
+            print(f"[watch_later_http] ERROR: {message}", file=LOG_STREAM)
+        return {url: {"success": ok, "url": url, "message": message} for url, _ in batch}
+
+    def _edit_playlist(self, video_ids: list[str]) -> tuple[bool, str]:
+        payload = {
+            "context": {"client": {"clientName": "WEB", "clientVersion": YOUTUBE_CLIENT_VERSION, "hl": "en"}},
+            "playlistId": WATCH_LATER_PLAYLIST,
+            "actions": [{"action": "ACTION_ADD_VIDEO", "addedVideoId": video_id} for video_id in video_ids],
+        }
+        self.requests += 1
+        try:
+            r = self.session.post(
+                f"{self.origin}/youtubei/v1/browse/edit_playlist",
+                params={"prettyPrint": "false"},
+                json=payload,
+                headers=self._headers(),
+                timeout=self.timeout,
+            )
+            data = r.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return False, f"Error: {str(e)}"
+
+        if r.ok and data.get("status") == "STATUS_SUCCEEDED":
+            return True, ""
+        error = data.get("error", {})
+        return False, f"Error: edit_playlist HTTP {r.status_code} {error.get('status') or data.get('status', '')}".strip()
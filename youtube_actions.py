@@ -1,24 +1,346 @@
 #!/usr/bin/env python3
 from playwright.sync_api import sync_playwright # type: ignore
+from playwright.async_api import async_playwright # type: ignore
 import asyncio
-import re, json, time, os
+import re, json, time, os, itertools, contextlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv # type: ignore
 
+from resource_blocking import ResourceBlocker
+from selector_cache import SelectorCache
+from telemetry import span, record_span, count, propagate, LOG_STREAM
+from browser_server import cdp_endpoint
+from yt_initial_data import parse_initial_data_html
+from feed_store import open_run
+from video_record import Video, VideoCollection, canonical_url
+
 load_dotenv()
 
 STATE_FILE = os.path.abspath(os.getenv('STATE_FILE'))
-YOUTUBE_URL = "https://www.youtube.com/"
+# Overridable so benchmarks can point the scraper at a local fixture server
+YOUTUBE_URL = os.getenv("YOUTUBE_URL", "https://www.youtube.com/")
+YOUTUBE_ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(YOUTUBE_URL))
+# Connect to an already running Chromium (browser_server.py, e.g. http://127.0.0.1:9222)
+# instead of launching one; parallel profile runs share a single browser this way
+BROWSER_CDP_URL = os.getenv("BROWSER_CDP_URL", "")
+
+# "initial_data" parses the feed JSON embedded in the homepage HTML (no rendering),
+# "harvest" scrolls the feed and extracts lazily loaded cards as they appear,
+# "bulk" reads every rendered card in one page.evaluate call,
+# "dom" walks the cards one locator at a time (slow, but hydrates thumbnails).
+SCRAPE_MODE = os.getenv("SCRAPE_MODE", "harvest").lower()
+
+# Harvest stop conditions and scroll step size
+SCRAPE_TARGET_COUNT = int(os.getenv("SCRAPE_TARGET_COUNT", "60"))
+SCRAPE_TIME_BUDGET = float(os.getenv("SCRAPE_TIME_BUDGET", "30"))  # seconds
+SCRAPE_SCROLL_STEP = int(os.getenv("SCRAPE_SCROLL_STEP", "2400"))  # pixels
+# Also print the scraped cards to stdout as one JSON document
+SCRAPE_PRINT_JSON = os.getenv("SCRAPE_PRINT_JSON", "false").lower() == "true"
+
+CARD_SELECTOR = "ytd-rich-item-renderer"
+
+# Watch Later tabs run at once by add_many_to_watch_later_async,
+# and the per-video time limit (seconds) for each of them
+WATCH_LATER_CONCURRENCY = int(os.getenv("WATCH_LATER_CONCURRENCY", "3"))
+WATCH_LATER_TASK_TIMEOUT = float(os.getenv("WATCH_LATER_TASK_TIMEOUT", "60"))
+
+# "browser" clicks Save -> Watch later on each watch page; "http" sends the same
+# playlist edit directly with the storage_state cookies (watch_later_http.py),
+# batched and without a browser, falling back to the browser for failures
+WATCH_LATER_BACKEND = os.getenv("WATCH_LATER_BACKEND", "browser").lower()
+WATCH_LATER_HTTP_FALLBACK = os.getenv("WATCH_LATER_HTTP_FALLBACK", "true").lower() == "true"
+
+# YouTube has multiple possible button selectors, tried in order
+SAVE_BUTTON_SELECTORS = [
+    "button[aria-label*='Save']",
+    "button[aria-label*='save']",
+    "ytd-button-renderer:has-text('Save')",
+    "#button-shape-like + button",  # Often next to like button
+]
+
+WATCH_LATER_SELECTORS = [
+    "text='Watch later'",
+    "text='Watch Later'",
+    "ytd-playlist-add-to-option-renderer:has-text('Watch later')",
+    "[aria-label*='Watch later']",
+]
+
+# Browser round trips the per-card path spends on each card:
+# scroll, 2 waits, mouse wheel + title, href, thumbnail, channel reads.
+DOM_CALLS_PER_CARD = 8
+
+# Reads the same fields scrape_video reads from a single card element.
+READ_CARD_JS = """(card) => {
+    const link = card.querySelector("h3 a");
+    const img = card.querySelector("yt-thumbnail-view-model img");
+    const channel = card.querySelector("yt-content-metadata-view-model a");
+    return {
+        title: link ? link.innerText.trim() : null,
+        url: link ? link.getAttribute("href") : null,
+        thumbnail: img ? img.getAttribute("src") : null,
+        channel: channel ? channel.innerText.trim() : null,
+    };
+}"""
+
+# Pulls every rendered card in a single IPC call.
+BULK_EXTRACT_JS = (
+    "(selector) => Array.from(document.querySelectorAll(selector), "
+    + READ_CARD_JS + ")"
+)
+
+# Scrolls one step, waits until the feed mutates (new cards or hydrated links)
+# or idleMs passes without change, then returns the cards from `offset` on.
+HARVEST_STEP_JS = """async ({selector, offset, step, idleMs}) => {
+    if (step > 0) {
+        await new Promise((resolve) => {
+            const observer = new MutationObserver((mutations) => {
+                const relevant = mutations.some((m) =>
+                    m.type === "attributes" ||
+                    Array.from(m.addedNodes).some((n) =>
+                        n.nodeType === 1 && (n.matches(selector) || n.querySelector(selector))));
+                if (relevant) finish();
+            });
+            const timer = setTimeout(finish, idleMs);
+            function finish() {
+                clearTimeout(timer);
+                observer.disconnect();
+                resolve();
+            }
+            observer.observe(document.body, {
+                childList: true, subtree: true, attributes: true, attributeFilter: ["href"],
+            });
+            window.scrollBy(0, step);
+        });
+    }
+    return Array.from(document.querySelectorAll(selector)).slice(offset).map(""" + READ_CARD_JS + """);
+}"""
+
+
+def _launch_browser(p):
+    """
+    Connect to the shared Chromium at BROWSER_CDP_URL (see browser_server.py),
+    falling back to launching one. Closing a connected browser only closes
+    the contexts opened through it.
+    """
+    if BROWSER_CDP_URL:
+        started = time.monotonic()
+        try:
+            browser = p.chromium.connect_over_cdp(cdp_endpoint(BROWSER_CDP_URL))
+            _note_browser_start("connect", started)
+            return browser
+        except Exception as e:
+            print(f"[browser] WARNING: Could not connect to {BROWSER_CDP_URL}, launching Chromium: {e}",
+                  file=LOG_STREAM)
+    started = time.monotonic()
+    browser = p.chromium.launch(headless=True)
+    _note_browser_start("launch", started)
+    return browser
+
+
+async def _launch_browser_async(p):
+    if BROWSER_CDP_URL:
+        started = time.monotonic()
+        try:
+            browser = await p.chromium.connect_over_cdp(cdp_endpoint(BROWSER_CDP_URL))
+            _note_browser_start("connect", started)
+            return browser
+        except Exception as e:
+            print(f"[browser] WARNING: Could not connect to {BROWSER_CDP_URL}, launching Chromium: {e}",
+                  file=LOG_STREAM)
+    started = time.monotonic()
+    browser = await p.chromium.launch(headless=True)
+    _note_browser_start("launch", started)
+    return browser
+
+
+def _note_browser_start(how: str, started: float):
+    """
+    Record launch vs connect time as browser.launch / browser.connect spans.
+    """
+    duration = time.monotonic() - started
+    record_span(f"browser.{how}", duration)
+    count("browser_starts_total", how=how)
+    print(f"[browser] Chromium {'connected' if how == 'connect' else 'launched'} in {duration:.2f}s", file=LOG_STREAM)
+
+
+@contextlib.contextmanager
+def _sync_context():
+    """
+    Yield an authenticated browser context from a Chromium launched (or
+    connected to via BROWSER_CDP_URL, e.g. the daemon's warm browser) just
+    for the block.
+    """
+    with sync_playwright() as p:
+        browser = _launch_browser(p)
+        try:
+            yield browser.new_context(storage_state=STATE_FILE)
+        finally:
+            browser.close()
+
+
+def normalize_card(card: dict) -> dict | None:
+    """
+    Normalize a raw card record and drop YouTube Shorts.
+
+    Returns None for Shorts, otherwise a {title, url, thumbnail, channel} dict
+    with relative URLs made absolute and tracking parameters removed.
+    """
+    url = card.get("url")
 
-def scrape_youtube(output_path: str | None = "data/scraped.json"):
+    # Normalize
+    if url and url.startswith("/"):
+        url = YOUTUBE_ORIGIN + url
+
+    # --- Skip YouTube Shorts ---
+    if url and "/shorts/" in url:
+        return None
+    url = canonical_url(url)
+
+    return {
+        "title": card.get("title"),
+        "url": url,
+        "thumbnail": card.get("thumbnail"),
+        "channel": card.get("channel")
+    }
+
+
+def extract_cards_bulk(page) -> list[dict]:
+    """
+    Extract every rendered video card with one page.evaluate round trip.
+
+    Returns normalized card dicts (Shorts removed) in DOM order.
+    """
+    raw_cards = page.evaluate(BULK_EXTRACT_JS, CARD_SELECTOR)
+    results = []
+    for raw in raw_cards:
+        card = normalize_card(raw)
+        if card:
+            results.append(card)
+    return results
+
+
+def harvest_cards(
+    page,
+    target_count: int = SCRAPE_TARGET_COUNT,
+    time_budget: float = SCRAPE_TIME_BUDGET,
+    scroll_step: int = SCRAPE_SCROLL_STEP,
+    idle_ms: int = 1500,
+    max_idle_steps: int = 3,
+    max_unhydrated_steps: int = 3,
+    stats: dict | None = None,
+):
+    """
+    Scroll the feed in large steps and yield cards as they hydrate.
+
+    Each step is a single page.evaluate call that scrolls, waits for the feed to
+    mutate (or idle_ms to pass) and reads back every card not yet finalized.
+    Cards whose link has not hydrated yet are re-read on the next step; one
+    that is still empty after max_unhydrated_steps reads is skipped, so it
+    does not pin every later card into being re-read on each step.
+
+    Args:
+        page: Playwright page already on the YouTube homepage
+        target_count: Stop once this many cards have been yielded
+        time_budget: Stop after this many seconds
+        scroll_step: Pixels scrolled per step
+        idle_ms: Max wait per step for the DOM to change
+        max_idle_steps: Stop after this many steps that add nothing new
+        max_unhydrated_steps: Skip a card after this many reads without a link
+        stats: Optional dict filled with steps, cards, skipped, stop_reason
+
+    Yields:
+        Normalized card dicts (Shorts removed), in feed order per step.
+    """
+    deadline = time.monotonic() + time_budget
+    offset = 0          # index of the first card not yet finalized
+    seen_urls = set()
+    unhydrated = {}     # card index -> reads that found it without a link
+    skipped = 0
+    yielded = 0
+    steps = 0
+    idle_steps = 0
+    stop_reason = "exhausted"
+
+    step = 0  # first read is of the already-rendered feed
+    last_card_at = time.monotonic()
+    while True:
+        raw_cards = page.evaluate(HARVEST_STEP_JS, {
+            "selector": CARD_SELECTOR,
+            "offset": offset,
+            "step": step,
+            "idleMs": idle_ms,
+        })
+        steps += 1
+        step = scroll_step
+
+        new_this_step = 0
+        leading_final = True
+        base = offset
+        for i, raw in enumerate(raw_cards):
+            url, title = raw.get("url"), raw.get("title")
+            if not url or not title:
+                misses = unhydrated[base + i] = unhydrated.get(base + i, 0) + 1
+                if leading_final and misses >= max_unhydrated_steps:
+                    # Never hydrated (ad slot, removed video, ...): finalize it as skipped
+                    del unhydrated[base + i]
+                    offset += 1
+                    skipped += 1
+                    continue
+                # Not hydrated yet: keep the offset here so it is re-read
+                leading_final = False
+                continue
+
+            if leading_final:
+                unhydrated.pop(base + i, None)
+                offset += 1
+
+            card = normalize_card(raw)
+            if not card or card["url"] in seen_urls:
+                continue
+
+            seen_urls.add(card["url"])
+            yielded += 1
+            new_this_step += 1
+            # Time since the previous card: scroll, hydration and read, amortized
+            now = time.monotonic()
+            record_span("scrape.card", now - last_card_at, mode="harvest", step=steps, url=card["url"])
+            last_card_at = now
+            yield card
+            last_card_at = time.monotonic()  # don't bill the consumer's time to the next card
+
+            if yielded >= target_count:
+                break
+
+        if yielded >= target_count:
+            stop_reason = "target_count"
+            break
+        if time.monotonic() >= deadline:
+            stop_reason = "time_budget"
+            break
+
+        idle_steps = idle_steps + 1 if new_this_step == 0 else 0
+        if idle_steps >= max_idle_steps:
+            stop_reason = "exhausted"
+            break
+
+    if stats is not None:
+        stats.update({"steps": steps, "cards": yielded, "skipped": skipped, "stop_reason": stop_reason})
+
+
+def scrape_youtube(
+    output_path: str | None = "data/scraped.jsonl",
+    mode: str = SCRAPE_MODE,
+    target_count: int = SCRAPE_TARGET_COUNT,
+    time_budget: float = SCRAPE_TIME_BUDGET,
+):
     def find_video_cards(page):
         """
         YouTube uses multiple DOM layouts.
         We merge all possible video containers into one locator.
         """
-        selector = "ytd-rich-item-renderer"
-
-        return page.locator(selector)
+        return page.locator(CARD_SELECTOR)
     
     def scrape_video(item):
         def safe_text(locator, nth=None):
@@ -44,82 +366,185 @@ def scrape_youtube(output_path: str | None = "data/scraped.json"):
         # ---------- URL ----------
         url = safe_attr("h3 a", "href")
 
-        # Normalize
-        if url and url.startswith("/"):
-            url = "https://www.youtube.com" + url
-
-        # --- Skip YouTube Shorts ---
+        # --- Skip YouTube Shorts before reading the remaining fields ---
         if url and "/shorts/" in url:
             return None    # skip this card entirely
 
-
         # ---------- THUMBNAIL ----------
         thumbnail = safe_attr("yt-thumbnail-view-model img", "src")
 
         # ---------- CHANNEL, VIEWS, TIME AGO ----------
         channel = safe_text("yt-content-metadata-view-model a")
 
-        return {
+        return normalize_card({
             "title": title,
             "url": url,
             "thumbnail": thumbnail,
             "channel": channel
-        }
+        })
     
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(storage_state=STATE_FILE)
-        page = context.new_page()
+    results = []
+    seen = VideoCollection()
 
-        page.goto(YOUTUBE_URL)
+    # Each card is appended to this run's history file as soon as it is scraped
+    with span("scrape", mode=mode) as scrape_attrs, contextlib.ExitStack() as stack:
+        context = stack.enter_context(_sync_context())
+        writer = stack.enter_context(open_run(output_path)) if output_path else None
 
+        def emit(card):
+            # One record per video id; a card without one is kept as scraped
+            video = Video.from_dict(card)
+            if video is not None:
+                if seen.add(video) is None:
+                    return
+                card = video.to_dict()
+            results.append(card)
+            if writer:
+                writer.write(card)
 
-        cards = find_video_cards(page)
-        count = cards.count()
+        blocker = ResourceBlocker.from_env().install(context)
 
-        results = []
-        for i in range(count):
-            try:
-                item = cards.nth(i)
+        if mode == "initial_data":
+            # Fetch only the document through the context's cookie jar; nothing is rendered
+            response = context.request.get(YOUTUBE_URL)
+            for card in parse_initial_data_html(response.text())[:target_count]:
+                emit(card)
+            print(f"[scrape_youtube] initial_data mode: {len(results)} videos from ytInitialData "
+                  f"({len(response.body()) // 1024} KB document, no page render)", file=LOG_STREAM)
+            if not results:
+                print("[WARN] ytInitialData missing or empty; try SCRAPE_MODE=harvest", file=LOG_STREAM)
+        else:
+            page = context.new_page()
+            page.goto(YOUTUBE_URL)
 
-                # --- Ensure the card is actually visible (lazy-load trigger) ---
+            if mode == "harvest":
                 try:
-                    item.scroll_into_view_if_needed(timeout=2000)
+                    page.wait_for_selector(CARD_SELECTOR, timeout=10000)
                 except:
                     pass
 
-                # --- Allow YouTube Mobile's JS to hydrate thumbnail src values ---
-                page.wait_for_timeout(200)  # small wait after scroll
+                stats = {}
+                for card in harvest_cards(page, target_count, time_budget, stats=stats):
+                    emit(card)
 
-                # --- Additional lazy load trigger (mouse wheel) ---
-                page.mouse.wheel(0, 200)
-                page.wait_for_timeout(120)
+                # one evaluate per scroll step vs. the per-card calls for the same cards
+                saved = max(len(results) * DOM_CALLS_PER_CARD - stats["steps"] - 1, 0)
+                print(f"[scrape_youtube] harvest mode: {len(results)} cards in {stats['steps']} scroll steps "
+                      f"(stopped on {stats['stop_reason']}, {stats['skipped']} never hydrated), "
+                      f"saved ~{saved} browser round trips vs dom mode", file=LOG_STREAM)
+            elif mode == "bulk":
+                try:
+                    page.wait_for_selector(CARD_SELECTOR, timeout=10000)
+                except:
+                    pass
 
-                # --- Scrape the card after guaranteed loading ---
-                card = scrape_video(item)
+                for card in extract_cards_bulk(page):
+                    emit(card)
 
-                if card:
-                    results.append(card)
+                # wait_for_selector + evaluate vs. the per-card calls for the same cards
+                saved = max(len(results) * DOM_CALLS_PER_CARD - 2, 0)
+                print(f"[scrape_youtube] bulk mode: {len(results)} cards in one evaluate call, "
+                      f"saved ~{saved} browser round trips vs dom mode", file=LOG_STREAM)
+            else:
+                cards = find_video_cards(page)
+                card_count = cards.count()
 
-            except Exception as e:
-                print(f"[WARN] error scraping card {i}: {e}")
+                for i in range(card_count):
+                    card_started = time.monotonic()
+                    try:
+                        item = cards.nth(i)
+
+                        # --- Ensure the card is actually visible (lazy-load trigger) ---
+                        try:
+                            item.scroll_into_view_if_needed(timeout=2000)
+                        except:
+                            pass
+
+                        # --- Allow YouTube Mobile's JS to hydrate thumbnail src values ---
+                        page.wait_for_timeout(200)  # small wait after scroll
+
+                        # --- Additional lazy load trigger (mouse wheel) ---
+                        page.mouse.wheel(0, 200)
+                        page.wait_for_timeout(120)
 
-        # Write results to file if requested
-        if output_path:
-            out_abs = os.path.abspath(output_path)
-            os.makedirs(os.path.dirname(out_abs), exist_ok=True)
-            with open(out_abs, "w", encoding="utf-8") as f:
-                json.dump(results, f, indent=2)
-            print(f"[scrape_youtube] Wrote {len(results)} items to {out_abs}")
+                        # --- Scrape the card after guaranteed loading ---
+                        card = scrape_video(item)
 
-        # Also print JSON to stdout for convenience
-        print(json.dumps(results, indent=2))
+                        if card:
+                            emit(card)
+                        record_span("scrape.card", time.monotonic() - card_started, mode="dom", index=i,
+                                    url=card["url"] if card else None)
 
-        browser.close()
+                    except Exception as e:
+                        record_span("scrape.card", time.monotonic() - card_started, "error", mode="dom", index=i,
+                                    error=str(e))
+                        print(f"[WARN] error scraping card {i}: {e}", file=LOG_STREAM)
+
+        if writer:
+            print(f"[scrape_youtube] Wrote {writer.count} items to {os.path.abspath(writer.path)} "
+                  f"(published as {os.path.abspath(output_path)})", file=LOG_STREAM)
+
+        if seen.duplicates:
+            print(f"[scrape_youtube] Dropped {seen.duplicates} duplicate cards (same video id)", file=LOG_STREAM)
+        if SCRAPE_PRINT_JSON:
+            print(json.dumps(results, indent=2), file=LOG_STREAM)
+
+        print(f"[scrape_youtube] {blocker.summary()}", file=LOG_STREAM)
+        scrape_attrs["cards"] = len(results)
+        scrape_attrs["duplicates"] = seen.duplicates
+        count("cards_scraped_total", len(results), mode=mode)
 
     return results
 
+def iter_feed_cards(
+    mode: str = SCRAPE_MODE,
+    target_count: int = SCRAPE_TARGET_COUNT,
+    time_budget: float = SCRAPE_TIME_BUDGET,
+):
+    """
+    Generator form of scrape_youtube: yields cards while the browser stays
+    open, so callers can process them before the feed is fully loaded.
+    
+    Supports the harvest, bulk and initial_data modes ("dom" harvests).
+    Nothing is written to disk. Cards are deduplicated by video id.
+    """
+    yielded = 0
+    seen = VideoCollection()
+    with span("scrape", mode=mode, streaming=True) as scrape_attrs, _sync_context() as context:
+        blocker = ResourceBlocker.from_env().install(context)
+
+        try:
+            if mode == "initial_data":
+                response = context.request.get(YOUTUBE_URL)
+                cards = parse_initial_data_html(response.text())[:target_count]
+            else:
+                page = context.new_page()
+                page.goto(YOUTUBE_URL)
+                try:
+                    page.wait_for_selector(CARD_SELECTOR, timeout=10000)
+                except:
+                    pass
+
+                if mode == "bulk":
+                    cards = extract_cards_bulk(page)[:target_count]
+                else:
+                    cards = harvest_cards(page, target_count, time_budget)
+
+            for card in cards:
+                video = Video.from_dict(card)
+                if video is not None:
+                    if seen.add(video) is None:
+                        continue
+                    card = video.to_dict()
+                yielded += 1
+                yield card
+        finally:
+            print(f"[scrape_youtube] {blocker.summary()}", file=LOG_STREAM)
+            scrape_attrs["cards"] = yielded
+            count("cards_scraped_total", yielded, mode=mode)
+
+
 def add_to_watch_later(video_url: str, timeout: int = 10000) -> dict:
     """
     Add a YouTube video to the Watch Later playlist.
@@ -134,92 +559,556 @@ def add_to_watch_later(video_url: str, timeout: int = 10000) -> dict:
             - url: str (original URL)
             - message: str (error message if failed)
     """
+    return add_many_to_watch_later([video_url], timeout=timeout)[0]
+
+
+def add_many_to_watch_later(video_urls, timeout: int = 10000) -> list[dict]:
+    """
+    Add several YouTube videos to Watch Later.
+    
+    With WATCH_LATER_BACKEND=http a list is sent in batched HTTP requests
+    (see watch_later_http.py) and only failures go through the browser;
+    otherwise every video uses the browser flow below. Any other iterable
+    (e.g. a queue fed while the model streams) is consumed lazily: each URL
+    is added as soon as it arrives.
+    
+    Args:
+        video_urls: Iterable of full YouTube video URLs
+        timeout: Maximum time to wait for elements (milliseconds)
+    
+    Returns:
+        List of result dicts (same shape as add_to_watch_later), in input order
+    """
+    if WATCH_LATER_BACKEND != "http" or _watch_later_client() is None:
+        return _add_many_in_browser(video_urls, timeout)
+
+    if isinstance(video_urls, (list, tuple)):
+        return _add_batch_via_http(list(video_urls), timeout)
+    # Don't drain a lazy iterable into one batch: that waits for its last URL
+    results = []
+    for video_url in video_urls:
+        results += _add_batch_via_http([video_url], timeout)
+    return results
+
+
+def _add_batch_via_http(video_urls: list, timeout: int) -> list[dict]:
+    results = _add_many_via_http(video_urls)
+    retry = _http_fallback_urls(video_urls, results)
+    if retry:
+        results = _merge_results(video_urls, results, _add_many_in_browser(retry, timeout))
+    return results
+
+
+def _add_many_in_browser(video_urls, timeout: int = 10000) -> list[dict]:
+    """
+    Add several YouTube videos to Watch Later with one browser and context.
+    
+    Chromium is launched and storage_state.json is loaded once; each URL gets
+    a fresh page in the shared authenticated context. URLs are consumed
+    lazily, so a generator or queue can feed videos while they are chosen;
+    the browser starts as soon as the first URL arrives.
+    
+    Args:
+        video_urls: Iterable of full YouTube video URLs
+        timeout: Maximum time to wait for elements (milliseconds)
+    
+    Returns:
+        List of result dicts (same shape as add_to_watch_later), in input order
+    """
+    video_urls = iter(video_urls)
+    first_url = next(video_urls, None)
+    if first_url is None:
+        return []
+
+    cache = SelectorCache.load()
+    results = []
+    pending = [first_url]
+    try:
+        with _sync_context() as context:
+            blocker = ResourceBlocker.from_env().install(context)
+
+            for video_url in itertools.chain([first_url], video_urls):
+                pending = [video_url]
+                page = context.new_page()
+                try:
+                    with span("watch_later.add", url=video_url) as attrs:
+                        result = _add_to_watch_later_on_page(page, video_url, timeout, cache)
+                        _note_watch_later(attrs, result)
+                    results.append(result)
+                finally:
+                    page.close()
+                pending = []
+
+            print(f"[add_to_watch_later] {blocker.summary()}", file=LOG_STREAM)
+
+    except Exception as e:
+        message = f"Error: {str(e)}"
+        print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+        # Keep the results we already have; every remaining URL fails too
+        results += [
+            {"success": False, "url": url, "message": message}
+            for url in itertools.chain(pending, video_urls)
+        ]
+
+    cache.save()
+    return results
+
+
+_HTTP_CLIENT = None
+
+
+def _watch_later_client():
+    """
+    Return the pooled HTTP Watch Later client, or None if the storage
+    state has no usable session.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        from watch_later_http import WatchLaterClient, AuthError
+        try:
+            _HTTP_CLIENT = WatchLaterClient.from_state(STATE_FILE, YOUTUBE_ORIGIN)
+        except (OSError, ValueError, AuthError) as e:
+            print(f"[add_to_watch_later] WARNING: HTTP backend unavailable, using the browser: {e}", file=LOG_STREAM)
+            return None
+    return _HTTP_CLIENT
+
+
+def _add_many_via_http(video_urls: list) -> list[dict] | None:
+    """
+    Add videos with batched HTTP requests. Returns None if the backend is
+    unavailable.
+    """
+    if not video_urls:
+        return []
+    client = _watch_later_client()
+    if client is None:
+        return None
+    with span("watch_later.http", videos=len(video_urls)) as attrs:
+        results = client.add_many(video_urls)
+        attrs["succeeded"] = sum(r["success"] for r in results)
+    for r in results:
+        # Failures are counted by the browser fallback, if it runs
+        if r["success"] or not WATCH_LATER_HTTP_FALLBACK:
+            count("watch_later_total", result="success" if r["success"] else "failure")
+    return results
+
+
+def _http_fallback_urls(video_urls: list, results: list[dict] | None) -> list:
+    """
+    URLs the browser still has to add after the HTTP backend ran.
+    """
+    if results is None:
+        return video_urls
+    failed = [r["url"] for r in results if not r["success"]]
+    if failed and WATCH_LATER_HTTP_FALLBACK:
+        print(f"[add_to_watch_later] Retrying {len(failed)} videos in the browser", file=LOG_STREAM)
+        return failed
+    return []
+
+
+def _merge_results(video_urls: list, results: list[dict] | None, retried: list[dict]) -> list[dict]:
+    by_url = {r["url"]: r for r in results or []}
+    by_url.update((r["url"], r) for r in retried)
+    return [by_url[url] for url in video_urls]
+
+
+def _note_watch_later(attrs: dict, result: dict):
+    """
+    Attach a Watch Later result to its telemetry span and counters.
+    """
+    attrs["success"] = result["success"]
+    if not result["success"]:
+        attrs["message"] = result["message"]
+    count("watch_later_total", result="success" if result["success"] else "failure")
+
+
+def _watch_later_flow(page, video_url: str, timeout: int, cache: SelectorCache):
+    """
+    The Save -> Watch later steps for one video on an open page, shared by
+    the sync and async Playwright APIs.
+    
+    Every Playwright call that does I/O is yielded: with the sync API the
+    yielded value already is the result, with the async API it is awaited
+    (see _drive and _drive_async). Exceptions propagate.
+    
+    Returns:
+        dict with keys success, url, message (see add_to_watch_later)
+    """
     result = {
         "success": False,
         "url": video_url,
         "message": ""
     }
     
+    print(f"[add_to_watch_later] Navigating to {video_url}", file=LOG_STREAM)
+    yield page.goto(video_url, wait_until="domcontentloaded", timeout=timeout)
+    
+    # Wait for the Save button itself rather than for the network to go idle
+    save_button, selector = yield from _resolve_selector(page, cache, "save_button", SAVE_BUTTON_SELECTORS, timeout)
+    
+    if not save_button:
+        result["message"] = "Could not find Save button"
+        print(f"[add_to_watch_later] ERROR: {result['message']}", file=LOG_STREAM)
+        return result
+    
+    print(f"[add_to_watch_later] Found Save button with selector: {selector}", file=LOG_STREAM)
+    
+    # Click the Save button
+    yield save_button.click(timeout=timeout)
+    
+    # Find and click "Watch later" option in the menu once it renders
+    watch_later_option, selector = yield from _resolve_selector(page, cache, "watch_later", WATCH_LATER_SELECTORS, timeout)
+    
+    if not watch_later_option:
+        result["message"] = "Could not find Watch Later option in menu"
+        print(f"[add_to_watch_later] ERROR: {result['message']}", file=LOG_STREAM)
+        return result
+    
+    print(f"[add_to_watch_later] Found Watch Later option with selector: {selector}", file=LOG_STREAM)
+    
+    # Click Watch Later
+    yield watch_later_option.click(timeout=timeout)
+    yield page.wait_for_timeout(1000)  # Wait for action to complete
+    
+    # Success!
+    result["success"] = True
+    result["message"] = "Successfully added to Watch Later"
+    print(f"[add_to_watch_later] ✅ {result['message']} ({video_url})", file=LOG_STREAM)
+    return result
+
+
+def _drive(flow):
+    """
+    Run a step generator against the sync API: each yielded value is
+    already the call's result.
+    """
+    try:
+        value = next(flow)
+        while True:
+            value = flow.send(value)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _drive_async(flow):
+    """
+    Run a step generator against the async API: await each yielded call
+    and send back its result (or throw its exception into the generator).
+    """
+    try:
+        step = next(flow)
+        while True:
+            try:
+                value = await step
+            except Exception as e:
+                step = flow.throw(e)
+            else:
+                step = flow.send(value)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _add_to_watch_later_on_page(page, video_url: str, timeout: int, cache: SelectorCache) -> dict:
+    """
+    Run the Save -> Watch later flow for one video on an open (sync) page.
+    
+    Returns:
+        dict with keys success, url, message (see add_to_watch_later)
+    """
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(storage_state=STATE_FILE)
-            page = context.new_page()
-            
-            print(f"[add_to_watch_later] Navigating to {video_url}")
-            page.goto(video_url, wait_until="domcontentloaded", timeout=timeout)
-            
-            # Wait for page to be ready
-            page.wait_for_load_state("networkidle", timeout=timeout)
-            
-            # YouTube has multiple possible button selectors, try them in order
-            save_button_selectors = [
-                "button[aria-label*='Save']",
-                "button[aria-label*='save']",
-                "ytd-button-renderer:has-text('Save')",
-                "#button-shape-like + button",  # Often next to like button
-            ]
-            
-            save_button = None
-            for selector in save_button_selectors:
-                try:
-                    save_button = page.locator(selector).first
-                    if save_button.is_visible(timeout=2000):
-                        print(f"[add_to_watch_later] Found Save button with selector: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not save_button:
-                result["message"] = "Could not find Save button"
-                print(f"[add_to_watch_later] ERROR: {result['message']}")
-                browser.close()
-                return result
-            
-            # Click the Save button
-            save_button.click(timeout=timeout)
-            page.wait_for_timeout(1000)  # Wait for menu to appear
-            
-            # Find and click "Watch later" option in the menu
-            watch_later_selectors = [
-                "text='Watch later'",
-                "text='Watch Later'",
-                "ytd-playlist-add-to-option-renderer:has-text('Watch later')",
-                "[aria-label*='Watch later']",
-            ]
-            
-            watch_later_option = None
-            for selector in watch_later_selectors:
-                try:
-                    watch_later_option = page.locator(selector).first
-                    if watch_later_option.is_visible(timeout=2000):
-                        print(f"[add_to_watch_later] Found Watch Later option with selector: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not watch_later_option:
-                result["message"] = "Could not find Watch Later option in menu"
-                print(f"[add_to_watch_later] ERROR: {result['message']}")
-                browser.close()
-                return result
-            
-            # Click Watch Later
-            watch_later_option.click(timeout=timeout)
-            page.wait_for_timeout(1000)  # Wait for action to complete
-            
-            # Success!
-            result["success"] = True
-            result["message"] = "Successfully added to Watch Later"
-            print(f"[add_to_watch_later] ✅ {result['message']}")
-            
-            browser.close()
-            
+        return _drive(_watch_later_flow(page, video_url, timeout, cache))
     except Exception as e:
-        result["message"] = f"Error: {str(e)}"
-        print(f"[add_to_watch_later] ERROR: {result['message']}")
+        message = f"Error: {str(e)}"
+        print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+        return {"success": False, "url": video_url, "message": message}
+
+
+async def _add_to_watch_later_on_page_async(page, video_url: str, timeout: int, cache: SelectorCache) -> dict:
+    """
+    Async counterpart of _add_to_watch_later_on_page. Exceptions propagate
+    to WatchLaterSession, which bounds and reports each tab.
+    """
+    return await _drive_async(_watch_later_flow(page, video_url, timeout, cache))
+
+
+def _race_locator(page, candidates: list[str]):
+    """
+    Combine candidate selectors into one locator matching whichever renders.
+    """
+    combined = page.locator(candidates[0])
+    for selector in candidates[1:]:
+        combined = combined.or_(page.locator(selector))
+    return combined.filter(visible=True).first
+
+
+def _resolve_selector(page, cache: SelectorCache, group: str, candidates: list[str], timeout: int):
+    """
+    Race all candidate selectors at once, then identify the winner (a step
+    generator, see _watch_later_flow).
     
-    return result
+    Candidates are checked in learned order, so the usual winner costs a
+    single extra call. Hits (with latency) and misses go to the cache.
+    
+    Returns:
+        (locator, selector) for the visible element, or (None, None)
+    """
+    ordered = cache.ordered(group, candidates)
+    started = time.monotonic()
+    
+    try:
+        yield _race_locator(page, ordered).wait_for(state="visible", timeout=timeout)
+    except:
+        return None, None
+    
+    latency_ms = (time.monotonic() - started) * 1000
+    for selector in ordered:
+        locator = page.locator(selector).filter(visible=True)
+        if (yield locator.count()):
+            cache.record_hit(group, selector, latency_ms)
+            return locator.first, selector
+        cache.record_miss(group, selector)
+    
+    # The element disappeared between the race and the check; use the race result
+    return _race_locator(page, ordered), "any"
+
+
+class WatchLaterSession:
+    """
+    One browser and authenticated context for async Watch Later additions.
+    
+    `add` may be awaited from many tasks at once: at most `concurrency` tabs
+    run together, each video is bounded by `task_timeout` seconds, and a
+    failing tab never affects the others. With backend="http" each video is
+    first sent as a direct HTTP request and the browser only starts if one
+    of them has to fall back to it. Adds awaited together, or while a request
+    is in flight, are batched into one edit_playlist request.
+    
+        async with WatchLaterSession(concurrency=3) as session:
+            result = await session.add(url)
+            results = await session.add_many(urls)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = WATCH_LATER_CONCURRENCY,
+        task_timeout: float = WATCH_LATER_TASK_TIMEOUT,
+        timeout: int = 10000,
+        backend: str = WATCH_LATER_BACKEND,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.task_timeout = task_timeout
+        self.timeout = timeout
+        self.backend = backend
+
+    async def __aenter__(self):
+        self.cache = SelectorCache.load()
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self._playwright = None
+        self._browser_lock = asyncio.Lock()
+        # With the HTTP backend the browser only starts if a fallback needs it
+        self.http = _watch_later_client() if self.backend == "http" else None
+        self._http_queue = []
+        self._http_flusher = None
+        if self.http is None:
+            await self._start_browser()
+        return self
+
+    async def _start_browser(self):
+        async with self._browser_lock:
+            if self._playwright is not None:
+                return
+            playwright = await async_playwright().start()
+            try:
+                self.browser = await _launch_browser_async(playwright)
+                self.context = await self.browser.new_context(storage_state=STATE_FILE)
+                self.blocker = await ResourceBlocker.from_env().install_async(self.context)
+            except:
+                await playwright.stop()
+                raise
+            self._playwright = playwright
+
+    async def __aexit__(self, *exc):
+        self.cache.save()
+        if self._playwright is None:
+            return
+        print(f"[add_to_watch_later] {self.blocker.summary()}", file=LOG_STREAM)
+        try:
+            await self.browser.close()
+        finally:
+            await self._playwright.stop()
+
+    async def add(self, video_url: str) -> dict:
+        with span("watch_later.add", url=video_url, concurrent=True) as attrs:
+            result = None
+            if self.http:
+                attrs["backend"] = "http"
+                result = await self._add_via_http(video_url)
+                if not result["success"] and WATCH_LATER_HTTP_FALLBACK:
+                    print(f"[add_to_watch_later] Retrying {video_url} in the browser", file=LOG_STREAM)
+                    result = None
+            if result is None:
+                attrs["backend"] = "browser"
+                result = await self._add(video_url)
+            _note_watch_later(attrs, result)
+        return result
+
+    async def add_many(self, video_urls) -> list[dict]:
+        """
+        Add several videos at once. Results are in input order.
+        """
+        return list(await asyncio.gather(*(self.add(url) for url in video_urls)))
+
+    async def _add_via_http(self, video_url: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._http_queue.append((video_url, future))
+        if self._http_flusher is None:
+            self._http_flusher = asyncio.create_task(self._flush_http())
+        return await future
+
+    async def _flush_http(self):
+        """
+        Send queued URLs, one add_many call per batch, until the queue is empty.
+        """
+        try:
+            await asyncio.sleep(0)  # let adds awaited in the same tick join the first batch
+            while self._http_queue:
+                batch, self._http_queue = self._http_queue, []
+                try:
+                    results = await asyncio.to_thread(self.http.add_many, [url for url, _ in batch])
+                except Exception as e:
+                    message = f"Error: {str(e)}"
+                    results = [{"success": False, "url": url, "message": message} for url, _ in batch]
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._http_flusher = None
+
+    async def _add(self, video_url: str) -> dict:
+        try:
+            await self._start_browser()
+        except Exception as e:
+            message = f"Error: {str(e)}"
+            print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+            return {"success": False, "url": video_url, "message": message}
+
+        async with self.semaphore:
+            page = None
+            try:
+                page = await self.context.new_page()
+                return await asyncio.wait_for(
+                    _add_to_watch_later_on_page_async(page, video_url, self.timeout, self.cache),
+                    timeout=self.task_timeout,
+                )
+            except asyncio.TimeoutError:
+                message = f"Error: timed out after {self.task_timeout:g}s"
+            except Exception as e:
+                message = f"Error: {str(e)}"
+            finally:
+                if page:
+                    try:
+                        await page.close()
+                    except:
+                        pass
+
+        print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+        return {"success": False, "url": video_url, "message": message}
+
+
+async def add_many_to_watch_later_async(
+    video_urls,
+    concurrency: int = WATCH_LATER_CONCURRENCY,
+    task_timeout: float = WATCH_LATER_TASK_TIMEOUT,
+    timeout: int = 10000,
+) -> list[dict]:
+    """
+    Add several YouTube videos to Watch Later using concurrent tabs.
+    
+    All tabs share one browser and one authenticated context (see
+    WatchLaterSession). A list is added in one pass; any other iterable
+    (e.g. a queue fed while the model streams) is consumed lazily and each
+    URL starts as soon as it arrives.
+    
+    Args:
+        video_urls: Iterable of full YouTube video URLs
+        concurrency: Maximum number of tabs working at the same time
+        task_timeout: Maximum seconds per video, including navigation
+        timeout: Maximum time to wait for elements (milliseconds)
+    
+    Returns:
+        List of result dicts (same shape as add_to_watch_later), in input order
+    """
+    if not isinstance(video_urls, (list, tuple)):
+        return await _add_stream_async(video_urls, concurrency, task_timeout, timeout)
+
+    video_urls = list(video_urls)
+    if not video_urls:
+        return []
+
+    if WATCH_LATER_BACKEND == "http":
+        # One batched request for the whole list; only failures open tabs
+        results = await asyncio.to_thread(_add_many_via_http, video_urls)
+        retry = _http_fallback_urls(video_urls, results)
+        if retry:
+            retried = await _add_many_in_browser_async(retry, concurrency, task_timeout, timeout)
+            results = _merge_results(video_urls, results, retried)
+        return results
+    return await _add_many_in_browser_async(video_urls, concurrency, task_timeout, timeout)
+
+
+async def _add_many_in_browser_async(video_urls: list, concurrency: int, task_timeout: float, timeout: int) -> list[dict]:
+    try:
+        async with WatchLaterSession(concurrency, task_timeout, timeout, backend="browser") as session:
+            results = await session.add_many(video_urls)
+
+    except Exception as e:
+        message = f"Error: {str(e)}"
+        print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+        results = [{"success": False, "url": url, "message": message} for url in video_urls]
+
+    return list(results)
+
+
+async def _add_stream_async(video_urls, concurrency: int, task_timeout: float, timeout: int) -> list[dict]:
+    video_urls = iter(video_urls)
+    seen = []
+    tasks = []
+    results = None
+    try:
+        async with WatchLaterSession(concurrency, task_timeout, timeout) as session:
+            while True:
+                # next() may block on a queue, so it runs off the event loop
+                video_url = await asyncio.to_thread(next, video_urls, None)
+                if video_url is None:
+                    break
+                seen.append(video_url)
+                tasks.append(asyncio.create_task(session.add(video_url)))
+            results = list(await asyncio.gather(*tasks))
+
+    except Exception as e:
+        if results is None:
+            message = f"Error: {str(e)}"
+            print(f"[add_to_watch_later] ERROR: {message}", file=LOG_STREAM)
+            seen += await asyncio.to_thread(list, video_urls)
+            results = [{"success": False, "url": url, "message": message} for url in seen]
+
+    return results
+
+
+def add_many_to_watch_later_concurrent(video_urls, **kwargs) -> list[dict]:
+    """
+    Blocking wrapper around add_many_to_watch_later_async for sync callers.
+
+    Like TelegramClient.send, it runs on a helper thread with its own loop
+    when the calling thread already has one running.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(add_many_to_watch_later_async(video_urls, **kwargs))
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(propagate(lambda: asyncio.run(add_many_to_watch_later_async(video_urls, **kwargs)))).result()
+
 
 if __name__ == "__main__":
     scrape_youtube()
\ No newline at end of file
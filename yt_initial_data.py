@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+ytInitialData Extraction for YouTube Agent
+Parses the feed JSON YouTube embeds in the homepage HTML into the same
+{title, url, thumbnail, channel} records the DOM scraper produces, plus
+video id, duration, view count and publish age.
+
+Works on raw HTML, so it can be run offline against saved pages:
+    python yt_initial_data.py saved_homepage.html
+"""
+
+import os
+import re
+import sys
+import json
+from urllib.parse import urlsplit
+
+# Same override as youtube_actions, so fixture pages produce fixture URLs
+YOUTUBE_ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(os.getenv("YOUTUBE_URL", "https://www.youtube.com/")))
+
+# Both forms appear in the wild:
+#   var ytInitialData = {...};
+#   window["ytInitialData"] = {...};
+INITIAL_DATA_MARKER = re.compile(r"""(?:var\s+ytInitialData|window\[["']ytInitialData["']\])\s*=\s*""")
+
+DURATION_TEXT = re.compile(r"^\d+(:\d{2}){1,2}$")
+
+
+def extract_initial_data(html: str) -> dict | None:
+    """
+    Return the ytInitialData object embedded in a YouTube page, or None.
+    """
+    match = INITIAL_DATA_MARKER.search(html)
+    if not match:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def parse_initial_data_html(html: str) -> list[dict]:
+    """
+    Parse homepage HTML into video records (Shorts removed).
+    """
+    data = extract_initial_data(html)
+    if data is None:
+        return []
+    return parse_feed(data)
+
+
+def parse_feed(data: dict) -> list[dict]:
+    """
+    Walk the rich-grid renderers of a ytInitialData object into video records.
+
+    Each record has title, url, thumbnail, channel, video_id, duration,
+    views and published; Shorts, ads and shelves of Shorts are skipped.
+    """
+    results = []
+    seen = set()
+    for item in _iter_rich_items(data):
+        record = None
+        if "videoRenderer" in item:
+            record = _parse_video_renderer(item["videoRenderer"])
+        elif "lockupViewModel" in item:
+            record = _parse_lockup(item["lockupViewModel"])
+
+        if record and record["video_id"] not in seen:
+            seen.add(record["video_id"])
+            results.append(record)
+    return results
+
+
+def _iter_rich_items(data: dict):
+    """
+    Yield the `content` of every richItemRenderer in the homepage grid,
+    including items nested in section shelves.
+    """
+    tabs = (
+        data.get("contents", {})
+        .get("twoColumnBrowseResultsRenderer", {})
+        .get("tabs", [])
+    )
+    for tab in tabs:
+        grid = tab.get("tabRenderer", {}).get("content", {}).get("richGridRenderer")
+        if grid:
+            yield from _iter_grid_contents(grid.get("contents", []))
+
+
+def _iter_grid_contents(contents: list):
+    for entry in contents:
+        if "richItemRenderer" in entry:
+            yield entry["richItemRenderer"].get("content", {})
+        elif "richSectionRenderer" in entry:
+            shelf = entry["richSectionRenderer"].get("content", {}).get("richShelfRenderer")
+            if shelf:
+                yield from _iter_grid_contents(shelf.get("contents", []))
+
+
+def _text(value) -> str | None:
+    """
+    Read YouTube's text containers: simpleText, runs or view-model content.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if "simpleText" in value:
+        return value["simpleText"]
+    if "runs" in value:
+        return "".join(run.get("text", "") for run in value["runs"]) or None
+    if "content" in value:
+        return value["content"]
+    return None
+
+
+def _watch_url(video_id: str) -> str:
+    return f"{YOUTUBE_ORIGIN}/watch?v={video_id}"
+
+
+def _parse_video_renderer(renderer: dict) -> dict | None:
+    video_id = renderer.get("videoId")
+    if not video_id:
+        return None
+
+    nav_url = (
+        renderer.get("navigationEndpoint", {})
+        .get("commandMetadata", {})
+        .get("webCommandMetadata", {})
+        .get("url", "")
+    )
+    if "/shorts/" in nav_url:
+        return None
+
+    thumbnails = renderer.get("thumbnail", {}).get("thumbnails", [])
+    channel = _text(renderer.get("ownerText")) or _text(renderer.get("shortBylineText"))
+
+    return {
+        "title": _text(renderer.get("title")),
+        "url": _watch_url(video_id),
+        "thumbnail": thumbnails[-1]["url"] if thumbnails else None,
+        "channel": channel,
+        "video_id": video_id,
+        "duration": _text(renderer.get("lengthText")),
+        "views": _text(renderer.get("viewCountText")) or _text(renderer.get("shortViewCountText")),
+        "published": _text(renderer.get("publishedTimeText")),
+    }
+
+
+def _parse_lockup(lockup: dict) -> dict | None:
+    if lockup.get("contentType") != "LOCKUP_CONTENT_TYPE_VIDEO":
+        return None
+    video_id = lockup.get("contentId")
+    if not video_id:
+        return None
+
+    metadata = lockup.get("metadata", {}).get("lockupMetadataViewModel", {})
+    rows = (
+        metadata.get("metadata", {})
+        .get("contentMetadataViewModel", {})
+        .get("metadataRows", [])
+    )
+    row_texts = [
+        [_text(part.get("text")) for part in row.get("metadataParts", [])]
+        for row in rows
+    ]
+    # Row 0: channel; row 1: views, publish age
+    channel = row_texts[0][0] if row_texts and row_texts[0] else None
+    details = row_texts[1] if len(row_texts) > 1 else []
+
+    image = lockup.get("contentImage", {}).get("thumbnailViewModel", {})
+    sources = image.get("image", {}).get("sources", [])
+
+    return {
+        "title": _text(metadata.get("title")),
+        "url": _watch_url(video_id),
+        "thumbnail": sources[-1]["url"] if sources else None,
+        "channel": channel,
+        "video_id": video_id,
+        "duration": _find_duration_badge(image.get("overlays", [])),
+        "views": details[0] if len(details) > 0 else None,
+        "published": details[1] if len(details) > 1 else None,
+    }
+
+
+def _find_duration_badge(node) -> str | None:
+    """
+    Search thumbnail overlays for a badge that looks like a duration (12:34).
+    """
+    if isinstance(node, dict):
+        badge = node.get("thumbnailBadgeViewModel")
+        if badge and DURATION_TEXT.match(badge.get("text", "")):
+            return badge["text"]
+        node = list(node.values())
+    if isinstance(node, list):
+        for child in node:
+            found = _find_duration_badge(child)
+            if found:
+                return found
+    return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python yt_initial_data.py <saved_homepage.html>", file=sys.stderr)
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        records = parse_initial_data_html(f.read())
+    print(json.dumps(records, indent=2))
+    print(f"[yt_initial_data] Parsed {len(records)} videos", file=sys.stderr)